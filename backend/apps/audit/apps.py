@@ -5,3 +5,15 @@ class AuditConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.audit'
     verbose_name = 'Audit'
+
+    def ready(self):
+        from django.conf import settings
+        from .writer import audit_writer
+
+        audit_writer.configure(
+            enabled=getattr(settings, 'AUDIT_BUFFER_ENABLED', None),
+            batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', None),
+            flush_interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', None),
+            max_queue=getattr(settings, 'AUDIT_MAX_QUEUE', None),
+            sample_rate=getattr(settings, 'AUDIT_SAMPLE_RATE', None)
+        )
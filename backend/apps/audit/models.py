@@ -3,6 +3,7 @@ Modelos para auditoría de seguridad.
 """
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class AuditLog(models.Model):
@@ -43,7 +44,8 @@ class AuditLog(models.Model):
     user_agent = models.TextField(blank=True)
     description = models.TextField()
     metadata = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Momento del evento: el registro se inserta más tarde, en lote
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         db_table = 'audit_logs'
@@ -3,6 +3,7 @@ Servicio de logging centralizado.
 """
 from django.utils import timezone
 from .models import AuditLog, SecurityAlert
+from .writer import audit_writer
 
 
 class AuditService:
@@ -11,10 +12,19 @@ class AuditService:
     BRUTE_FORCE_THRESHOLD = 5
     BRUTE_FORCE_WINDOW_MINUTES = 10
     
+    # Eventos que alimentan la detección: nunca se muestrean
+    UNSAMPLED_EVENTS = ('LOGIN_FAILED',)
+    
     @staticmethod
     def log(event_type: str, description: str, 
             user=None, request=None, severity='INFO', metadata=None):
-        """Registra un evento de auditoría."""
+        """
+        Registra un evento de auditoría.
+        
+        El registro se encola en audit_writer y se inserta en lote desde
+        un hilo de fondo; created_at es el momento del evento, no el de
+        la escritura.
+        """
         
         ip_address = None
         user_agent = ''
@@ -23,7 +33,10 @@ class AuditService:
             ip_address = AuditService._get_client_ip(request)
             user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        AuditLog.objects.create(
+        # Los intentos fallidos se insertan en el momento (solo esa fila,
+        # no el buffer): la detección de fuerza bruta los cuenta en la tabla
+        check_brute_force = event_type == 'LOGIN_FAILED'
+        audit_writer.submit(AuditLog(
             event_type=event_type,
             severity=severity,
             user=user,
@@ -31,10 +44,10 @@ class AuditService:
             user_agent=user_agent,
             description=description,
             metadata=metadata or {}
-        )
+        ), sample=event_type not in AuditService.UNSAMPLED_EVENTS, immediate=check_brute_force)
         
         # Verificar patrones sospechosos
-        if event_type == 'LOGIN_FAILED':
+        if check_brute_force:
             AuditService._check_brute_force(ip_address)
     
     @staticmethod
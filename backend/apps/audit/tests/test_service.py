@@ -0,0 +1,16 @@
+"""
+Auditoría en los tests de vistas.
+"""
+import pytest
+
+from apps.audit.models import AuditLog
+from apps.audit.services import AuditService
+from apps.audit.writer import audit_writer
+
+
+@pytest.mark.django_db
+def test_events_are_written_in_the_test_transaction():
+    AuditService.log('LOGIN', 'ok')
+
+    assert AuditLog.objects.filter(event_type='LOGIN').exists()
+    assert audit_writer.stats()['pending'] == 0
@@ -0,0 +1,52 @@
+"""
+Escritor de auditoría con buffer.
+"""
+import pytest
+
+from apps.audit import services
+from apps.audit.models import AuditLog, SecurityAlert
+from apps.audit.services import AuditService
+from apps.audit.writer import AuditWriter
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    """Escritor con buffer y sin hilo de volcado: solo flush() escribe la cola."""
+    writer = AuditWriter(enabled=True)
+    monkeypatch.setattr(writer, '_ensure_thread', lambda: None)
+    monkeypatch.setattr(services, 'audit_writer', writer)
+    yield writer
+    # Su close() corre en atexit, ya sin base de datos de test
+    writer._queue.clear()
+
+
+@pytest.mark.django_db
+def test_login_failed_writes_only_its_row(writer):
+    AuditService.log('LOGIN', 'ok')
+    AuditService.log('LOGIN_FAILED', 'mal', severity='WARNING')
+
+    assert list(AuditLog.objects.values_list('event_type', flat=True)) == ['LOGIN_FAILED']
+    assert writer.stats()['pending'] == 1
+
+
+@pytest.mark.django_db
+def test_brute_force_alert_from_unflushed_failures(writer, rf):
+    request = rf.post('/api/auth/login/', REMOTE_ADDR='10.0.0.7')
+    for _ in range(AuditService.BRUTE_FORCE_THRESHOLD):
+        AuditService.log('LOGIN_FAILED', 'mal', request=request, severity='WARNING')
+
+    assert SecurityAlert.objects.filter(alert_type='BRUTE_FORCE').exists()
+    assert writer.stats()['pending'] == 0
+
+
+@pytest.mark.django_db
+def test_bad_row_does_not_drop_the_batch(writer):
+    writer.submit(AuditLog(event_type='LOGIN', description='uno'))
+    writer.submit(AuditLog(event_type='LOGIN', description=None))
+    writer.submit(AuditLog(event_type='LOGOUT', description='dos'))
+
+    assert writer.flush() == 2
+
+    assert sorted(AuditLog.objects.values_list('description', flat=True)) == ['dos', 'uno']
+    stats = writer.stats()
+    assert (stats['written'], stats['failed'], stats['pending']) == (2, 1, 0)
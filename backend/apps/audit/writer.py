@@ -0,0 +1,195 @@
+"""
+Escritor de auditoría con buffer.
+
+AuditService.log encola el registro en memoria y un hilo de fondo lo
+inserta con bulk_create cuando el buffer llega a `batch_size` o pasa
+`flush_interval` segundos, en lugar de una transacción de escritura por
+evento dentro de la petición. Al terminar el proceso se vacía lo
+pendiente.
+
+Los eventos DEBUG/INFO se muestrean con `sample_rate` (1.0 = todos);
+los que se guardan llevan la tasa en metadata['sample_rate'] para poder
+extrapolar. WARNING y superiores se guardan siempre.
+
+Si el proceso muere sin salir limpiamente se pierde como mucho un
+intervalo de eventos; con AUDIT_BUFFER_ENABLED=False cada evento se
+escribe en el momento. Los tests desactivan el buffer en conftest.py:
+el hilo de volcado usa su propia conexión, fuera de la transacción de
+cada test.
+"""
+import atexit
+import logging
+import os
+import random
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+from django.db import close_old_connections, transaction
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Cola de AuditLog pendientes con volcado por tamaño o por tiempo."""
+
+    DEFAULT_BATCH_SIZE = 200
+    DEFAULT_FLUSH_INTERVAL = 2.0
+    DEFAULT_MAX_QUEUE = 10000
+    SAMPLED_SEVERITIES = ('DEBUG', 'INFO')
+
+    def __init__(self, enabled: bool = True, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_queue: int = DEFAULT_MAX_QUEUE, sample_rate: float = 1.0):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.sample_rate = sample_rate
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'written': 0, 'sampled_out': 0, 'failed': 0, 'flushes': 0}
+        atexit.register(self.close)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def configure(self, enabled: Optional[bool] = None, batch_size: Optional[int] = None,
+                  flush_interval: Optional[float] = None, max_queue: Optional[int] = None,
+                  sample_rate: Optional[float] = None):
+        """Ajusta el escritor (se llama desde AppConfig.ready)."""
+        if enabled is not None:
+            self.enabled = enabled
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        if max_queue is not None:
+            self.max_queue = max_queue
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+    def submit(self, entry: AuditLog, sample: bool = True, immediate: bool = False) -> bool:
+        """
+        Encola un registro (sin guardar). Retorna False si el muestreo lo descarta.
+
+        Con sample=False el registro nunca se descarta, sea cual sea su
+        severidad (p. ej. eventos que alimentan la detección de ataques).
+        Con immediate=True se inserta solo ese registro en el momento, sin
+        pasar por la cola (el llamante lo consulta a continuación).
+        """
+        rate = self.sample_rate
+        if sample and rate < 1.0 and entry.severity in self.SAMPLED_SEVERITIES:
+            if random.random() >= rate:
+                with self._lock:
+                    self._stats['sampled_out'] += 1
+                return False
+            entry.metadata = dict(entry.metadata or {}, sample_rate=rate)
+
+        if immediate or not self.enabled:
+            self._write([entry])
+            return True
+
+        with self._lock:
+            self._queue.append(entry)
+            pending = len(self._queue)
+        self._ensure_thread()
+        if pending >= self.max_queue:
+            # El hilo no da abasto: el llamante vuelca (contrapresión, no se pierde nada)
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """Inserta todo lo pendiente; retorna cuántos registros se escribieron."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._queue.popleft()
+                             for _ in range(min(self.batch_size, len(self._queue)))]
+                if not batch:
+                    return written
+                written += self._write(batch)
+
+    def _write(self, batch) -> int:
+        """
+        Inserta el lote con bulk_create; si falla, fila a fila.
+
+        Así un registro que la BD rechaza (p. ej. un campo demasiado
+        largo) no se lleva por delante el resto del lote. Cada intento va
+        en su savepoint para no romper una transacción del llamante.
+        """
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create(batch)
+            written = len(batch)
+        except Exception:
+            logger.warning('Falló el lote de %d registros de auditoría; se reintenta uno a uno',
+                           len(batch), exc_info=True)
+            written = sum(self._write_one(entry) for entry in batch)
+        with self._lock:
+            self._stats['written'] += written
+            self._stats['failed'] += len(batch) - written
+            self._stats['flushes'] += 1
+        return written
+
+    def _write_one(self, entry: AuditLog) -> bool:
+        try:
+            with transaction.atomic():
+                AuditLog.objects.bulk_create([entry])
+        except Exception:
+            logger.exception('No se pudo escribir el registro de auditoría %s', entry.event_type)
+            return False
+        return True
+
+    def _ensure_thread(self):
+        """Arranca el hilo de volcado (una vez por proceso)."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def close(self):
+        """Vuelca lo pendiente al terminar el proceso."""
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Error al vaciar el buffer de auditoría')
+
+    def _after_fork(self):
+        """En un proceso hijo se parte de una cola vacía y sin hilo."""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._queue = deque()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pendientes, escritos, descartados por muestreo y fallidos."""
+        with self._lock:
+            return dict(
+                self._stats,
+                pending=len(self._queue),
+                enabled=self.enabled,
+                sample_rate=self.sample_rate
+            )
+
+
+# Instancia compartida por AuditService
+audit_writer = AuditWriter()
@@ -5,3 +5,42 @@ class CryptoCoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.crypto_core'
     verbose_name = 'Crypto Core'
+
+    def ready(self):
+        from django.conf import settings
+        from .services.key_cache import key_cache
+        from .services.rsa_service import key_pool
+        from .services.executor import crypto_executor
+        from .services.metrics import metrics, cache_collector
+        from .services.profiler import profile_store
+
+        key_cache.configure(
+            max_size=getattr(settings, 'CRYPTO_KEY_CACHE_SIZE', None),
+            ttl=getattr(settings, 'CRYPTO_KEY_CACHE_TTL', None)
+        )
+        key_pool.configure(
+            targets=getattr(settings, 'CRYPTO_KEY_POOL_TARGETS', None),
+            enabled=getattr(settings, 'CRYPTO_KEY_POOL_ENABLED', None)
+        )
+        crypto_executor.configure(
+            mode=getattr(settings, 'CRYPTO_EXECUTOR_MODE', None),
+            max_workers=getattr(settings, 'CRYPTO_EXECUTOR_WORKERS', None),
+            max_queue=getattr(settings, 'CRYPTO_EXECUTOR_MAX_QUEUE', None),
+            queue_timeout=getattr(settings, 'CRYPTO_EXECUTOR_QUEUE_TIMEOUT', None),
+            timeout=getattr(settings, 'CRYPTO_EXECUTOR_TIMEOUT', None),
+            async_threads=getattr(settings, 'CRYPTO_ASYNC_THREADS', None)
+        )
+        metrics.configure(
+            enabled=getattr(settings, 'METRICS_ENABLED', None),
+            multiproc_dir=getattr(settings, 'METRICS_MULTIPROC_DIR', None),
+            flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', None)
+        )
+        profile_store.configure(
+            directory=getattr(settings, 'PROFILING_DIR', None),
+            max_entries=getattr(settings, 'PROFILING_MAX_FILES', None)
+        )
+        metrics.add_collector(cache_collector('rsa_keys', key_cache.stats))
+        metrics.add_collector(cache_collector('rsa_key_pool', lambda: {
+            'hits': sum(pool['hits'] for pool in key_pool.stats()['pools'].values()),
+            'misses': sum(pool['misses'] for pool in key_pool.stats()['pools'].values()),
+        }))
@@ -0,0 +1,112 @@
+"""
+Soporte para vistas async del API (despliegue ASGI).
+
+DRF no tiene vistas async, así que async_api_view reproduce sobre una
+vista async de Django lo que usan las vistas @api_view del proyecto:
+autenticación JWT, IsAuthenticated o AllowAny, throttling, los parsers
+de DRF (JSON, formulario y multipart) y respuestas JSON con el mismo
+formato de error. La autenticación, el throttling y el parseo del
+cuerpo se resuelven en una sola salida a hilo; el resto de la vista
+corre en el event loop.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+
+def json_response(data, status_code: int = status.HTTP_200_OK) -> JsonResponse:
+    """Respuesta JSON equivalente a Response + JSONRenderer."""
+    return JsonResponse(data, status=status_code, safe=False,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def validated(serializer_class, data) -> dict:
+    """
+    Valida `data` con el serializer (sin consultas a la BD).
+
+    Raises:
+        ValidationError: se responde 400 con los errores, como en DRF
+    """
+    serializer = serializer_class(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def _error_response(exc: exceptions.APIException) -> JsonResponse:
+    """Mismo cuerpo y cabeceras que el exception_handler de DRF."""
+    detail = exc.detail
+    response = json_response(detail if isinstance(detail, (list, dict)) else {'detail': detail},
+                             exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+    if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+        response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+def _check_request(request, authenticated: bool, authentication_classes=None):
+    """Autentica y aplica el throttling como APIView.initial."""
+    request.user, request.auth = AnonymousUser(), None
+    for authentication_class in authentication_classes or api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = authentication_class().authenticate(request)
+        if result is not None:
+            request.user, request.auth = result
+            break
+    if authenticated and not request.user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+
+    waits = [
+        throttle.wait()
+        for throttle in (cls() for cls in api_settings.DEFAULT_THROTTLE_CLASSES)
+        if not throttle.allow_request(request, None)
+    ]
+    if waits:
+        raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+def _parse_body(request):
+    """
+    Cuerpo de la petición con DEFAULT_PARSER_CLASSES, como request.data de DRF.
+
+    Raises:
+        ParseError, UnsupportedMediaType: como en las vistas @api_view
+    """
+    parsers = [parser_class() for parser_class in api_settings.DEFAULT_PARSER_CLASSES]
+    return Request(request, parsers=parsers).data
+
+
+def _initial(request, authenticated: bool, authentication_classes=None):
+    """Comprobaciones de _check_request y parseo del cuerpo (en el hilo)."""
+    _check_request(request, authenticated, authentication_classes)
+    request.query_params = request.GET
+    request.data = _parse_body(request) if request.method in ('POST', 'PUT', 'PATCH') else {}
+
+
+def async_api_view(methods, authenticated: bool = True, authentication_classes=None):
+    """
+    Decorador para vistas async con la semántica de @api_view.
+
+    La vista recibe request.user, request.auth, request.data (parseado
+    como en DRF) y request.query_params, y puede lanzar APIException (p. ej. con
+    validated()) para responder el error correspondiente.
+    `authentication_classes` sustituye a DEFAULT_AUTHENTICATION_CLASSES,
+    como @authentication_classes en DRF.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                await sync_to_async(_initial)(request, authenticated, authentication_classes)
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return _error_response(exc)
+        return csrf_exempt(wrapper)
+    return decorator
@@ -0,0 +1,57 @@
+"""
+Versiones async de las vistas criptográficas más usadas (despliegue ASGI).
+
+Validan en el event loop y esperan el cifrado en el ejecutor
+(crypto_executor.offload), así que una petición que espera a RSA no
+ocupa un hilo del servidor. El cuerpo de cada operación es el mismo
+helper que usa la vista síncrona.
+"""
+from .async_api import async_api_view, json_response, validated
+from .services import crypto_executor
+from .serializers import (
+    AESEncryptSerializer, AESDecryptSerializer,
+    RSAEncryptSerializer, RSADecryptSerializer, RSASignSerializer, RSAVerifySerializer
+)
+from . import views
+
+
+@async_api_view(['POST'], authenticated=False)
+async def aes_encrypt(request):
+    """POST /api/crypto/aes/encrypt/ (ver views.aes_encrypt)."""
+    data = validated(AESEncryptSerializer, request.data)
+    return json_response(*await crypto_executor.offload(views._aes_encrypt, data))
+
+
+@async_api_view(['POST'], authenticated=False)
+async def aes_decrypt(request):
+    """POST /api/crypto/aes/decrypt/ (ver views.aes_decrypt)."""
+    data = validated(AESDecryptSerializer, request.data)
+    return json_response(*await crypto_executor.offload(views._aes_decrypt, data))
+
+
+@async_api_view(['POST'], authenticated=False)
+async def rsa_encrypt(request):
+    """POST /api/crypto/rsa/encrypt/ (ver views.rsa_encrypt)."""
+    data = validated(RSAEncryptSerializer, request.data)
+    return json_response(*await crypto_executor.offload(views._rsa_encrypt, data))
+
+
+@async_api_view(['POST'], authenticated=False)
+async def rsa_decrypt(request):
+    """POST /api/crypto/rsa/decrypt/ (ver views.rsa_decrypt)."""
+    data = validated(RSADecryptSerializer, request.data)
+    return json_response(*await crypto_executor.offload(views._rsa_decrypt, data))
+
+
+@async_api_view(['POST'], authenticated=False)
+async def rsa_sign(request):
+    """POST /api/crypto/rsa/sign/ (ver views.rsa_sign)."""
+    data = validated(RSASignSerializer, request.data)
+    return json_response(*await crypto_executor.offload(views._rsa_sign, data))
+
+
+@async_api_view(['POST'], authenticated=False)
+async def rsa_verify(request):
+    """POST /api/crypto/rsa/verify/ (ver views.rsa_verify)."""
+    data = validated(RSAVerifySerializer, request.data)
+    return json_response(*await crypto_executor.offload(views._rsa_verify, data))
@@ -0,0 +1,64 @@
+"""
+Benchmark de throughput AES: cifrado por flujo vs. cifrado de una pasada.
+
+Uso:
+    python manage.py bench_aes_stream --size-mb 64 --repeat 3
+"""
+import io
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.crypto_core.services import AESService
+
+
+class Command(BaseCommand):
+    help = 'Compara el throughput (MB/s) de AESService.encrypt_stream con AESService.encrypt'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=64,
+                            help='Tamaño del payload en MB')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Repeticiones por modo (se toma la mejor)')
+        parser.add_argument('--chunk-kb', type=int, default=AESService.STREAM_CHUNK_SIZE // 1024,
+                            help='Tamaño de bloque para el modo streaming')
+
+    def handle(self, *args, **options):
+        size = options['size_mb'] * 1024 * 1024
+        chunk_size = options['chunk_kb'] * 1024
+        key = AESService.generate_key(256)
+
+        # Texto ASCII para que el camino de una pasada (str) sea comparable
+        payload = (b'PySecLab-' * (size // 9 + 1))[:size]
+        text = payload.decode('ascii')
+
+        def one_shot():
+            result = AESService.encrypt(text, key)
+            AESService.decrypt(result['ciphertext'], result['iv'], key)
+
+        def streaming():
+            encrypted = io.BytesIO()
+            for chunk in AESService.encrypt_stream(io.BytesIO(payload), key, chunk_size):
+                encrypted.write(chunk)
+            encrypted.seek(0)
+            for _ in AESService.decrypt_stream(encrypted, key, chunk_size):
+                pass
+
+        results = {}
+        for name, func in (('one_shot', one_shot), ('stream', streaming)):
+            best = min(self._time(func) for _ in range(options['repeat']))
+            results[name] = options['size_mb'] / best
+            self.stdout.write(
+                f"{name:10s} {options['size_mb']} MB encrypt+decrypt: "
+                f"{best:.3f}s  ({results[name]:.1f} MB/s)"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"stream/one_shot: {results['stream'] / results['one_shot']:.2f}x"
+        ))
+
+    @staticmethod
+    def _time(func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
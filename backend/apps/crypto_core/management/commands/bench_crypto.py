@@ -0,0 +1,209 @@
+"""
+Suite de micro-benchmarks de AESService y RSAService.
+
+Mide ops/s, p50 y p99 de cada operación y emite un informe JSON. Si se
+indica un baseline, compara ops/s con él y falla cuando alguna
+operación empeora más que el umbral permitido.
+
+Las operaciones RSA con clave privada se miden en el proceso actual
+(_decrypt, _sign, _generate_key_pair) para aislar el coste
+criptográfico del ejecutor. 'cold' vacía la caché de claves antes de
+cada operación; 'warm' reutiliza la clave ya parseada.
+
+Uso:
+    python manage.py bench_crypto --output bench.json
+    python manage.py bench_crypto --quick --baseline baseline.json --threshold 0.15
+    python manage.py bench_crypto --save-baseline baseline.json
+"""
+import json
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import cryptography
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.crypto_core.services import AESService, RSAService, key_cache
+
+PAYLOAD_SIZES = [16, 1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024, 64 * 1024 * 1024]
+QUICK_PAYLOAD_SIZES = [16, 1024, 64 * 1024, 1024 * 1024]
+
+
+def _size_label(size: int) -> str:
+    for unit, factor in (('MiB', 1024 * 1024), ('KiB', 1024)):
+        if size >= factor:
+            return f'{size // factor}{unit}'
+    return f'{size}B'
+
+
+def _percentile(sorted_samples, fraction: float) -> float:
+    """Percentil por rango más cercano."""
+    index = max(math.ceil(fraction * len(sorted_samples)) - 1, 0)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmarks de AESService y RSAService con salida JSON y baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['aes', 'rsa'],
+                            help='Ejecutar solo una familia de operaciones')
+        parser.add_argument('--quick', action='store_true',
+                            help='Cargas hasta 1 MiB, solo RSA-2048 y menos iteraciones')
+        parser.add_argument('--min-time', type=float, default=0.5,
+                            help='Segundos mínimos de medición por operación')
+        parser.add_argument('--min-iterations', type=int, default=5,
+                            help='Iteraciones mínimas por operación')
+        parser.add_argument('--max-payload', type=int, default=PAYLOAD_SIZES[-1],
+                            help='Tamaño máximo de carga AES en bytes')
+        parser.add_argument('--steps-max-payload', type=int, default=1024 * 1024,
+                            help='Tamaño máximo de carga para encrypt_with_steps')
+        parser.add_argument('--rsa-sizes', type=int, nargs='+',
+                            choices=RSAService.VALID_KEY_SIZES)
+        parser.add_argument('--output', help='Escribir el informe JSON en este archivo')
+        parser.add_argument('--baseline', help='Informe JSON previo con el que comparar')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help='Caída de ops/s tolerada respecto al baseline (0.10 = 10%%)')
+        parser.add_argument('--save-baseline', help='Guardar este informe como baseline')
+
+    def handle(self, *args, **options):
+        self.min_time = 0.1 if options['quick'] else options['min_time']
+        self.min_iterations = 3 if options['quick'] else options['min_iterations']
+        self.results = {}
+
+        if options['only'] in (None, 'aes'):
+            sizes = QUICK_PAYLOAD_SIZES if options['quick'] else PAYLOAD_SIZES
+            self._bench_aes(
+                [size for size in sizes if size <= options['max_payload']],
+                options['steps_max_payload']
+            )
+        if options['only'] in (None, 'rsa'):
+            rsa_sizes = options['rsa_sizes'] or ([2048] if options['quick'] else RSAService.VALID_KEY_SIZES)
+            self._bench_rsa(rsa_sizes)
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'cryptography': cryptography.__version__,
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'quick': options['quick']
+            },
+            'results': self.results
+        }
+
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            report['comparison'] = self._compare(baseline.get('results', {}), options['threshold'])
+            regressions = [name for name, entry in report['comparison'].items() if entry['regression']]
+
+        payload = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(payload + '\n')
+        else:
+            self.stdout.write(payload)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                f.write(payload + '\n')
+
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} operaciones empeoraron más de '
+                f"{options['threshold'] * 100:.0f}%: {', '.join(regressions)}"
+            )
+
+    def _measure(self, name, func, setup=None, payload_bytes=None):
+        """
+        Ejecuta `func` hasta cumplir min_time y min_iterations.
+
+        `setup` se ejecuta antes de cada iteración fuera de la medición.
+        """
+        samples = []
+        deadline = time.perf_counter() + self.min_time
+        while len(samples) < self.min_iterations or time.perf_counter() < deadline:
+            if setup is not None:
+                setup()
+            start = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - start)
+
+        samples.sort()
+        total_s = sum(samples) / 1e9
+        entry = {
+            'iterations': len(samples),
+            'ops_per_s': len(samples) / total_s if total_s else None,
+            'p50_ms': _percentile(samples, 0.50) / 1e6,
+            'p99_ms': _percentile(samples, 0.99) / 1e6,
+            'mean_ms': total_s * 1000 / len(samples)
+        }
+        if payload_bytes is not None and total_s:
+            entry['mb_per_s'] = payload_bytes * len(samples) / total_s / 1e6
+        self.results[name] = entry
+        sys.stderr.write(f"{name:<40s} {entry['ops_per_s']:12.1f} ops/s  "
+                         f"p50 {entry['p50_ms']:9.3f} ms  p99 {entry['p99_ms']:9.3f} ms\n")
+
+    def _bench_aes(self, sizes, steps_max_payload):
+        for key_size in AESService.VALID_KEY_SIZES:
+            key = AESService.generate_key(key_size)
+            for size in sizes:
+                label = f'{key_size}.{_size_label(size)}'
+                plaintext = 'a' * size
+                encrypted = AESService.encrypt(plaintext, key)
+
+                self._measure(f'aes.encrypt.{label}',
+                              lambda: AESService.encrypt(plaintext, key), payload_bytes=size)
+                self._measure(f'aes.decrypt.{label}',
+                              lambda: AESService.decrypt(encrypted['ciphertext'], encrypted['iv'], key),
+                              payload_bytes=size)
+                if size <= steps_max_payload:
+                    self._measure(f'aes.encrypt_with_steps.{label}',
+                                  lambda: AESService.encrypt_with_steps(plaintext, key),
+                                  payload_bytes=size)
+                del plaintext, encrypted
+
+    def _bench_rsa(self, key_sizes):
+        message = 'benchmark message'
+        for key_size in key_sizes:
+            self._measure(f'rsa.keygen.{key_size}',
+                          lambda: RSAService._generate_key_pair(key_size))
+
+            private_pem, public_pem = RSAService._generate_key_pair(key_size)
+            ciphertext = RSAService.encrypt(message, public_pem)['ciphertext']
+            signature = RSAService._sign(message, private_pem)['signature']
+            digest = RSAService.digest(message)
+
+            operations = {
+                'encrypt': lambda: RSAService.encrypt(message, public_pem),
+                'decrypt': lambda: RSAService._decrypt(ciphertext, private_pem),
+                'sign': lambda: RSAService._sign(message, private_pem),
+                'sign_digest': lambda: RSAService._sign_digest(digest, private_pem),
+                'verify': lambda: RSAService.verify(message, signature, public_pem),
+                'verify_digest': lambda: RSAService.verify_digest(digest, signature, public_pem),
+            }
+            for op, func in operations.items():
+                self._measure(f'rsa.{op}.{key_size}.cold', func, setup=key_cache.clear)
+                func()  # calentar la caché
+                self._measure(f'rsa.{op}.{key_size}.warm', func)
+
+    def _compare(self, baseline, threshold):
+        """Compara ops/s con el baseline; ratio < 1 - threshold es regresión."""
+        comparison = {}
+        for name, entry in self.results.items():
+            previous = baseline.get(name, {}).get('ops_per_s')
+            if not previous or not entry['ops_per_s']:
+                continue
+            ratio = entry['ops_per_s'] / previous
+            comparison[name] = {
+                'baseline_ops_per_s': previous,
+                'ops_per_s': entry['ops_per_s'],
+                'ratio': ratio,
+                'regression': ratio < 1 - threshold
+            }
+        return comparison
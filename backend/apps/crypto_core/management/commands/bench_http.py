@@ -0,0 +1,521 @@
+"""
+Prueba de carga HTTP de extremo a extremo.
+
+Levanta la aplicación en un servidor local (o usa uno existente con
+--url), registra usuarios con claves, ejecuta una mezcla de peticiones
+con concurrencia y tiempo de espera configurables, y reporta por
+endpoint: throughput, percentiles, histograma de latencias y número de
+consultas a la BD.
+
+Con el servidor propio se usa una BD SQLite temporal, sin throttling, y
+cada respuesta incluye las cabeceras X-Bench-Queries y X-Bench-Query-Ms.
+Contra un servidor externo las consultas a la BD no están disponibles.
+
+El servidor propio es un único worker: WSGI con un hilo por conexión o,
+con --threads N, un pool fijo de N hilos como un worker gthread de
+gunicorn; o ASGI (--server asgi, requiere uvicorn) con las vistas async.
+--streams N mantiene N streams SSE del inbox abiertos durante la carga
+para medir cuántas conexiones concurrentes atiende el worker. Bajo ASGI
+no hay recuento de consultas (el ORM async las ejecuta en otros hilos).
+
+Uso:
+    python manage.py bench_http --concurrency 8 --duration 30
+    python manage.py bench_http --url http://127.0.0.1:8000 --users 4 --json out.json
+    python manage.py bench_http --mix send=5,inbox=3,decrypt=2 --think-time 50
+    python manage.py bench_http --threads 8 --streams 64
+    python manage.py bench_http --server asgi --streams 64
+"""
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_MIX = 'login=1,send=3,inbox=3,decrypt=2,aes_encrypt=1,rsa_encrypt=1'
+ENDPOINTS = {
+    'login': 'POST /api/auth/login/',
+    'send': 'POST /api/messages/send/',
+    'inbox': 'GET /api/messages/inbox/',
+    'decrypt': 'POST /api/messages/<id>/decrypt/',
+    'aes_encrypt': 'POST /api/crypto/aes/encrypt/',
+    'rsa_encrypt': 'POST /api/crypto/rsa/encrypt/',
+}
+# Límites superiores de los buckets del histograma (ms)
+HISTOGRAM_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf')]
+PASSWORD = 'BenchPassword-2026!'
+
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _PooledWSGIServer(WSGIServer):
+    """Atiende las conexiones con un pool fijo de hilos; el resto espera."""
+    request_queue_size = 128
+    executor = None
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _query_counting(app):
+    """Envuelve la app WSGI para reportar consultas por petición en cabeceras."""
+    from django.db import connection
+
+    def wrapped(environ, start_response):
+        stats = {'count': 0, 'time': 0.0}
+
+        def counter(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['count'] += 1
+                stats['time'] += time.perf_counter() - start
+
+        captured = []
+
+        def deferred_start_response(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return lambda data: None
+
+        with connection.execute_wrapper(counter):
+            body = app(environ, deferred_start_response)
+
+        status, headers, exc_info = captured
+        start_response(status, list(headers) + [
+            ('X-Bench-Queries', str(stats['count'])),
+            ('X-Bench-Query-Ms', f"{stats['time'] * 1000:.3f}"),
+        ], exc_info)
+        return body
+
+    return wrapped
+
+
+def _percentile(sorted_samples, fraction):
+    """Percentil por rango más cercano."""
+    index = max(math.ceil(fraction * len(sorted_samples)) - 1, 0)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga HTTP de los endpoints del API con métricas por endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Servidor existente (por defecto se levanta uno local)')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Usuarios virtuales concurrentes')
+        parser.add_argument('--users', type=int, default=0,
+                            help='Usuarios a registrar (por defecto, max(concurrency, 2))')
+        parser.add_argument('--duration', type=float, default=20.0,
+                            help='Segundos de carga')
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help='Espera media entre peticiones de cada usuario (ms, exponencial)')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f'Pesos por endpoint ({", ".join(ENDPOINTS)})')
+        parser.add_argument('--encryption-types', default='HYBRID,HYBRID-GCM',
+                            help='Tipos de cifrado usados por send, separados por coma')
+        parser.add_argument('--plaintext-size', type=int, default=256)
+        parser.add_argument('--timeout', type=float, default=30.0,
+                            help='Timeout por petición (s)')
+        parser.add_argument('--json', help='Escribir el informe JSON en este archivo')
+        parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi',
+                            help='Servidor local: WSGI o ASGI con vistas async (uvicorn)')
+        parser.add_argument('--threads', type=int, default=0,
+                            help='Hilos del worker WSGI local (0 = uno por conexión)')
+        parser.add_argument('--streams', type=int, default=0,
+                            help='Streams SSE abiertos durante la carga')
+        # Uso interno: proceso servidor
+        parser.add_argument('--serve', action='store_true', help='(interno) servir la app')
+        parser.add_argument('--port', type=int, default=0, help='(interno) puerto del servidor')
+
+    def handle(self, *args, **options):
+        if options['serve']:
+            return self._serve(options['port'], options['server'], options['threads'])
+
+        mix = self._parse_mix(options['mix'])
+        self.encryption_types = options['encryption_types'].split(',')
+        self.plaintext = 'x' * options['plaintext_size']
+        self.timeout = options['timeout']
+
+        server = None
+        tmpdir = None
+        base_url = options['url']
+        try:
+            if not base_url:
+                tmpdir = tempfile.TemporaryDirectory()
+                server, base_url = self._start_server(tmpdir.name, options['server'],
+                                                      options['threads'])
+            self.base = urlsplit(base_url)
+
+            users = self._seed(options['users'] or max(options['concurrency'], 2))
+            samples = self._run(users, mix, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+            if tmpdir is not None:
+                tmpdir.cleanup()
+
+        report = self._report(samples, options)
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+
+    # Servidor
+
+    def _serve(self, port, server, threads):
+        """Proceso servidor: migra la BD temporal y sirve la app."""
+        call_command('migrate', verbosity=0, interactive=False)
+
+        if server == 'asgi':
+            import uvicorn
+            from django.core.asgi import get_asgi_application
+
+            uvicorn.run(get_asgi_application(), host='127.0.0.1', port=port,
+                        log_level='warning', lifespan='off')
+            return
+
+        from django.core.wsgi import get_wsgi_application
+
+        httpd = make_server('127.0.0.1', port, _query_counting(get_wsgi_application()),
+                            server_class=_PooledWSGIServer if threads else _ThreadingWSGIServer,
+                            handler_class=_QuietHandler)
+        if threads:
+            httpd.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        httpd.serve_forever()
+
+    def _start_server(self, tmpdir, server_type, threads):
+        if server_type == 'asgi':
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError('--server asgi requiere uvicorn (pip install uvicorn)')
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        env = dict(
+            os.environ,
+            SQLITE_PATH=os.path.join(tmpdir, 'bench.sqlite3'),
+            API_THROTTLE_ENABLED='False',
+            DEBUG='False',
+            ALLOWED_HOSTS='127.0.0.1,localhost',
+            API_ASYNC_VIEWS=str(server_type == 'asgi')
+        )
+        server = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_http',
+             '--serve', '--port', str(port), '--server', server_type, '--threads', str(threads)],
+            env=env
+        )
+
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('El servidor de pruebas terminó al arrancar')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            server.terminate()
+            raise CommandError('El servidor de pruebas no arrancó a tiempo')
+
+        self.stderr.write(f'Servidor local ({server_type}) en http://127.0.0.1:{port}')
+        return server, f'http://127.0.0.1:{port}'
+
+    # Cliente
+
+    def _request(self, method, path, body=None, token=None):
+        """Ejecuta una petición y retorna (status, json, latencia_s, consultas, ms_bd)."""
+        conn_class = http.client.HTTPSConnection if self.base.scheme == 'https' else http.client.HTTPConnection
+        conn = conn_class(self.base.hostname, self.base.port, timeout=self.timeout)
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        payload = json.dumps(body) if body is not None else None
+
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+            elapsed = time.perf_counter() - start
+        finally:
+            conn.close()
+
+        queries = response.getheader('X-Bench-Queries')
+        query_ms = response.getheader('X-Bench-Query-Ms')
+        try:
+            data = json.loads(raw) if raw else None
+        except ValueError:
+            data = None
+        return (response.status, data, elapsed,
+                int(queries) if queries is not None else None,
+                float(query_ms) if query_ms is not None else None)
+
+    def _seed(self, count):
+        """Registra `count` usuarios con claves y obtiene sus tokens."""
+        prefix = f'bench_{uuid.uuid4().hex[:8]}'
+        users = []
+        for i in range(count):
+            username = f'{prefix}_{i}'
+            status, data, *_ = self._request('POST', '/api/auth/register/', {
+                'username': username,
+                'email': f'{username}@bench.local',
+                'password': PASSWORD,
+                'password_confirm': PASSWORD,
+                'generate_keys': True,
+                'key_size': 2048
+            })
+            if status != 201:
+                raise CommandError(f'No se pudo registrar {username}: {status} {data}')
+            users.append({'username': username, 'public_key': data.get('public_key'),
+                          'token': self._login(username), 'inbox': []})
+        self.stderr.write(f'{count} usuarios registrados')
+        return users
+
+    def _login(self, username):
+        status, data, *_ = self._request('POST', '/api/auth/login/', {
+            'username': username, 'password': PASSWORD
+        })
+        if status != 200:
+            raise CommandError(f'Login fallido para {username}: {status} {data}')
+        return data['access']
+
+    @staticmethod
+    def _parse_mix(value):
+        mix = {}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in ENDPOINTS:
+                raise CommandError(f'Endpoint desconocido en --mix: {name}')
+            mix[name] = float(weight or 1)
+        return mix
+
+    def _run(self, users, mix, options):
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        by_name = {user['username']: user for user in users}
+        lock = threading.Lock()
+        samples = {name: [] for name in names}
+        think = options['think_time'] / 1000.0
+        deadline = time.monotonic() + options['duration']
+
+        def action(user, name, rng):
+            token = user['token']
+            if name == 'login':
+                return self._request('POST', '/api/auth/login/', {
+                    'username': user['username'], 'password': PASSWORD
+                })
+            if name == 'send':
+                recipient = rng.choice([u for u in users if u is not user] or users)
+                result = self._request('POST', '/api/messages/send/', {
+                    'recipient_username': recipient['username'],
+                    'plaintext': self.plaintext,
+                    'encryption_type': rng.choice(self.encryption_types)
+                }, token)
+                # Los tipos AES requieren la clave compartida: no se descifran
+                if result[0] == 201 and result[1]['message']['encryption_type'] not in ('AES', 'AES-GCM'):
+                    with lock:
+                        by_name[recipient['username']]['inbox'].append(result[1]['message']['id'])
+                return result
+            if name == 'decrypt':
+                with lock:
+                    message_id = rng.choice(user['inbox']) if user['inbox'] else None
+                if message_id is None:
+                    return None
+                return self._request('POST', f'/api/messages/{message_id}/decrypt/', {}, token)
+            if name == 'inbox':
+                return self._request('GET', '/api/messages/inbox/', None, token)
+            if name == 'aes_encrypt':
+                return self._request('POST', '/api/crypto/aes/encrypt/', {
+                    'plaintext': self.plaintext, 'mode': 'GCM'
+                }, token)
+            return self._request('POST', '/api/crypto/rsa/encrypt/', {
+                'plaintext': 'benchmark', 'public_key': user['public_key']
+            }, token)
+
+        def worker(index):
+            rng = random.Random(index)
+            user = users[index % len(users)]
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                try:
+                    result = action(user, name, rng)
+                except (OSError, http.client.HTTPException) as e:
+                    result = (0, str(e), 0.0, None, None)
+                if result is not None:
+                    with lock:
+                        samples[name].append(result[0:1] + result[2:])
+                if think:
+                    time.sleep(rng.expovariate(1 / think))
+
+        self.stderr.write(f"Carga: {options['concurrency']} usuarios virtuales durante {options['duration']}s")
+        started = time.monotonic()
+        self.streams = []
+        threads = [threading.Thread(target=self._stream, args=(users[i % len(users)], deadline),
+                                    daemon=True)
+                   for i in range(options['streams'])]
+        threads += [threading.Thread(target=worker, args=(i,), daemon=True)
+                    for i in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.monotonic() - started
+        return samples
+
+    def _stream(self, user, deadline):
+        """Mantiene un stream SSE abierto hasta `deadline` y cuenta sus eventos."""
+        conn_class = http.client.HTTPSConnection if self.base.scheme == 'https' else http.client.HTTPConnection
+        conn = conn_class(self.base.hostname, self.base.port,
+                          timeout=max(deadline - time.monotonic(), 0.1))
+        result = {'status': 0, 'open_s': None, 'events': 0}
+        start = time.perf_counter()
+        try:
+            conn.request('GET', '/api/messages/stream/',
+                         headers={'Authorization': f"Bearer {user['token']}"})
+            sock = conn.sock  # http.client lo suelta si la respuesta es HTTP/1.0
+            response = conn.getresponse()
+            result['status'] = response.status
+            result['open_s'] = time.perf_counter() - start
+            while response.status == 200 and time.monotonic() < deadline:
+                sock.settimeout(max(min(deadline - time.monotonic(), 1.0), 0.01))
+                try:
+                    line = response.fp.readline()
+                except (socket.timeout, TimeoutError):
+                    continue
+                if not line:
+                    break
+                if line.startswith(b'event: '):
+                    result['events'] += 1
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+            self.streams.append(result)
+
+    def _report(self, samples, options):
+        endpoints = {}
+        self.stdout.write(
+            f"{'endpoint':<34s} {'req':>6s} {'err':>5s} {'req/s':>8s} {'p50':>8s} "
+            f"{'p90':>8s} {'p99':>8s} {'max':>8s} {'queries':>8s} {'db ms':>7s}"
+        )
+        for name, entries in samples.items():
+            if not entries:
+                continue
+            latencies = sorted(entry[1] * 1000 for entry in entries)
+            errors = sum(1 for entry in entries if not 200 <= entry[0] < 300)
+            queries = [entry[2] for entry in entries if entry[2] is not None]
+            query_ms = [entry[3] for entry in entries if entry[3] is not None]
+
+            histogram = []
+            remaining = list(latencies)
+            for bound in HISTOGRAM_BUCKETS:
+                count = sum(1 for latency in remaining if latency <= bound)
+                remaining = remaining[count:]
+                histogram.append({'le_ms': None if bound == float('inf') else bound, 'count': count})
+
+            entry = {
+                'endpoint': ENDPOINTS[name],
+                'requests': len(entries),
+                'errors': errors,
+                'status_codes': {
+                    str(code): sum(1 for e in entries if e[0] == code)
+                    for code in sorted({e[0] for e in entries})
+                },
+                'throughput_rps': len(entries) / self.elapsed,
+                'latency_ms': {
+                    'p50': _percentile(latencies, 0.50),
+                    'p90': _percentile(latencies, 0.90),
+                    'p99': _percentile(latencies, 0.99),
+                    'max': latencies[-1],
+                    'mean': sum(latencies) / len(latencies)
+                },
+                'histogram': histogram,
+                'db_queries_avg': sum(queries) / len(queries) if queries else None,
+                'db_queries_max': max(queries) if queries else None,
+                'db_time_ms_avg': sum(query_ms) / len(query_ms) if query_ms else None
+            }
+            endpoints[name] = entry
+
+            latency = entry['latency_ms']
+            q_avg = f"{entry['db_queries_avg']:8.1f}" if queries else f"{'-':>8s}"
+            q_ms = f"{entry['db_time_ms_avg']:7.2f}" if query_ms else f"{'-':>7s}"
+            self.stdout.write(
+                f"{entry['endpoint']:<34s} {entry['requests']:6d} {errors:5d} "
+                f"{entry['throughput_rps']:8.1f} {latency['p50']:8.1f} {latency['p90']:8.1f} "
+                f"{latency['p99']:8.1f} {latency['max']:8.1f} {q_avg} {q_ms}"
+            )
+
+        total = sum(entry['requests'] for entry in endpoints.values())
+        self.stdout.write(f'Total: {total} peticiones en {self.elapsed:.1f}s '
+                          f'({total / self.elapsed:.1f} req/s), latencias en ms')
+
+        streams = None
+        if self.streams:
+            opened = sorted(s['open_s'] * 1000 for s in self.streams if s['status'] == 200)
+            streams = {
+                'requested': len(self.streams),
+                'opened': len(opened),
+                'open_ms_p50': _percentile(opened, 0.50) if opened else None,
+                'open_ms_max': opened[-1] if opened else None,
+                'events': sum(s['events'] for s in self.streams)
+            }
+            self.stdout.write(
+                f"Streams SSE: {streams['opened']}/{streams['requested']} abiertos"
+                + (f", apertura p50 {streams['open_ms_p50']:.1f} ms, max {streams['open_ms_max']:.1f} ms"
+                   if opened else '')
+                + f", {streams['events']} eventos recibidos"
+            )
+        return {
+            'config': {
+                'url': options['url'],
+                'concurrency': options['concurrency'],
+                'duration_s': options['duration'],
+                'think_time_ms': options['think_time'],
+                'mix': options['mix'],
+                'encryption_types': self.encryption_types,
+                'server': None if options['url'] else options['server'],
+                'threads': options['threads'],
+                'streams': options['streams']
+            },
+            'elapsed_s': self.elapsed,
+            'total_requests': total,
+            'endpoints': endpoints,
+            'streams': streams
+        }
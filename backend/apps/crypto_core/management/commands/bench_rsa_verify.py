@@ -0,0 +1,61 @@
+"""
+Benchmark de verificación RSA por lotes con distinto número de hilos.
+
+Uso:
+    python manage.py bench_rsa_verify --items 2000 --keys 10
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.crypto_core.services import RSAService
+
+
+class Command(BaseCommand):
+    help = 'Mide el escalado de RSAService.verify_batch según el número de hilos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=2000,
+                            help='Número de firmas a verificar')
+        parser.add_argument('--keys', type=int, default=10,
+                            help='Número de claves distintas')
+        parser.add_argument('--key-size', type=int, default=2048,
+                            choices=RSAService.VALID_KEY_SIZES)
+        parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                            help='Máximo de hilos a probar')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Preparando {options['items']} firmas con {options['keys']} claves...")
+        key_pairs = [RSAService.generate_key_pair(options['key_size'])
+                     for _ in range(options['keys'])]
+        items = []
+        for i in range(options['items']):
+            private_pem, public_pem = key_pairs[i % len(key_pairs)]
+            message = f'mensaje-{i}'
+            items.append({
+                'message': message,
+                'signature': RSAService.sign(message, private_pem)['signature'],
+                'public_key': public_pem
+            })
+
+        # Línea base: verificación individual (una petición por firma)
+        start = time.perf_counter()
+        for item in items:
+            RSAService.verify(item['message'], item['signature'], item['public_key'])
+        baseline = time.perf_counter() - start
+        self.stdout.write(f"{'sequential':>12s}: {len(items) / baseline:9.1f} verify/s")
+
+        workers = 1
+        while True:
+            start = time.perf_counter()
+            results = RSAService.verify_batch(items, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            assert all(r['valid'] for r in results)
+            self.stdout.write(
+                f"{workers:>4d} workers: {len(items) / elapsed:9.1f} verify/s "
+                f"(x{baseline / elapsed:.2f})"
+            )
+            if workers >= options['max_workers']:
+                break
+            workers = min(workers * 2, options['max_workers'])
@@ -0,0 +1,52 @@
+"""
+Benchmark de memoria de las políticas de traza (tracemalloc).
+
+Uso:
+    python manage.py bench_trace_memory --chars 10000
+"""
+import json
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from apps.crypto_core.services import AESService, AEADService, RSAService
+from apps.crypto_core.services.trace import POLICIES
+
+
+class Command(BaseCommand):
+    help = 'Mide el pico de memoria y el tamaño de respuesta de cada política de traza'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chars', type=int, default=10000,
+                            help='Longitud del mensaje en caracteres')
+        parser.add_argument('--preview-bytes', type=int, default=64)
+
+    def handle(self, *args, **options):
+        plaintext = ('PySecLab ' * (options['chars'] // 9 + 1))[:options['chars']]
+        key = AESService.generate_key(256)
+        private_pem, _ = RSAService._generate_key_pair(2048)
+        preview = options['preview_bytes']
+
+        cases = [
+            ('AES-CBC', lambda trace: AESService.encrypt_with_steps(
+                plaintext, key, trace=trace, preview_bytes=preview)),
+            ('AES-GCM', lambda trace: AEADService.encrypt_with_steps(
+                plaintext, key, trace=trace, preview_bytes=preview)),
+            ('RSA-PSS', lambda trace: RSAService._sign_with_steps(
+                plaintext, private_pem, trace, preview)),
+        ]
+
+        self.stdout.write(f"Mensaje de {len(plaintext)} caracteres\n")
+        self.stdout.write(f"{'operación':10s} {'política':10s} {'pico KiB':>10s} {'respuesta KiB':>14s} {'x payload':>10s}")
+        for name, func in cases:
+            func('full')  # calentar cachés
+            for policy in POLICIES:
+                tracemalloc.start()
+                result = func(policy)
+                body = json.dumps(result)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"{name:10s} {policy:10s} {peak / 1024:10.1f} {len(body) / 1024:14.1f} "
+                    f"{len(body) / len(plaintext):10.2f}"
+                )
@@ -0,0 +1,134 @@
+"""
+Middleware de métricas y de perfiles por petición.
+
+MetricsMiddleware registra la latencia de cada vista y el número y
+tiempo de las consultas a la base de datos que hizo la petición.
+Admite las dos cadenas: bajo ASGI no fuerza un hilo por petición.
+ProfilingMiddleware ejecuta bajo cProfile las peticiones de un admin
+que lo soliciten explícitamente.
+"""
+import cProfile
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .services.metrics import (
+    metrics, HTTP_REQUEST_SECONDS, DB_QUERIES_PER_REQUEST, DB_QUERY_SECONDS
+)
+from .services.profiler import profile_store
+
+
+class MetricsMiddleware:
+    """
+    Mide latencia y consultas a la BD por vista.
+    
+    En la cadena async solo se mide la latencia: las consultas del ORM
+    async corren en otros hilos, fuera del execute_wrapper de la conexión.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not metrics.enabled:
+            return self.get_response(request)
+
+        queries = [0, 0.0]
+
+        def count_queries(execute, sql, params, many, context):
+            query_start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries[0] += 1
+                queries[1] += time.perf_counter() - query_start
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = self._observe(request, response, elapsed)
+        DB_QUERIES_PER_REQUEST.observe(queries[0], view)
+        if queries[0]:
+            DB_QUERY_SECONDS.inc(view, amount=queries[1])
+        return response
+
+    async def __acall__(self, request):
+        if not metrics.enabled:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def _observe(request, response, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(elapsed, view, request.method, f'{response.status_code // 100}xx')
+        return view
+
+
+class ProfilingMiddleware:
+    """
+    Perfila con cProfile una petición concreta a petición de un admin.
+
+    Se activa con la cabecera `X-Profile: 1` o el parámetro `?_profile=1`
+    y solo si el JWT de la petición es de un usuario staff. El .prof y
+    sus metadatos se guardan en profile_store y el identificador se
+    devuelve en la cabecera `X-Profile-Id`. Con PROFILING_ENABLED=False
+    el middleware se retira de la cadena. Es solo síncrono: bajo ASGI
+    Django lo adapta con un hilo por petición mientras esté activo.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.META.get('HTTP_X_PROFILE') != '1' and request.GET.get('_profile') != '1':
+            return self.get_response(request)
+
+        try:
+            auth = JWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            auth = None
+        if auth is None or not auth[0].is_staff:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+
+        response['X-Profile-Id'] = profile_store.save(profiler, {
+            'method': request.method,
+            'path': request.path,
+            'query': request.META.get('QUERY_STRING', ''),
+            'user': auth[0].username,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 3),
+            'timestamp': timezone.now().isoformat()
+        })
+        return response
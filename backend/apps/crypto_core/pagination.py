@@ -0,0 +1,109 @@
+"""
+Cursores opacos para paginación por clave (keyset).
+
+Un cursor codifica los valores de la última fila devuelta en el orden
+de la consulta (p. ej. (created_at, id)). La página siguiente se pide
+con un filtro "posterior a" sobre esas columnas en lugar de OFFSET, de
+modo que el coste no crece con la profundidad de la página.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido no se puede decodificar."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """Codifica los valores de ordenación de una fila como cursor opaco."""
+    raw = json.dumps([
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in values
+    ], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple[Any, ...]:
+    """
+    Decodifica un cursor y convierte cada valor al tipo indicado.
+
+    Raises:
+        InvalidCursor: si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, values)
+        )
+    except (ValueError, TypeError):
+        raise InvalidCursor('Cursor inválido')
+
+
+def after(fields: Sequence[str], values: Sequence[Any], descending: bool = False) -> Q:
+    """
+    Filtro de filas estrictamente posteriores a `values` en el orden de `fields`.
+
+    Para ('created_at', 'id') ascendente genera
+    created_at >= v0 AND (created_at > v0 OR (created_at = v0 AND id > v1)).
+    La cota redundante sobre la primera columna permite al planificador
+    recorrer el índice como un rango.
+    """
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for index, field in enumerate(fields):
+        term = Q(**{f'{field}__{lookup}': values[index]})
+        for previous, value in zip(fields[:index], values[:index]):
+            term &= Q(**{previous: value})
+        condition |= term
+    if len(fields) > 1:
+        condition &= Q(**{f'{fields[0]}__{lookup}e': values[0]})
+    return condition
+
+
+def keyset_page(queryset, fields: Sequence[str], cursor: Optional[Tuple[Any, ...]],
+                limit: int, descending: bool = False) -> Tuple[list, Optional[str]]:
+    """
+    Obtiene una página ordenada por `fields` a partir de un cursor.
+    
+    Se pide una fila de más para saber si hay página siguiente.
+    
+    Returns:
+        (filas, cursor de la página siguiente o None)
+    """
+    rows = list(_page_queryset(queryset, fields, cursor, limit, descending))
+    return _page_result(rows, fields, limit)
+
+
+async def akeyset_page(queryset, fields: Sequence[str], cursor: Optional[Tuple[Any, ...]],
+                       limit: int, descending: bool = False) -> Tuple[list, Optional[str]]:
+    """Versión async de keyset_page para las vistas ASGI."""
+    rows = [row async for row in _page_queryset(queryset, fields, cursor, limit, descending)]
+    return _page_result(rows, fields, limit)
+
+
+def _page_queryset(queryset, fields, cursor, limit, descending):
+    if cursor is not None:
+        queryset = queryset.filter(after(fields, cursor, descending))
+    ordering = [f'-{field}' if descending else field for field in fields]
+    return queryset.order_by(*ordering)[:limit + 1]
+
+
+def _page_result(rows, fields, limit):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*_row_values(rows[-1], fields))
+
+
+def _row_values(row, fields: Sequence[str]) -> list:
+    if isinstance(row, dict):
+        return [row[field] for field in fields]
+    return [getattr(row, field) for field in fields]
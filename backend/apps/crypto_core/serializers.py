@@ -1,14 +1,38 @@
 """
 Serializadores para operaciones criptográficas.
 """
+from django.conf import settings
 from rest_framework import serializers
 
+from .services.trace import POLICIES as TRACE_POLICIES
+
+
+AES_MODES = ['CBC', 'GCM', 'CHACHA20-POLY1305']
+
+AES_MAX_PLAINTEXT = 10000
+# Base64 del ciphertext de AES_MAX_PLAINTEXT caracteres UTF-8 (hasta 4
+# bytes cada uno) más relleno CBC o tag AEAD (16 bytes)
+AES_MAX_CIPHERTEXT = 4 * -(-(AES_MAX_PLAINTEXT * 4 + 16) // 3)
+
+RSA_MAX_MESSAGE = 10000
+# Base64 de una firma RSA-4096 (512 bytes)
+RSA_MAX_SIGNATURE = 4 * -(-512 // 3)
+# PEM de una clave pública RSA-4096 (~800 caracteres) o su base64
+RSA_MAX_PUBLIC_KEY = 2048
+
 
 class AESEncryptSerializer(serializers.Serializer):
     """Serializer para cifrado AES."""
-    plaintext = serializers.CharField(max_length=10000)
+    plaintext = serializers.CharField(max_length=AES_MAX_PLAINTEXT)
     key_size = serializers.ChoiceField(choices=[128, 192, 256], default=256)
     key = serializers.CharField(required=False, help_text="Clave en base64 (opcional)")
+    mode = serializers.ChoiceField(choices=AES_MODES, default='CBC')
+    trace = serializers.ChoiceField(choices=TRACE_POLICIES, default='full')
+    
+    def validate(self, data):
+        if data['mode'] == 'CHACHA20-POLY1305' and data['key_size'] != 256:
+            raise serializers.ValidationError("ChaCha20-Poly1305 requires a 256-bit key")
+        return data
 
 
 class AESDecryptSerializer(serializers.Serializer):
@@ -16,12 +40,46 @@ class AESDecryptSerializer(serializers.Serializer):
     ciphertext = serializers.CharField()
     iv = serializers.CharField()
     key = serializers.CharField(help_text="Clave en base64")
+    mode = serializers.ChoiceField(choices=AES_MODES, default='CBC')
+
+
+class AESBatchItemSerializer(serializers.Serializer):
+    """
+    Elemento de un lote AES. Los campos que faltan según `op` se
+    reportan como error del elemento, sin abortar el lote.
+    """
+    op = serializers.ChoiceField(choices=['encrypt', 'decrypt'], default='encrypt')
+    plaintext = serializers.CharField(
+        max_length=AES_MAX_PLAINTEXT, required=False, allow_blank=True, trim_whitespace=False
+    )
+    ciphertext = serializers.CharField(max_length=AES_MAX_CIPHERTEXT, required=False)
+    iv = serializers.CharField(max_length=24, required=False)
+    key = serializers.CharField(max_length=44, required=False, help_text="Clave en base64 (opcional)")
+
+
+class AESBatchSerializer(serializers.Serializer):
+    """Serializer para cifrado/descifrado AES por lotes."""
+    items = serializers.ListField(
+        child=AESBatchItemSerializer(),
+        allow_empty=False,
+        help_text="[{op, plaintext | ciphertext + iv, key?}, ...]"
+    )
+    key = serializers.CharField(required=False, help_text="Clave compartida en base64 (opcional)")
+    key_size = serializers.ChoiceField(choices=[128, 192, 256], default=256)
+    mode = serializers.ChoiceField(choices=AES_MODES, default='CBC')
+    
+    def validate_items(self, value):
+        max_items = getattr(settings, 'CRYPTO_BATCH_MAX_ITEMS', 500)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"Maximum {max_items} items per batch")
+        return value
 
 
 class RSAEncryptSerializer(serializers.Serializer):
     """Serializer para cifrado RSA."""
     plaintext = serializers.CharField(max_length=500)
     public_key = serializers.CharField(help_text="Clave pública en base64 o PEM")
+    trace = serializers.ChoiceField(choices=TRACE_POLICIES, default='full')
 
 
 class RSADecryptSerializer(serializers.Serializer):
@@ -30,19 +88,71 @@ class RSADecryptSerializer(serializers.Serializer):
     private_key = serializers.CharField(help_text="Clave privada en base64 o PEM")
 
 
-class RSASignSerializer(serializers.Serializer):
+class MessageOrDigestSerializer(serializers.Serializer):
+    """
+    Mensaje completo o su SHA-256 precalculado (exactamente uno).
+    
+    Con el digest, documentos de cualquier tamaño se firman o verifican
+    sin subirlos: el cliente envía solo los 32 bytes del hash.
+    """
+    message = serializers.CharField(max_length=RSA_MAX_MESSAGE, required=False)
+    digest = serializers.CharField(
+        required=False, help_text="SHA-256 del mensaje en hex (64 caracteres)"
+    )
+    
+    def validate_digest(self, value):
+        try:
+            digest = bytes.fromhex(value)
+        except ValueError:
+            raise serializers.ValidationError("Digest must be hex-encoded")
+        if len(digest) != 32:
+            raise serializers.ValidationError("Digest must be a SHA-256 hash (32 bytes)")
+        return digest
+    
+    def validate(self, data):
+        if ('message' in data) == ('digest' in data):
+            raise serializers.ValidationError("Provide either message or digest")
+        return data
+
+
+class RSASignSerializer(MessageOrDigestSerializer):
     """Serializer para firma digital."""
-    message = serializers.CharField(max_length=10000)
     private_key = serializers.CharField(help_text="Clave privada en base64 o PEM")
+    trace = serializers.ChoiceField(choices=TRACE_POLICIES, default='full')
 
 
-class RSAVerifySerializer(serializers.Serializer):
+class RSAVerifySerializer(MessageOrDigestSerializer):
     """Serializer para verificación de firma."""
-    message = serializers.CharField(max_length=10000)
     signature = serializers.CharField()
     public_key = serializers.CharField(help_text="Clave pública en base64 o PEM")
 
 
+class RSAVerifyBatchItemSerializer(serializers.Serializer):
+    """Elemento de un lote de verificación de firmas."""
+    message = serializers.CharField(
+        max_length=RSA_MAX_MESSAGE, allow_blank=True, trim_whitespace=False
+    )
+    signature = serializers.CharField(max_length=RSA_MAX_SIGNATURE)
+    public_key = serializers.CharField(
+        max_length=RSA_MAX_PUBLIC_KEY, help_text="Clave pública en base64 o PEM"
+    )
+
+
+class RSAVerifyBatchSerializer(serializers.Serializer):
+    """Serializer para verificación de firmas por lotes."""
+    items = serializers.ListField(
+        child=RSAVerifyBatchItemSerializer(),
+        allow_empty=False,
+        help_text="[{message, signature, public_key}, ...]"
+    )
+    
+    def validate_items(self, value):
+        max_items = getattr(settings, 'CRYPTO_BATCH_MAX_ITEMS', 500)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"Maximum {max_items} items per batch")
+        return value
+
+
 class GenerateKeySerializer(serializers.Serializer):
     """Serializer para generación de claves."""
     algorithm = serializers.ChoiceField(choices=['AES', 'RSA'])
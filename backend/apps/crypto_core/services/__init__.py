@@ -1,5 +1,15 @@
 # Services package
 from .aes_service import AESService
-from .rsa_service import RSAService
+from .aead_service import AEADService
+from .batch_service import BatchService
+from .rsa_service import RSAService, key_pool
+from .key_cache import KeyCache, key_cache
+from .key_pool import KeyPool
+from .executor import (
+    CryptoExecutor, CryptoExecutorBusy, CryptoExecutorTimeout, crypto_executor
+)
 
-__all__ = ['AESService', 'RSAService']
+__all__ = ['AESService', 'AEADService', 'BatchService', 'RSAService', 'KeyCache', 'key_cache',
+           'KeyPool', 'key_pool',
+           'CryptoExecutor', 'CryptoExecutorBusy', 'CryptoExecutorTimeout',
+           'crypto_executor']
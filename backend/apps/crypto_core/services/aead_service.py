@@ -0,0 +1,235 @@
+"""
+Servicio de Cifrado Autenticado (AEAD)
+======================================
+
+Implementación de cifrado autenticado AES-GCM y ChaCha20-Poly1305
+usando la librería cryptography. A diferencia de AES-CBC no requiere
+padding y detecta manipulaciones en una sola pasada (tag de 128 bits).
+
+Autor: Equipo P4 Seguridad
+"""
+
+import base64
+import secrets
+from typing import Dict, Any, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+from .trace import StepTrace, FULL, DEFAULT_PREVIEW_BYTES
+from .metrics import instrumented, from_arg, key_bits
+
+
+class AEADService:
+    """
+    Servicio de cifrado autenticado.
+
+    Características:
+    - AES-GCM con claves de 128, 192 o 256 bits
+    - ChaCha20-Poly1305 con clave de 256 bits
+    - Nonce aleatorio de 96 bits
+    - Tag de autenticación de 128 bits anexado al ciphertext
+    """
+
+    AES_GCM = 'AES-GCM'
+    CHACHA20_POLY1305 = 'CHACHA20-POLY1305'
+    ALGORITHMS = [AES_GCM, CHACHA20_POLY1305]
+
+    NONCE_SIZE = 12  # 96 bits
+    TAG_SIZE = 16  # 128 bits
+
+    @staticmethod
+    def _get_cipher(algorithm: str, key: bytes):
+        """Crea el cipher AEAD para el algoritmo indicado."""
+        if algorithm == AEADService.AES_GCM:
+            return AESGCM(key)
+        if algorithm == AEADService.CHACHA20_POLY1305:
+            if len(key) != 32:
+                raise ValueError("ChaCha20-Poly1305 requires a 256-bit key")
+            return ChaCha20Poly1305(key)
+        raise ValueError(f"Algorithm must be one of {AEADService.ALGORITHMS}")
+
+    @staticmethod
+    def generate_nonce() -> bytes:
+        """Genera un nonce aleatorio."""
+        return secrets.token_bytes(AEADService.NONCE_SIZE)
+
+    @staticmethod
+    def encrypt(plaintext: str, key: bytes, algorithm: str = AES_GCM,
+                associated_data: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Cifra un mensaje con un algoritmo AEAD.
+
+        Args:
+            plaintext: Mensaje a cifrar
+            key: Clave simétrica
+            algorithm: 'AES-GCM' o 'CHACHA20-POLY1305'
+            associated_data: Datos autenticados no cifrados (opcional)
+
+        Returns:
+            Dict con iv (nonce), ciphertext (con tag), ambos en base64, y metadatos
+        """
+        nonce, ciphertext = AEADService.encrypt_bytes(
+            plaintext.encode('utf-8'), key, algorithm, associated_data
+        )
+
+        return {
+            'iv': base64.b64encode(nonce).decode('utf-8'),
+            'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
+            'algorithm': algorithm,
+            'key_size': len(key) * 8,
+            'tag_size': AEADService.TAG_SIZE * 8
+        }
+
+    @staticmethod
+    @instrumented(from_arg('algorithm'), 'encrypt', from_arg('key', key_bits))
+    def encrypt_bytes(plaintext: bytes, key: bytes, algorithm: str = AES_GCM,
+                      associated_data: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+        """
+        Cifra bytes en bruto (sin base64).
+
+        Returns:
+            Tuple[bytes, bytes]: (nonce, ciphertext con tag anexado)
+        """
+        cipher = AEADService._get_cipher(algorithm, key)
+        nonce = AEADService.generate_nonce()
+        return nonce, cipher.encrypt(nonce, plaintext, associated_data)
+
+    @staticmethod
+    def decrypt(ciphertext_b64: str, iv_b64: str, key: bytes,
+                algorithm: str = AES_GCM,
+                associated_data: Optional[bytes] = None) -> str:
+        """
+        Descifra y verifica un mensaje AEAD.
+
+        Args:
+            ciphertext_b64: Texto cifrado (con tag) en base64
+            iv_b64: Nonce en base64
+            key: Clave simétrica
+            algorithm: 'AES-GCM' o 'CHACHA20-POLY1305'
+            associated_data: Datos autenticados usados al cifrar
+
+        Returns:
+            str: Mensaje descifrado
+
+        Raises:
+            cryptography.exceptions.InvalidTag: si el mensaje fue manipulado
+        """
+        nonce = base64.b64decode(iv_b64)
+        ciphertext = base64.b64decode(ciphertext_b64)
+
+        return AEADService.decrypt_bytes(
+            ciphertext, nonce, key, algorithm, associated_data
+        ).decode('utf-8')
+
+    @staticmethod
+    @instrumented(from_arg('algorithm'), 'decrypt', from_arg('key', key_bits))
+    def decrypt_bytes(ciphertext: bytes, nonce: bytes, key: bytes,
+                      algorithm: str = AES_GCM,
+                      associated_data: Optional[bytes] = None) -> bytes:
+        """
+        Descifra bytes en bruto (ciphertext con tag anexado, sin base64).
+
+        Returns:
+            bytes: Texto plano
+        """
+        cipher = AEADService._get_cipher(algorithm, key)
+        return cipher.decrypt(nonce, ciphertext, associated_data)
+
+    @staticmethod
+    @instrumented(from_arg('algorithm'), 'encrypt_with_steps', from_arg('key', key_bits))
+    def encrypt_with_steps(plaintext: str, key: bytes, algorithm: str = AES_GCM,
+                           trace: str = FULL,
+                           preview_bytes: int = DEFAULT_PREVIEW_BYTES) -> Dict[str, Any]:
+        """
+        Cifra mostrando cada paso del proceso (para demostración).
+
+        Args:
+            trace: Política de traza ('full', 'truncated' o 'none')
+            preview_bytes: Límite de bytes por paso con 'truncated'
+
+        Returns:
+            Dict con todos los pasos intermedios
+        """
+        cipher = AEADService._get_cipher(algorithm, key)
+        steps = StepTrace(trace, preview_bytes)
+
+        # Paso 1: Mensaje original
+        steps.add(
+            step=1,
+            name='Mensaje original',
+            data=steps.text(plaintext),
+            type='text'
+        )
+
+        # Paso 2: Convertir a bytes
+        plaintext_bytes = plaintext.encode('utf-8')
+        steps.add(
+            step=2,
+            name='Convertir a bytes (UTF-8)',
+            data=steps.hex(plaintext_bytes),
+            type='hex',
+            length=len(plaintext_bytes)
+        )
+
+        # Paso 3: Generar nonce
+        nonce = AEADService.generate_nonce()
+        steps.add(
+            step=3,
+            name='Generar nonce aleatorio',
+            data=nonce.hex(),
+            type='hex',
+            length=len(nonce)
+        )
+
+        # Paso 4: Mostrar clave (parcial por seguridad)
+        steps.add(
+            step=4,
+            name='Clave',
+            data=key[:4].hex() + '...' + key[-4:].hex(),
+            type='hex_partial',
+            key_size=len(key) * 8
+        )
+
+        # Paso 5: Cifrar y autenticar (sin padding)
+        sealed = cipher.encrypt(nonce, plaintext_bytes, None)
+        del plaintext_bytes
+        steps.add(
+            step=5,
+            name=f'Cifrar con {algorithm}',
+            data=steps.hex(memoryview(sealed)[:-AEADService.TAG_SIZE]),
+            type='hex'
+        )
+
+        # Paso 6: Tag de autenticación
+        steps.add(
+            step=6,
+            name='Tag de autenticación',
+            data=sealed[-AEADService.TAG_SIZE:].hex(),
+            type='hex',
+            length=AEADService.TAG_SIZE
+        )
+
+        result = {
+            'iv': base64.b64encode(nonce).decode('utf-8'),
+            'ciphertext': base64.b64encode(sealed).decode('utf-8')
+        }
+
+        # Paso 7: Codificar en Base64 (el combinado completo solo con traza 'full')
+        if steps.policy == FULL:
+            result['combined'] = base64.b64encode(nonce + sealed).decode('utf-8')
+            combined = result['combined']
+        else:
+            combined = steps.b64(nonce + sealed[:preview_bytes])
+        steps.add(
+            step=7,
+            name='Codificar en Base64 (Nonce + Ciphertext + Tag)',
+            data=combined,
+            type='base64'
+        )
+
+        return {
+            'steps': steps.steps,
+            'result': result,
+            'algorithm': algorithm,
+            'key_size': len(key) * 8
+        }
@@ -10,12 +10,15 @@ Autor: Equipo P4 Seguridad
 
 import base64
 import secrets
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Iterable, Iterator, Union, BinaryIO
 
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
 
+from .trace import StepTrace, FULL, DEFAULT_PREVIEW_BYTES
+from .metrics import instrumented, from_arg, key_bits
+
 
 class AESService:
     """
@@ -30,6 +33,7 @@ class AESService:
     VALID_KEY_SIZES = [128, 192, 256]
     BLOCK_SIZE = 128  # AES block size in bits
     IV_SIZE = 16  # 128 bits
+    STREAM_CHUNK_SIZE = 64 * 1024  # 64 KiB
     
     @staticmethod
     def generate_key(key_size: int = 256) -> bytes:
@@ -64,13 +68,36 @@ class AESService:
         Returns:
             Dict con iv, ciphertext (ambos en base64), y metadatos
         """
+        iv, ciphertext = AESService.encrypt_bytes(plaintext.encode('utf-8'), key)
+        
+        return {
+            'iv': base64.b64encode(iv).decode('utf-8'),
+            'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
+            'algorithm': 'AES',
+            'mode': 'CBC',
+            'key_size': len(key) * 8,
+            'padding': 'PKCS7'
+        }
+    
+    @staticmethod
+    @instrumented('AES-CBC', 'encrypt', from_arg('key', key_bits))
+    def encrypt_bytes(plaintext: bytes, key: bytes) -> Tuple[bytes, bytes]:
+        """
+        Cifra bytes en bruto con AES-CBC (sin base64).
+        
+        Args:
+            plaintext: Texto plano
+            key: Clave AES (16, 24 o 32 bytes)
+            
+        Returns:
+            Tuple[bytes, bytes]: (iv, ciphertext)
+        """
         # Generar IV
         iv = AESService.generate_iv()
         
-        # Convertir a bytes y aplicar padding
-        plaintext_bytes = plaintext.encode('utf-8')
+        # Aplicar padding
         padder = padding.PKCS7(AESService.BLOCK_SIZE).padder()
-        padded_data = padder.update(plaintext_bytes) + padder.finalize()
+        padded_data = padder.update(plaintext) + padder.finalize()
         
         # Crear cipher y cifrar
         cipher = Cipher(
@@ -79,16 +106,7 @@ class AESService:
             backend=default_backend()
         )
         encryptor = cipher.encryptor()
-        ciphertext = encryptor.update(padded_data) + encryptor.finalize()
-        
-        return {
-            'iv': base64.b64encode(iv).decode('utf-8'),
-            'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
-            'algorithm': 'AES',
-            'mode': 'CBC',
-            'key_size': len(key) * 8,
-            'padding': 'PKCS7'
-        }
+        return iv, encryptor.update(padded_data) + encryptor.finalize()
     
     @staticmethod
     def decrypt(ciphertext_b64: str, iv_b64: str, key: bytes) -> str:
@@ -107,6 +125,22 @@ class AESService:
         iv = base64.b64decode(iv_b64)
         ciphertext = base64.b64decode(ciphertext_b64)
         
+        return AESService.decrypt_bytes(ciphertext, iv, key).decode('utf-8')
+    
+    @staticmethod
+    @instrumented('AES-CBC', 'decrypt', from_arg('key', key_bits))
+    def decrypt_bytes(ciphertext: bytes, iv: bytes, key: bytes) -> bytes:
+        """
+        Descifra bytes en bruto con AES-CBC (sin base64).
+        
+        Args:
+            ciphertext: Texto cifrado
+            iv: IV
+            key: Clave AES
+            
+        Returns:
+            bytes: Texto plano
+        """
         # Crear cipher y descifrar
         cipher = Cipher(
             algorithms.AES(key),
@@ -118,69 +152,167 @@ class AESService:
         
         # Quitar padding
         unpadder = padding.PKCS7(AESService.BLOCK_SIZE).unpadder()
-        plaintext_bytes = unpadder.update(padded_data) + unpadder.finalize()
+        return unpadder.update(padded_data) + unpadder.finalize()
+    
+    @staticmethod
+    def _iter_chunks(source: Union[BinaryIO, Iterable[bytes]],
+                     chunk_size: int) -> Iterator[bytes]:
+        """Itera un objeto tipo archivo o un iterable de bytes por bloques."""
+        if hasattr(source, 'read'):
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            for chunk in source:
+                if chunk:
+                    yield bytes(chunk)
+    
+    @staticmethod
+    def encrypt_stream(source: Union[BinaryIO, Iterable[bytes]], key: bytes,
+                       chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Cifra un flujo de bytes con AES-CBC usando memoria constante.
         
-        return plaintext_bytes.decode('utf-8')
+        El primer bloque emitido es el IV; el resto es el texto cifrado
+        (con padding PKCS7 al final), es decir IV || ciphertext.
+        
+        Args:
+            source: Objeto tipo archivo (binario) o iterable de bytes
+            key: Clave AES (16, 24 o 32 bytes)
+            chunk_size: Tamaño de lectura para objetos tipo archivo
+            
+        Yields:
+            bytes: Fragmentos del resultado cifrado
+        """
+        iv = AESService.generate_iv()
+        encryptor = Cipher(
+            algorithms.AES(key),
+            modes.CBC(iv),
+            backend=default_backend()
+        ).encryptor()
+        padder = padding.PKCS7(AESService.BLOCK_SIZE).padder()
+        
+        yield iv
+        for chunk in AESService._iter_chunks(source, chunk_size):
+            data = encryptor.update(padder.update(chunk))
+            if data:
+                yield data
+        
+        yield encryptor.update(padder.finalize()) + encryptor.finalize()
+    
+    @staticmethod
+    def decrypt_stream(source: Union[BinaryIO, Iterable[bytes]], key: bytes,
+                       chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Descifra un flujo IV || ciphertext producido por encrypt_stream.
+        
+        Args:
+            source: Objeto tipo archivo (binario) o iterable de bytes
+            key: Clave AES
+            chunk_size: Tamaño de lectura para objetos tipo archivo
+            
+        Yields:
+            bytes: Fragmentos del texto plano
+        """
+        chunks = AESService._iter_chunks(source, chunk_size)
+        
+        # Extraer el IV de los primeros bytes del flujo
+        header = b''
+        for chunk in chunks:
+            header += chunk
+            if len(header) >= AESService.IV_SIZE:
+                break
+        if len(header) < AESService.IV_SIZE:
+            raise ValueError("Stream too short: missing IV")
+        
+        iv, rest = header[:AESService.IV_SIZE], header[AESService.IV_SIZE:]
+        decryptor = Cipher(
+            algorithms.AES(key),
+            modes.CBC(iv),
+            backend=default_backend()
+        ).decryptor()
+        unpadder = padding.PKCS7(AESService.BLOCK_SIZE).unpadder()
+        
+        if rest:
+            data = unpadder.update(decryptor.update(rest))
+            if data:
+                yield data
+        for chunk in chunks:
+            data = unpadder.update(decryptor.update(chunk))
+            if data:
+                yield data
+        
+        yield unpadder.update(decryptor.finalize()) + unpadder.finalize()
     
     @staticmethod
-    def encrypt_with_steps(plaintext: str, key: bytes) -> Dict[str, Any]:
+    @instrumented('AES-CBC', 'encrypt_with_steps', from_arg('key', key_bits))
+    def encrypt_with_steps(plaintext: str, key: bytes, trace: str = FULL,
+                           preview_bytes: int = DEFAULT_PREVIEW_BYTES) -> Dict[str, Any]:
         """
         Cifra mostrando cada paso del proceso (para demostración).
         
+        Args:
+            plaintext: Mensaje a cifrar
+            key: Clave AES
+            trace: Política de traza ('full', 'truncated' o 'none')
+            preview_bytes: Límite de bytes por paso con 'truncated'
+        
         Returns:
             Dict con todos los pasos intermedios
         """
-        steps = []
+        steps = StepTrace(trace, preview_bytes)
         
         # Paso 1: Mensaje original
-        steps.append({
-            'step': 1,
-            'name': 'Mensaje original',
-            'data': plaintext,
-            'type': 'text'
-        })
+        steps.add(
+            step=1,
+            name='Mensaje original',
+            data=steps.text(plaintext),
+            type='text'
+        )
         
         # Paso 2: Convertir a bytes
         plaintext_bytes = plaintext.encode('utf-8')
-        steps.append({
-            'step': 2,
-            'name': 'Convertir a bytes (UTF-8)',
-            'data': plaintext_bytes.hex(),
-            'type': 'hex',
-            'length': len(plaintext_bytes)
-        })
+        steps.add(
+            step=2,
+            name='Convertir a bytes (UTF-8)',
+            data=steps.hex(plaintext_bytes),
+            type='hex',
+            length=len(plaintext_bytes)
+        )
         
         # Paso 3: Aplicar padding PKCS7
         padder = padding.PKCS7(AESService.BLOCK_SIZE).padder()
         padded_data = padder.update(plaintext_bytes) + padder.finalize()
         padding_bytes = len(padded_data) - len(plaintext_bytes)
-        steps.append({
-            'step': 3,
-            'name': 'Aplicar padding PKCS7',
-            'data': padded_data.hex(),
-            'type': 'hex',
-            'padding_added': padding_bytes,
-            'new_length': len(padded_data)
-        })
+        steps.add(
+            step=3,
+            name='Aplicar padding PKCS7',
+            data=steps.hex(padded_data),
+            type='hex',
+            padding_added=padding_bytes,
+            new_length=len(padded_data)
+        )
         
         # Paso 4: Generar IV
         iv = AESService.generate_iv()
-        steps.append({
-            'step': 4,
-            'name': 'Generar IV aleatorio',
-            'data': iv.hex(),
-            'type': 'hex',
-            'length': len(iv)
-        })
+        steps.add(
+            step=4,
+            name='Generar IV aleatorio',
+            data=iv.hex(),
+            type='hex',
+            length=len(iv)
+        )
         
         # Paso 5: Mostrar clave (parcial por seguridad)
-        steps.append({
-            'step': 5,
-            'name': 'Clave AES',
-            'data': key[:4].hex() + '...' + key[-4:].hex(),
-            'type': 'hex_partial',
-            'key_size': len(key) * 8
-        })
+        steps.add(
+            step=5,
+            name='Clave AES',
+            data=key[:4].hex() + '...' + key[-4:].hex(),
+            type='hex_partial',
+            key_size=len(key) * 8
+        )
         
         # Paso 6: Cifrar con AES-CBC
         cipher = Cipher(
@@ -190,29 +322,35 @@ class AESService:
         )
         encryptor = cipher.encryptor()
         ciphertext = encryptor.update(padded_data) + encryptor.finalize()
-        steps.append({
-            'step': 6,
-            'name': 'Cifrar con AES-CBC',
-            'data': ciphertext.hex(),
-            'type': 'hex'
-        })
-        
-        # Paso 7: Codificar en Base64
-        result_b64 = base64.b64encode(iv + ciphertext).decode('utf-8')
-        steps.append({
-            'step': 7,
-            'name': 'Codificar en Base64 (IV + Ciphertext)',
-            'data': result_b64,
-            'type': 'base64'
-        })
+        del padded_data
+        steps.add(
+            step=6,
+            name='Cifrar con AES-CBC',
+            data=steps.hex(ciphertext),
+            type='hex'
+        )
+        
+        result = {
+            'iv': base64.b64encode(iv).decode('utf-8'),
+            'ciphertext': base64.b64encode(ciphertext).decode('utf-8')
+        }
+        
+        # Paso 7: Codificar en Base64 (el combinado completo solo con traza 'full')
+        if steps.policy == FULL:
+            result['combined'] = base64.b64encode(iv + ciphertext).decode('utf-8')
+            combined = result['combined']
+        else:
+            combined = steps.b64(iv + ciphertext[:preview_bytes])
+        steps.add(
+            step=7,
+            name='Codificar en Base64 (IV + Ciphertext)',
+            data=combined,
+            type='base64'
+        )
         
         return {
-            'steps': steps,
-            'result': {
-                'iv': base64.b64encode(iv).decode('utf-8'),
-                'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
-                'combined': result_b64
-            },
+            'steps': steps.steps,
+            'result': result,
             'algorithm': 'AES-CBC',
             'key_size': len(key) * 8
         }
@@ -0,0 +1,145 @@
+"""
+Servicio de Cifrado por Lotes
+=============================
+
+Procesa muchas operaciones AES pequeñas en una sola pasada,
+reutilizando el material de clave (decodificación base64 y objetos
+de cipher) y sin construir trazas de pasos.
+
+Autor: Equipo P4 Seguridad
+"""
+
+import base64
+from typing import Any, Dict, List, Optional
+
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.backends import default_backend
+from cryptography.exceptions import InvalidTag
+
+from .aes_service import AESService
+from .aead_service import AEADService
+from .metrics import instrumented, from_arg, key_bits
+
+
+BATCH_ALGORITHMS = {'CBC': 'AES-CBC', 'GCM': 'AES-GCM', 'CHACHA20-POLY1305': 'CHACHA20-POLY1305'}
+
+
+class _KeyMaterial:
+    """Material de clave preparado una sola vez por clave distinta."""
+
+    def __init__(self, key: bytes, mode: str):
+        if len(key) * 8 not in AESService.VALID_KEY_SIZES:
+            raise ValueError(f"Key size must be one of {AESService.VALID_KEY_SIZES}")
+        self.key = key
+        self.mode = mode
+        if mode == 'CBC':
+            self.algorithm = algorithms.AES(key)
+        elif mode == 'GCM':
+            self.aead = AESGCM(key)
+        else:
+            if len(key) != 32:
+                raise ValueError("ChaCha20-Poly1305 requires a 256-bit key")
+            self.aead = ChaCha20Poly1305(key)
+
+    def encrypt(self, plaintext: bytes):
+        if self.mode == 'CBC':
+            iv = AESService.generate_iv()
+            padder = padding.PKCS7(AESService.BLOCK_SIZE).padder()
+            encryptor = Cipher(self.algorithm, modes.CBC(iv), backend=default_backend()).encryptor()
+            padded = padder.update(plaintext) + padder.finalize()
+            return iv, encryptor.update(padded) + encryptor.finalize()
+        nonce = AEADService.generate_nonce()
+        return nonce, self.aead.encrypt(nonce, plaintext, None)
+
+    def decrypt(self, ciphertext: bytes, iv: bytes) -> bytes:
+        if self.mode == 'CBC':
+            decryptor = Cipher(self.algorithm, modes.CBC(iv), backend=default_backend()).decryptor()
+            unpadder = padding.PKCS7(AESService.BLOCK_SIZE).unpadder()
+            padded = decryptor.update(ciphertext) + decryptor.finalize()
+            return unpadder.update(padded) + unpadder.finalize()
+        return self.aead.decrypt(iv, ciphertext, None)
+
+
+class BatchService:
+    """
+    Servicio de cifrado/descifrado AES por lotes.
+
+    Cada elemento es un dict con:
+    - op: 'encrypt' | 'decrypt'
+    - plaintext (encrypt) o ciphertext + iv (decrypt)
+    - key (opcional): clave en base64; si falta se usa la compartida
+
+    El resultado conserva el orden de entrada y cada elemento tiene su
+    propio hueco de error, de modo que un fallo no aborta el lote.
+    """
+
+    MODES = ['CBC', 'GCM', 'CHACHA20-POLY1305']
+
+    @staticmethod
+    @instrumented(from_arg('mode', BATCH_ALGORITHMS.get), 'batch',
+                  from_arg('key', lambda key: key_bits(key) if key else 'mixed'))
+    def aes_batch(items: List[Dict[str, Any]], key: Optional[bytes] = None,
+                  mode: str = 'CBC') -> List[Dict[str, Any]]:
+        """
+        Procesa un lote de operaciones AES.
+
+        Args:
+            items: Operaciones a realizar
+            key: Clave compartida para los elementos sin clave propia
+            mode: 'CBC', 'GCM' o 'CHACHA20-POLY1305'
+
+        Returns:
+            Lista de resultados en el mismo orden que `items`
+        """
+        if mode not in BatchService.MODES:
+            raise ValueError(f"Mode must be one of {BatchService.MODES}")
+
+        materials: Dict[Any, _KeyMaterial] = {}
+
+        def material_for(key_b64):
+            # None representa la clave compartida del lote
+            if key_b64 not in materials:
+                if key_b64 is None:
+                    if key is None:
+                        raise ValueError('Se requiere key')
+                    raw = key
+                else:
+                    raw = base64.b64decode(key_b64)
+                materials[key_b64] = _KeyMaterial(raw, mode)
+            return materials[key_b64]
+
+        results = []
+        for index, item in enumerate(items):
+            try:
+                material = material_for(item.get('key'))
+                op = item.get('op', 'encrypt')
+                if op == 'encrypt':
+                    iv, ciphertext = material.encrypt(str(item['plaintext']).encode('utf-8'))
+                    results.append({
+                        'index': index,
+                        'iv': base64.b64encode(iv).decode('utf-8'),
+                        'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
+                        'error': None
+                    })
+                elif op == 'decrypt':
+                    plaintext = material.decrypt(
+                        base64.b64decode(item['ciphertext']),
+                        base64.b64decode(item['iv'])
+                    )
+                    results.append({
+                        'index': index,
+                        'plaintext': plaintext.decode('utf-8'),
+                        'error': None
+                    })
+                else:
+                    raise ValueError("op must be 'encrypt' or 'decrypt'")
+            except KeyError as e:
+                results.append({'index': index, 'error': f'Falta el campo {e}'})
+            except InvalidTag:
+                results.append({'index': index, 'error': 'Autenticación fallida'})
+            except Exception as e:
+                results.append({'index': index, 'error': str(e) or e.__class__.__name__})
+
+        return results
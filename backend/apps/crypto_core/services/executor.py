@@ -0,0 +1,259 @@
+"""
+Ejecutor de Operaciones Criptográficas
+======================================
+
+Descarga operaciones RSA costosas (keygen, descifrado, firma) a un
+pool de procesos para que no bloqueen el hilo de la petición ni a
+otros hilos del mismo worker. Soporta un modo síncrono para tests.
+
+Las vistas asíncronas (despliegue ASGI) esperan las llamadas a
+AESService/RSAService con offload(), que las ejecuta en un pool de
+hilos aparte sin bloquear el event loop.
+
+Autor: Equipo P4 Seguridad
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class CryptoExecutorBusy(Exception):
+    """La cola del ejecutor está llena."""
+
+
+class CryptoExecutorTimeout(Exception):
+    """La operación superó el tiempo máximo de espera."""
+
+
+def _timed_call(func: Callable, args: tuple):
+    """Ejecuta `func` en el worker y mide inicio y duración."""
+    started_at = time.time()
+    result = func(*args)
+    return result, started_at, time.time() - started_at
+
+
+class CryptoExecutor:
+    """
+    Pool configurable para operaciones criptográficas.
+
+    Modos:
+    - 'thread': ThreadPoolExecutor (por defecto); las llamadas de
+      cryptography liberan el GIL y se aprovecha la caché de claves
+    - 'process': ProcessPoolExecutor (spawn), aísla la CPU del worker
+      web pero serializa el PEM privado hacia el hijo en cada operación
+      y lo parsea allí sin caché
+    - 'sync': ejecución en línea (tests / desarrollo)
+
+    La profundidad de cola está acotada: si hay más de
+    max_workers + max_queue operaciones en vuelo, se espera hasta
+    queue_timeout y luego se lanza CryptoExecutorBusy.
+    """
+
+    MODES = ['process', 'thread', 'sync']
+
+    DEFAULT_ASYNC_THREADS = 32
+
+    def __init__(self, mode: str = 'sync', max_workers: Optional[int] = None,
+                 max_queue: int = 32, queue_timeout: float = 5.0,
+                 timeout: Optional[float] = 30.0,
+                 async_threads: int = DEFAULT_ASYNC_THREADS):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._offload_pool = None
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self.configure(mode, max_workers, max_queue, queue_timeout, timeout, async_threads)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """
+        En un proceso hijo los pools del padre no sirven (sus hilos y
+        procesos no se heredan): se crean de nuevo al primer uso.
+        """
+        self._lock = threading.Lock()
+        self._pool = None
+        self._offload_pool = None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+
+    def configure(self, mode: Optional[str] = None, max_workers: Optional[int] = None,
+                  max_queue: Optional[int] = None, queue_timeout: Optional[float] = None,
+                  timeout: Optional[float] = None, async_threads: Optional[int] = None):
+        """Ajusta la configuración (se llama desde AppConfig.ready)."""
+        if mode is not None and mode not in self.MODES:
+            raise ValueError(f"Mode must be one of {self.MODES}")
+        self.shutdown()
+        with self._lock:
+            if mode is not None:
+                self.mode = mode
+            if max_workers is not None or not hasattr(self, 'max_workers'):
+                self.max_workers = max_workers or multiprocessing.cpu_count()
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if queue_timeout is not None:
+                self.queue_timeout = queue_timeout
+            if timeout is not None:
+                self.timeout = timeout or None
+            if async_threads is not None:
+                self.async_threads = async_threads
+            self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.mode == 'process':
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='crypto'
+                    )
+            return self._pool
+
+    def _get_offload_pool(self):
+        with self._lock:
+            if self._offload_pool is None:
+                self._offload_pool = ThreadPoolExecutor(
+                    max_workers=self.async_threads,
+                    thread_name_prefix='crypto-async'
+                )
+            return self._offload_pool
+
+    def run(self, func: Callable, *args, name: Optional[str] = None) -> Any:
+        """
+        Ejecuta `func(*args)` en el pool y espera el resultado.
+
+        `func` debe ser una función importable a nivel de módulo (o un
+        staticmethod) para poder enviarse a otro proceso.
+        """
+        return self.map(func, [args], name=name)[0]
+
+    def map(self, func: Callable, calls: Iterable[tuple],
+            name: Optional[str] = None) -> List[Any]:
+        """
+        Ejecuta `func(*args)` para cada tupla de `calls` en paralelo.
+
+        Cada llamada ocupa un hueco de la cola como en run(), así que un
+        lote grande no puede acaparar el pool más allá de max_workers +
+        max_queue. Retorna los resultados en el orden de `calls`.
+        """
+        name = name or getattr(func, '__qualname__', repr(func))
+
+        if self.mode == 'sync':
+            results = []
+            for args in calls:
+                result, _, elapsed = _timed_call(func, args)
+                self._record(name, 0.0, elapsed)
+                results.append(result)
+            return results
+
+        submitted = [self._submit(func, args, name) for args in calls]
+        return [self._result(future, submitted_at, name) for future, submitted_at in submitted]
+
+    def _submit(self, func: Callable, args: tuple, name: str):
+        slots = self._slots
+        if not slots.acquire(timeout=self.queue_timeout):
+            self._record(name, rejected=True)
+            raise CryptoExecutorBusy('Cola criptográfica llena, reintente más tarde')
+
+        submitted_at = time.time()
+        try:
+            future = self._get_pool().submit(_timed_call, func, args)
+        except Exception:
+            slots.release()
+            raise
+        # El hueco se libera al terminar, aunque el llamante haya expirado
+        future.add_done_callback(lambda _: slots.release())
+        return future, submitted_at
+
+    def _result(self, future, submitted_at: float, name: str) -> Any:
+        try:
+            result, started_at, elapsed = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._record(name, timed_out=True)
+            raise CryptoExecutorTimeout(f'{name} superó {self.timeout}s')
+
+        self._record(name, max(started_at - submitted_at, 0.0), elapsed)
+        return result
+
+    async def offload(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Espera `func(*args, **kwargs)` sin bloquear el event loop.
+
+        Para las vistas async: la llamada (AESService, RSAService o un
+        helper de vista que solo calcula) corre en un pool de hilos
+        propio, de `async_threads` hilos. Las operaciones RSA con clave
+        privada que haga por dentro siguen pasando por run() y el pool
+        de procesos. `func` no debe usar el ORM: la conexión a la BD es
+        por hilo y estos hilos no se cierran al acabar la petición.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_offload_pool(), functools.partial(func, *args, **kwargs)
+        )
+
+    def _record(self, name: str, queue_wait: float = 0.0, elapsed: float = 0.0,
+                rejected: bool = False, timed_out: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                'count': 0, 'rejected': 0, 'timeouts': 0,
+                'queue_wait_total': 0.0, 'queue_wait_max': 0.0,
+                'exec_total': 0.0, 'exec_max': 0.0
+            })
+            if rejected:
+                stats['rejected'] += 1
+                return
+            if timed_out:
+                stats['timeouts'] += 1
+                return
+            stats['count'] += 1
+            stats['queue_wait_total'] += queue_wait
+            stats['queue_wait_max'] = max(stats['queue_wait_max'], queue_wait)
+            stats['exec_total'] += elapsed
+            stats['exec_max'] = max(stats['exec_max'], elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna tiempos de cola y de ejecución por operación (ms)."""
+        with self._lock:
+            operations = {}
+            for name, s in self._stats.items():
+                count = s['count']
+                operations[name] = {
+                    'count': count,
+                    'rejected': s['rejected'],
+                    'timeouts': s['timeouts'],
+                    'queue_wait_avg_ms': s['queue_wait_total'] / count * 1000 if count else None,
+                    'queue_wait_max_ms': s['queue_wait_max'] * 1000,
+                    'exec_avg_ms': s['exec_total'] / count * 1000 if count else None,
+                    'exec_max_ms': s['exec_max'] * 1000
+                }
+            return {
+                'mode': self.mode,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'async_threads': self.async_threads,
+                'operations': operations
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Cierra los pools (se recrean de forma perezosa)."""
+        with self._lock:
+            pools = [self._pool, self._offload_pool]
+            self._pool = self._offload_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Instancia compartida por RSAService
+crypto_executor = CryptoExecutor()
@@ -0,0 +1,142 @@
+"""
+Caché de Claves RSA
+===================
+
+Caché LRU acotada y thread-safe de objetos de clave ya parseados.
+La clave de la caché es un digest SHA-256 del PEM, de modo que nunca
+se guarda el PEM original como índice.
+
+Autor: Equipo P4 Seguridad
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class KeyCache:
+    """
+    Caché LRU de claves parseadas.
+
+    Características:
+    - Límite de entradas (expulsa la menos usada)
+    - Expiración por TTL
+    - Contadores de aciertos/fallos
+    - Invalidación explícita por PEM
+    """
+
+    DEFAULT_MAX_SIZE = 256
+    DEFAULT_TTL = 3600  # segundos
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE,
+                 ttl: Optional[float] = DEFAULT_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(kind: str, pem: bytes) -> str:
+        """Calcula la clave de caché para un PEM."""
+        return kind + ':' + hashlib.sha256(pem).hexdigest()
+
+    def configure(self, max_size: Optional[int] = None,
+                  ttl: Optional[float] = None):
+        """Ajusta tamaño y TTL (se llama desde AppConfig.ready)."""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl or None
+            self._trim()
+
+    def get_or_load(self, kind: str, pem: bytes,
+                    loader: Callable[[bytes], Any]) -> Any:
+        """
+        Retorna la clave cacheada o la carga con `loader`.
+
+        Args:
+            kind: 'public' o 'private'
+            pem: Clave en formato PEM
+            loader: Función que parsea el PEM
+        """
+        if self.max_size <= 0:
+            return loader(pem)
+
+        cache_key = self.digest(kind, pem)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                key_obj, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return key_obj
+                del self._entries[cache_key]
+            self.misses += 1
+
+        # Parsear fuera del lock para no serializar a otros hilos
+        key_obj = loader(pem)
+        expires_at = now + self.ttl if self.ttl else None
+
+        with self._lock:
+            self._entries[cache_key] = (key_obj, expires_at)
+            self._entries.move_to_end(cache_key)
+            self._trim()
+
+        return key_obj
+
+    def invalidate(self, *pems: Optional[bytes]):
+        """Elimina de la caché las claves asociadas a los PEM dados."""
+        with self._lock:
+            for pem in pems:
+                if not pem:
+                    continue
+                for kind in ('public', 'private'):
+                    self._entries.pop(self.digest(kind, pem), None)
+
+    def invalidate_kind(self, kind: str):
+        """Elimina todas las entradas de un tipo (p. ej. las de un usuario)."""
+        prefix = kind + ':'
+        with self._lock:
+            for cache_key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        """Vacía la caché y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas de uso."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0
+            }
+
+    def _trim(self):
+        """Expulsa entradas LRU hasta respetar max_size (requiere lock)."""
+        while len(self._entries) > max(self.max_size, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Instancia compartida por RSAService
+key_cache = KeyCache()
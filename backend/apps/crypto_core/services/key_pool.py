@@ -0,0 +1,197 @@
+"""
+Pool de Pares de Claves RSA
+===========================
+
+Mantiene pares de claves RSA pre-generados por tamaño para que el
+registro y la generación de claves no paguen el coste de keygen
+dentro de la petición. Un hilo en segundo plano rellena cada pool
+hasta su marca de agua; si un pool está vacío se genera en línea.
+
+El relleno arranca en los puntos de entrada del servidor
+(config/wsgi.py y config/asgi.py) o, si no, con el primer acquire():
+migrate, shell, los tests y los benchmarks no generan claves de fondo.
+Tras un fork (workers de gunicorn con --preload) el hijo descarta las
+claves heredadas, que no deben repartirse en dos procesos, y vuelve a
+arrancar su propio hilo.
+
+Autor: Equipo P4 Seguridad
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class KeyPool:
+    """
+    Pool de pares de claves RSA pre-generados.
+
+    Características:
+    - Un pool por tamaño de clave con marca de agua configurable
+    - Relleno en un hilo daemon (arranque en el servidor o al primer uso)
+    - Extracción O(1) con fallback a generación en línea
+    - Métricas de profundidad y velocidad de relleno
+    """
+
+    DEFAULT_TARGETS = {2048: 4, 3072: 2, 4096: 1}
+
+    def __init__(self, generator: Callable[[int], Tuple[bytes, bytes]],
+                 targets: Optional[Dict[int, int]] = None,
+                 enabled: bool = True,
+                 refill_generator: Optional[Callable[[int], Tuple[bytes, bytes]]] = None):
+        # `generator` atiende los fallos en línea; el hilo de relleno usa
+        # `refill_generator` si se indica (p. ej. sin pasar por el ejecutor)
+        self._generator = generator
+        self._refill_generator = refill_generator or generator
+        self.targets = dict(targets if targets is not None else self.DEFAULT_TARGETS)
+        self.enabled = enabled
+        self._pools: Dict[int, deque] = {size: deque() for size in self.targets}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._metrics: Dict[int, Dict[str, float]] = {
+            size: self._empty_metrics() for size in self.targets
+        }
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @staticmethod
+    def _empty_metrics() -> Dict[str, float]:
+        return {'hits': 0, 'misses': 0, 'generated': 0, 'generation_seconds': 0.0}
+
+    def configure(self, targets: Optional[Dict[int, int]] = None,
+                  enabled: Optional[bool] = None):
+        """Ajusta marcas de agua y activación (se llama desde AppConfig.ready)."""
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if targets is not None:
+                self.targets = dict(targets)
+                for size in self.targets:
+                    self._pools.setdefault(size, deque())
+                    self._metrics.setdefault(size, self._empty_metrics())
+        self._wakeup.set()
+
+    def start(self):
+        """Arranca el hilo de relleno si no está corriendo."""
+        with self._lock:
+            if not self.enabled or (self._worker and self._worker.is_alive()):
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(
+                target=self._run, name='rsa-key-pool', daemon=True
+            )
+            self._worker.start()
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el hilo de relleno."""
+        self._stop.set()
+        self._wakeup.set()
+        worker = self._worker
+        if worker:
+            worker.join(timeout)
+
+    def _after_fork(self):
+        """
+        En un proceso hijo se parte de pools vacíos: las claves del padre
+        no pueden entregarse también aquí. Si el padre estaba rellenando,
+        el hijo arranca su propio hilo.
+        """
+        was_started = self._worker is not None and not self._stop.is_set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        self._pools = {size: deque() for size in self.targets}
+        self._metrics = {size: self._empty_metrics() for size in self.targets}
+        if was_started:
+            self.start()
+
+    def acquire(self, key_size: int) -> Tuple[bytes, bytes]:
+        """
+        Obtiene un par de claves del pool o lo genera en línea.
+
+        Args:
+            key_size: Tamaño en bits
+
+        Returns:
+            Tuple[bytes, bytes]: (private_key_pem, public_key_pem)
+        """
+        pair = None
+        if self.enabled and key_size in self.targets:
+            with self._lock:
+                pool = self._pools[key_size]
+                if pool:
+                    pair = pool.popleft()
+                    self._metrics[key_size]['hits'] += 1
+                else:
+                    self._metrics[key_size]['misses'] += 1
+            self.start()
+            self._wakeup.set()
+
+        if pair is None:
+            pair = self._generator(key_size)
+        return pair
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna profundidad y métricas de relleno por tamaño."""
+        with self._lock:
+            pools = {}
+            for size, target in self.targets.items():
+                metrics = self._metrics[size]
+                generated = metrics['generated']
+                seconds = metrics['generation_seconds']
+                pools[size] = {
+                    'depth': len(self._pools[size]),
+                    'target': target,
+                    'hits': metrics['hits'],
+                    'misses': metrics['misses'],
+                    'generated': generated,
+                    'avg_generation_ms': (seconds / generated * 1000) if generated else None,
+                    'refill_rate_per_s': (generated / seconds) if seconds else None
+                }
+            return {
+                'enabled': self.enabled,
+                'running': bool(self._worker and self._worker.is_alive()),
+                'pools': pools
+            }
+
+    def _next_size(self) -> Optional[int]:
+        """Elige el pool con menor nivel de llenado (requiere lock)."""
+        best, best_ratio = None, 1.0
+        for size, target in self.targets.items():
+            if target <= 0:
+                continue
+            ratio = len(self._pools[size]) / target
+            if ratio < best_ratio:
+                best, best_ratio = size, ratio
+        return best
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                size = self._next_size() if self.enabled else None
+            if size is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            started = time.perf_counter()
+            try:
+                pair = self._refill_generator(size)
+            except Exception:
+                # No tumbar el hilo por un fallo puntual
+                self._stop.wait(1.0)
+                continue
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                if len(self._pools[size]) < self.targets.get(size, 0):
+                    self._pools[size].append(pair)
+                metrics = self._metrics[size]
+                metrics['generated'] += 1
+                metrics['generation_seconds'] += elapsed
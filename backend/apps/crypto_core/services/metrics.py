@@ -0,0 +1,430 @@
+"""
+Métricas de Rendimiento
+=======================
+
+Registro ligero de contadores e histogramas con exposición en el
+formato de texto de Prometheus, sin dependencias externas.
+
+Con varios procesos (workers de gunicorn) cada proceso vuelca una
+instantánea JSON en METRICS_MULTIPROC_DIR cada pocos segundos y el
+endpoint de scrape suma las instantáneas de todos los procesos. Los
+contadores e histogramas de procesos ya terminados se conservan; los
+gauges solo se toman de procesos vivos. El directorio debe vaciarse al
+desplegar.
+
+Autor: Equipo P4 Seguridad
+"""
+
+import bisect
+import functools
+import glob
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Buckets por defecto (segundos)
+CRYPTO_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                  0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+
+class _Metric:
+    """Familia de series con los mismos nombres de etiqueta."""
+
+    def __init__(self, registry: 'MetricsRegistry', kind: str, name: str,
+                 help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Optional[Iterable[float]] = None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets is not None else None
+        self.values: Dict[Tuple[str, ...], Any] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        """Incrementa un contador."""
+        key = tuple(str(label) for label in labels)
+        with self.registry._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+        self.registry._ensure_flusher()
+
+    def observe(self, value: float, *labels):
+        """Registra una observación en el histograma."""
+        self.observe_labels(value, tuple(str(label) for label in labels))
+
+    def observe_labels(self, value: float, key: Tuple[str, ...]):
+        """Como observe, con las etiquetas ya convertidas a str."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self.registry._lock:
+            series = self.values.get(key)
+            if series is None:
+                # Conteos por bucket (+Inf al final), suma y total
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+        self.registry._ensure_flusher()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'help': self.help,
+            'labelnames': list(self.labelnames),
+            'buckets': list(self.buckets) if self.buckets is not None else None,
+            'values': [[list(key), value] for key, value in self.values.items()]
+        }
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas del proceso.
+
+    Características:
+    - Contadores e histogramas con etiquetas
+    - Colectores que calculan gauges/contadores en el momento del scrape
+    - Agregación multiproceso por archivos
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple]]] = []
+        self.enabled = True
+        self.multiproc_dir: Optional[str] = None
+        self.flush_interval = 5.0
+        self._flusher: Optional[threading.Thread] = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def configure(self, enabled: Optional[bool] = None,
+                  multiproc_dir: Optional[str] = None,
+                  flush_interval: Optional[float] = None):
+        """Ajusta la configuración (se llama desde AppConfig.ready)."""
+        if enabled is not None:
+            self.enabled = enabled
+        if multiproc_dir is not None:
+            self.multiproc_dir = multiproc_dir or None
+            if self.multiproc_dir:
+                os.makedirs(self.multiproc_dir, exist_ok=True)
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> _Metric:
+        return self._register(_Metric(self, COUNTER, name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = REQUEST_BUCKETS) -> _Metric:
+        return self._register(_Metric(self, HISTOGRAM, name, help_text, labelnames, buckets))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple]]):
+        """
+        Registra una función evaluada en cada instantánea.
+
+        Debe producir tuplas (kind, name, help, labelnames, {labels: valor}).
+        """
+        self._collectors.append(collector)
+
+    # Instantáneas y agregación
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Instantánea serializable de las métricas del proceso."""
+        with self._lock:
+            metrics = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        for collector in self._collectors:
+            for kind, name, help_text, labelnames, values in collector():
+                metric = metrics.setdefault(name, {
+                    'kind': kind,
+                    'help': help_text,
+                    'labelnames': list(labelnames),
+                    'buckets': None,
+                    'values': []
+                })
+                metric['values'].extend([list(key), value] for key, value in values.items())
+        return {'pid': os.getpid(), 'metrics': metrics}
+
+    def flush(self):
+        """Escribe la instantánea del proceso en el directorio compartido."""
+        if not self.multiproc_dir:
+            return
+        path = os.path.join(self.multiproc_dir, f'metrics_{os.getpid()}.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _ensure_flusher(self):
+        """Arranca el hilo de volcado periódico (una vez por proceso)."""
+        if self._flusher is not None or not self.multiproc_dir:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name='metrics-flusher', daemon=True
+            )
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _after_fork(self):
+        """En un proceso hijo se parte de cero (sin heredar valores del padre)."""
+        self._lock = threading.Lock()
+        self._flusher = None
+        for metric in self._metrics.values():
+            metric.values = {}
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Instantáneas de todos los procesos (o solo la local)."""
+        if not self.multiproc_dir:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.multiproc_dir, 'metrics_*.json')):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    @staticmethod
+    def merge(snapshots: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Suma las instantáneas de varios procesos."""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for snapshot in snapshots:
+            alive = None
+            for name, metric in snapshot['metrics'].items():
+                if metric['kind'] == GAUGE:
+                    if alive is None:
+                        alive = MetricsRegistry._alive(snapshot['pid'])
+                    if not alive:
+                        continue
+                target = merged.setdefault(name, dict(metric, values={}))
+                for labels, value in metric['values']:
+                    key = tuple(labels)
+                    current = target['values'].get(key)
+                    if current is None:
+                        target['values'][key] = list(value) if isinstance(value, list) else value
+                    elif isinstance(value, list):
+                        target['values'][key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        target['values'][key] = current + value
+        return merged
+
+    # Exposición
+
+    def render(self) -> str:
+        """Texto en formato de exposición de Prometheus (0.0.4)."""
+        merged = self.merge(self.collect())
+        self._derive_hit_ratio(merged)
+
+        lines = []
+        for name, metric in sorted(merged.items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            labelnames = metric['labelnames']
+            for key, value in sorted(metric['values'].items()):
+                labels = [f'{label}="{_escape(v)}"' for label, v in zip(labelnames, key)]
+                if metric['kind'] == HISTOGRAM:
+                    cumulative = 0
+                    bounds = [_format_number(float(b)) for b in metric['buckets']] + ['+Inf']
+                    for bound, count in zip(bounds, value):
+                        cumulative += count
+                        bucket_labels = _labels(labels + ['le="%s"' % bound])
+                        lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {_format_number(value[-2])}')
+                    lines.append(f'{name}_count{_labels(labels)} {value[-1]}')
+                else:
+                    lines.append(f'{name}{_labels(labels)} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _derive_hit_ratio(merged: Dict[str, Dict[str, Any]]):
+        """Calcula la proporción de aciertos a partir de los totales agregados."""
+        hits = merged.get('pyseclab_cache_hits_total')
+        misses = merged.get('pyseclab_cache_misses_total')
+        if not hits or not misses:
+            return
+        ratios = {}
+        for key, hit_count in hits['values'].items():
+            total = hit_count + misses['values'].get(key, 0)
+            ratios[key] = hit_count / total if total else 0.0
+        merged['pyseclab_cache_hit_ratio'] = {
+            'kind': GAUGE,
+            'help': 'Proporción de aciertos de caché (todos los procesos)',
+            'labelnames': ['cache'],
+            'buckets': None,
+            'values': ratios
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: List[str]) -> str:
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+
+def _format_number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Registro compartido
+metrics = MetricsRegistry()
+
+CRYPTO_OPERATION_SECONDS = metrics.histogram(
+    'pyseclab_crypto_operation_seconds',
+    'Duración de las operaciones de AESService, AEADService y RSAService',
+    ['algorithm', 'operation', 'key_size'],
+    CRYPTO_BUCKETS
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    'pyseclab_http_request_duration_seconds',
+    'Latencia de las peticiones por vista',
+    ['view', 'method', 'status'],
+    REQUEST_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = metrics.histogram(
+    'pyseclab_db_queries_per_request',
+    'Consultas a la base de datos por petición',
+    ['view'],
+    QUERY_COUNT_BUCKETS
+)
+DB_QUERY_SECONDS = metrics.counter(
+    'pyseclab_db_query_seconds_total',
+    'Tiempo total en consultas a la base de datos',
+    ['view']
+)
+
+
+def key_bits(key: bytes) -> int:
+    """Tamaño en bits de una clave simétrica."""
+    return len(key) * 8
+
+
+def b64_bits(value: str) -> int:
+    """Bits de un valor base64 sin decodificarlo (tamaño de clave RSA)."""
+    return (len(value) * 3 // 4 - value[-2:].count('=')) * 8
+
+
+class _Label:
+    """Etiqueta calculada a partir de un argumento o del resultado."""
+
+    def __init__(self, arg: Optional[str] = None, transform: Optional[Callable] = None):
+        self.arg = arg
+        self.transform = transform
+        self.index = None
+        self.default = None
+
+    def bind(self, func: Callable) -> '_Label':
+        """Resuelve la posición del argumento una sola vez."""
+        if self.arg is not None:
+            parameters = list(inspect.signature(func).parameters.values())
+            names = [parameter.name for parameter in parameters]
+            self.index = names.index(self.arg)
+            self.default = parameters[self.index].default
+        return self
+
+    def __call__(self, result, args, kwargs):
+        if self.arg is None:
+            value = result
+        elif self.arg in kwargs:
+            value = kwargs[self.arg]
+        elif self.index < len(args):
+            value = args[self.index]
+        else:
+            value = self.default
+        return self.transform(value) if self.transform else value
+
+
+def from_arg(name: str, transform: Optional[Callable] = None) -> _Label:
+    """Etiqueta tomada del argumento `name` de la llamada."""
+    return _Label(name, transform)
+
+
+def from_result(transform: Callable) -> _Label:
+    """Etiqueta calculada a partir del valor de retorno."""
+    return _Label(None, transform)
+
+
+def instrumented(algorithm, operation: str, key_size):
+    """
+    Decorador que mide la duración de una operación criptográfica.
+
+    `algorithm` y `key_size` pueden ser constantes o etiquetas creadas
+    con from_arg / from_result.
+    """
+    def decorator(func):
+        algorithm_label = algorithm.bind(func) if isinstance(algorithm, _Label) else algorithm
+        key_size_label = key_size.bind(func) if isinstance(key_size, _Label) else str(key_size)
+        dynamic_algorithm = isinstance(algorithm_label, _Label)
+        dynamic_key_size = isinstance(key_size_label, _Label)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            try:
+                CRYPTO_OPERATION_SECONDS.observe_labels(elapsed, (
+                    str(algorithm_label(result, args, kwargs)) if dynamic_algorithm else algorithm_label,
+                    operation,
+                    str(key_size_label(result, args, kwargs)) if dynamic_key_size else key_size_label
+                ))
+            except Exception:
+                pass
+            return result
+        return wrapper
+    return decorator
+
+
+def cache_collector(cache_name: str, stats: Callable[[], Dict[str, Any]]):
+    """Colector para cachés con stats() de tipo KeyCache/KeyPool."""
+    def collect():
+        data = stats()
+        key = (cache_name,)
+        yield (COUNTER, 'pyseclab_cache_hits_total', 'Aciertos de caché', ['cache'],
+               {key: data.get('hits', 0)})
+        yield (COUNTER, 'pyseclab_cache_misses_total', 'Fallos de caché', ['cache'],
+               {key: data.get('misses', 0)})
+        if 'evictions' in data:
+            yield (COUNTER, 'pyseclab_cache_evictions_total', 'Expulsiones de caché', ['cache'],
+                   {key: data['evictions']})
+        if 'size' in data:
+            yield (GAUGE, 'pyseclab_cache_entries', 'Entradas en caché', ['cache'],
+                   {key: data['size']})
+    return collect
@@ -0,0 +1,101 @@
+"""
+Capturas de cProfile bajo demanda
+=================================
+
+Almacén en disco de perfiles de peticiones individuales. Cada captura
+es un archivo .prof (formato pstats) más un .json con los metadatos de
+la petición. Se conservan como máximo `max_entries` capturas: al
+guardar una nueva se borran las más antiguas (buffer circular).
+
+Autor: Equipo P4 Seguridad
+"""
+
+import cProfile
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+PROFILE_ID_RE = re.compile(r'^[0-9]{19,20}-[0-9a-f]{8}$')
+
+
+class ProfileStore:
+    """
+    Buffer circular de perfiles en disco.
+
+    Los identificadores empiezan por la marca de tiempo en nanosegundos,
+    de modo que el orden alfabético es el orden cronológico.
+    """
+
+    DEFAULT_MAX_ENTRIES = 50
+
+    def __init__(self, directory: Optional[str] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def configure(self, directory: Optional[str] = None,
+                  max_entries: Optional[int] = None):
+        """Ajusta directorio y tamaño (se llama desde AppConfig.ready)."""
+        if directory is not None:
+            self.directory = str(directory)
+        if max_entries is not None:
+            self.max_entries = max_entries
+
+    def _path(self, profile_id: str, extension: str) -> str:
+        if not PROFILE_ID_RE.match(profile_id):
+            raise ValueError('Identificador de perfil inválido')
+        return os.path.join(self.directory, f'{profile_id}.{extension}')
+
+    def save(self, profiler: cProfile.Profile, metadata: Dict[str, Any]) -> str:
+        """Guarda un perfil con sus metadatos y aplica el límite."""
+        profile_id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, 'prof'))
+        with open(self._path(profile_id, 'json'), 'w') as f:
+            json.dump(dict(metadata, id=profile_id), f)
+        self._prune()
+        return profile_id
+
+    def _ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names
+                      if name.endswith('.json') and PROFILE_ID_RE.match(name[:-5]))
+
+    def _prune(self):
+        """Elimina las capturas más antiguas por encima de max_entries."""
+        with self._lock:
+            ids = self._ids()
+            for profile_id in ids[:max(len(ids) - self.max_entries, 0)]:
+                for extension in ('json', 'prof'):
+                    try:
+                        os.remove(self._path(profile_id, extension))
+                    except FileNotFoundError:
+                        pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadatos de las capturas, de la más reciente a la más antigua."""
+        entries = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(self._path(profile_id, 'json')) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return entries
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """Ruta del .prof o None si no existe."""
+        path = self._path(profile_id, 'prof')
+        return path if os.path.exists(path) else None
+
+
+# Instancia compartida por el middleware de perfiles
+profile_store = ProfileStore()
@@ -9,13 +9,22 @@ Autor: Equipo P4 Seguridad
 """
 
 import base64
-from typing import Dict, Any, Tuple, Optional
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Tuple, Optional, Union
 
-from cryptography.hazmat.primitives.asymmetric import rsa, padding as asym_padding
+from cryptography.hazmat.primitives.asymmetric import rsa, padding as asym_padding, utils as asym_utils
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.backends import default_backend
 from cryptography.exceptions import InvalidSignature
 
+from .key_cache import key_cache
+from .key_pool import KeyPool
+from .executor import crypto_executor
+from .trace import StepTrace, FULL, DEFAULT_PREVIEW_BYTES
+from .metrics import instrumented, from_arg, from_result, b64_bits, key_bits
+
 
 class RSAService:
     """
@@ -29,11 +38,14 @@ class RSAService:
     
     VALID_KEY_SIZES = [2048, 3072, 4096]
     PUBLIC_EXPONENT = 65537
+    DIGEST_SIZE = 32  # SHA-256
+    STREAM_CHUNK_SIZE = 1024 * 1024
     
     @staticmethod
+    @instrumented('RSA', 'generate_key_pair', from_arg('key_size'))
     def generate_key_pair(key_size: int = 2048) -> Tuple[bytes, bytes]:
         """
-        Genera un par de claves RSA.
+        Genera un par de claves RSA (en el ejecutor criptográfico).
         
         Args:
             key_size: Tamaño en bits (2048, 3072, 4096)
@@ -44,6 +56,13 @@ class RSAService:
         if key_size not in RSAService.VALID_KEY_SIZES:
             raise ValueError(f"Key size must be one of {RSAService.VALID_KEY_SIZES}")
         
+        return crypto_executor.run(
+            RSAService._generate_key_pair, key_size, name='rsa.generate_key_pair'
+        )
+    
+    @staticmethod
+    def _generate_key_pair(key_size: int) -> Tuple[bytes, bytes]:
+        """Genera un par de claves RSA en el proceso actual."""
         private_key = rsa.generate_private_key(
             public_exponent=RSAService.PUBLIC_EXPONENT,
             key_size=key_size,
@@ -64,8 +83,23 @@ class RSAService:
         return private_pem, public_pem
     
     @staticmethod
-    def _load_private_key(private_pem: bytes):
-        """Carga una clave privada desde PEM."""
+    def acquire_key_pair(key_size: int = 2048) -> Tuple[bytes, bytes]:
+        """
+        Obtiene un par de claves pre-generado del pool.
+        
+        Si el pool del tamaño pedido está vacío, genera el par en línea.
+        
+        Returns:
+            Tuple[bytes, bytes]: (private_key_pem, public_key_pem)
+        """
+        if key_size not in RSAService.VALID_KEY_SIZES:
+            raise ValueError(f"Key size must be one of {RSAService.VALID_KEY_SIZES}")
+        
+        return key_pool.acquire(key_size)
+    
+    @staticmethod
+    def _parse_private_key(private_pem: bytes):
+        """Parsea una clave privada desde PEM (sin caché)."""
         return serialization.load_pem_private_key(
             private_pem,
             password=None,
@@ -73,13 +107,47 @@ class RSAService:
         )
     
     @staticmethod
-    def _load_public_key(public_pem: bytes):
-        """Carga una clave pública desde PEM."""
+    def _parse_public_key(public_pem: bytes):
+        """Parsea una clave pública desde PEM (sin caché)."""
         return serialization.load_pem_public_key(
             public_pem,
             backend=default_backend()
         )
     
+    @staticmethod
+    def _load_private_key(private_pem: bytes):
+        """Carga una clave privada desde PEM (con caché)."""
+        return key_cache.get_or_load(
+            'private', private_pem, RSAService._parse_private_key
+        )
+    
+    @staticmethod
+    def _load_public_key(public_pem: bytes):
+        """Carga una clave pública desde PEM (con caché)."""
+        return key_cache.get_or_load(
+            'public', public_pem, RSAService._parse_public_key
+        )
+    
+    @staticmethod
+    def invalidate_keys(*pems: bytes):
+        """Elimina claves de la caché (p. ej. tras rotar un par)."""
+        key_cache.invalidate(*pems)
+    
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Estadísticas de la caché de claves parseadas."""
+        return key_cache.stats()
+    
+    @staticmethod
+    def key_pool_stats() -> Dict[str, Any]:
+        """Profundidad y velocidad de relleno del pool de claves."""
+        return key_pool.stats()
+    
+    @staticmethod
+    def executor_stats() -> Dict[str, Any]:
+        """Tiempos de cola y ejecución del ejecutor criptográfico."""
+        return crypto_executor.stats()
+    
     @staticmethod
     def _get_oaep_padding():
         """Retorna padding OAEP para cifrado."""
@@ -109,35 +177,45 @@ class RSAService:
         Returns:
             Dict con ciphertext en base64 y metadatos
         """
+        ciphertext = RSAService.encrypt_bytes(plaintext.encode('utf-8'), public_key_pem)
+        
+        return {
+            'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
+            'algorithm': 'RSA',
+            'padding': 'OAEP-SHA256',
+            'key_size': len(ciphertext) * 8
+        }
+    
+    @staticmethod
+    @instrumented('RSA-OAEP', 'encrypt', from_result(key_bits))
+    def encrypt_bytes(plaintext: bytes, public_key_pem: bytes) -> bytes:
+        """
+        Cifra bytes en bruto con la clave pública RSA (sin base64).
+        
+        Returns:
+            bytes: Ciphertext (tantos bytes como la clave)
+        """
         public_key = RSAService._load_public_key(public_key_pem)
-        plaintext_bytes = plaintext.encode('utf-8')
         
         # Verificar tamaño máximo
         key_size = public_key.key_size
         max_size = (key_size // 8) - 66  # OAEP overhead for SHA256
         
-        if len(plaintext_bytes) > max_size:
+        if len(plaintext) > max_size:
             raise ValueError(
-                f"Message too long ({len(plaintext_bytes)} bytes). "
+                f"Message too long ({len(plaintext)} bytes). "
                 f"Max: {max_size} bytes for {key_size}-bit key."
             )
         
-        ciphertext = public_key.encrypt(
-            plaintext_bytes,
+        return public_key.encrypt(
+            plaintext,
             RSAService._get_oaep_padding()
         )
-        
-        return {
-            'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
-            'algorithm': 'RSA',
-            'padding': 'OAEP-SHA256',
-            'key_size': key_size
-        }
     
     @staticmethod
     def decrypt(ciphertext_b64: str, private_key_pem: bytes) -> str:
         """
-        Descifra un mensaje con la clave privada RSA.
+        Descifra un mensaje con la clave privada RSA (en el ejecutor).
         
         Args:
             ciphertext_b64: Texto cifrado en base64
@@ -146,20 +224,44 @@ class RSAService:
         Returns:
             str: Mensaje descifrado
         """
+        return RSAService.decrypt_bytes(
+            base64.b64decode(ciphertext_b64), private_key_pem
+        ).decode('utf-8')
+    
+    @staticmethod
+    @instrumented('RSA-OAEP', 'decrypt', from_arg('ciphertext', key_bits))
+    def decrypt_bytes(ciphertext: bytes, private_key_pem: bytes) -> bytes:
+        """
+        Descifra bytes en bruto con la clave privada RSA (en el ejecutor, sin base64).
+        
+        Returns:
+            bytes: Texto plano
+        """
+        return crypto_executor.run(
+            RSAService._decrypt_bytes, ciphertext, private_key_pem, name='rsa.decrypt'
+        )
+    
+    @staticmethod
+    def _decrypt(ciphertext_b64: str, private_key_pem: bytes) -> str:
+        """Descifra en el proceso actual."""
+        return RSAService._decrypt_bytes(
+            base64.b64decode(ciphertext_b64), private_key_pem
+        ).decode('utf-8')
+    
+    @staticmethod
+    def _decrypt_bytes(ciphertext: bytes, private_key_pem: bytes) -> bytes:
+        """Descifra bytes en el proceso actual."""
         private_key = RSAService._load_private_key(private_key_pem)
-        ciphertext = base64.b64decode(ciphertext_b64)
         
-        plaintext_bytes = private_key.decrypt(
+        return private_key.decrypt(
             ciphertext,
             RSAService._get_oaep_padding()
         )
-        
-        return plaintext_bytes.decode('utf-8')
     
     @staticmethod
     def sign(message: str, private_key_pem: bytes) -> Dict[str, Any]:
         """
-        Firma un mensaje con la clave privada.
+        Firma un mensaje con la clave privada (en el ejecutor).
         
         Args:
             message: Mensaje a firmar
@@ -168,14 +270,31 @@ class RSAService:
         Returns:
             Dict con signature en base64 y metadatos
         """
-        private_key = RSAService._load_private_key(private_key_pem)
-        message_bytes = message.encode('utf-8')
+        signature = RSAService.sign_bytes(message.encode('utf-8'), private_key_pem)
         
-        signature = private_key.sign(
-            message_bytes,
-            RSAService._get_pss_padding(),
-            hashes.SHA256()
+        return {
+            'signature': base64.b64encode(signature).decode('utf-8'),
+            'algorithm': 'RSA-PSS',
+            'hash': 'SHA256'
+        }
+    
+    @staticmethod
+    @instrumented('RSA-PSS', 'sign', from_result(key_bits))
+    def sign_bytes(message: bytes, private_key_pem: bytes) -> bytes:
+        """
+        Firma bytes en bruto con la clave privada (en el ejecutor, sin base64).
+        
+        Returns:
+            bytes: Firma
+        """
+        return crypto_executor.run(
+            RSAService._sign_bytes, message, private_key_pem, name='rsa.sign'
         )
+    
+    @staticmethod
+    def _sign(message: str, private_key_pem: bytes) -> Dict[str, Any]:
+        """Firma en el proceso actual."""
+        signature = RSAService._sign_bytes(message.encode('utf-8'), private_key_pem)
         
         return {
             'signature': base64.b64encode(signature).decode('utf-8'),
@@ -183,6 +302,17 @@ class RSAService:
             'hash': 'SHA256'
         }
     
+    @staticmethod
+    def _sign_bytes(message: bytes, private_key_pem: bytes) -> bytes:
+        """Firma bytes en el proceso actual."""
+        private_key = RSAService._load_private_key(private_key_pem)
+        
+        return private_key.sign(
+            message,
+            RSAService._get_pss_padding(),
+            hashes.SHA256()
+        )
+    
     @staticmethod
     def verify(message: str, signature_b64: str, 
                public_key_pem: bytes) -> Dict[str, Any]:
@@ -197,91 +327,333 @@ class RSAService:
         Returns:
             Dict con resultado de verificación
         """
+        if RSAService.verify_bytes(message.encode('utf-8'), base64.b64decode(signature_b64),
+                                   public_key_pem):
+            return {'valid': True, 'message': 'Firma válida'}
+        return {'valid': False, 'message': 'Firma inválida'}
+    
+    @staticmethod
+    @instrumented('RSA-PSS', 'verify', from_arg('signature', key_bits))
+    def verify_bytes(message: bytes, signature: bytes, public_key_pem: bytes) -> bool:
+        """
+        Verifica una firma en bruto (sin base64).
+        
+        Returns:
+            bool: True si la firma es válida
+        """
         public_key = RSAService._load_public_key(public_key_pem)
-        message_bytes = message.encode('utf-8')
-        signature = base64.b64decode(signature_b64)
         
         try:
             public_key.verify(
                 signature,
-                message_bytes,
+                message,
                 RSAService._get_pss_padding(),
                 hashes.SHA256()
             )
+            return True
+        except InvalidSignature:
+            return False
+    
+    @staticmethod
+    def digest(data: Union[bytes, str, Iterable[bytes]],
+               chunk_size: int = STREAM_CHUNK_SIZE) -> bytes:
+        """
+        Calcula el SHA-256 de un mensaje en una sola pasada.
+        
+        Args:
+            data: bytes, str (UTF-8), un objeto con read() (archivo,
+                  UploadedFile...) o un iterable de bloques de bytes
+            chunk_size: Tamaño de bloque al leer de un archivo
+            
+        Returns:
+            bytes: Digest de 32 bytes
+        """
+        if isinstance(data, str):
+            return hashlib.sha256(data.encode('utf-8')).digest()
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return hashlib.sha256(data).digest()
+        
+        hasher = hashlib.sha256()
+        if hasattr(data, 'read'):
+            while chunk := data.read(chunk_size):
+                hasher.update(chunk)
+        else:
+            for chunk in data:
+                hasher.update(chunk)
+        return hasher.digest()
+    
+    @staticmethod
+    def _check_digest(digest: bytes) -> bytes:
+        if len(digest) != RSAService.DIGEST_SIZE:
+            raise ValueError(f"Digest must be {RSAService.DIGEST_SIZE} bytes (SHA-256)")
+        return digest
+    
+    @staticmethod
+    @instrumented('RSA-PSS', 'sign_digest', from_result(lambda result: b64_bits(result['signature'])))
+    def sign_digest(digest: bytes, private_key_pem: bytes) -> Dict[str, Any]:
+        """
+        Firma un digest SHA-256 ya calculado (en el ejecutor).
+        
+        La firma es idéntica en formato a la de sign(): verify() la
+        acepta con el mensaje original y verify_digest() con el digest.
+        
+        Args:
+            digest: SHA-256 del mensaje (32 bytes)
+            private_key_pem: Clave privada en formato PEM
+            
+        Returns:
+            Dict con signature en base64, message_hash en hex y metadatos
+        """
+        RSAService._check_digest(digest)
+        return crypto_executor.run(
+            RSAService._sign_digest, digest, private_key_pem, name='rsa.sign_digest'
+        )
+    
+    @staticmethod
+    def _sign_digest(digest: bytes, private_key_pem: bytes) -> Dict[str, Any]:
+        """Firma un digest en el proceso actual."""
+        private_key = RSAService._load_private_key(private_key_pem)
+        
+        signature = private_key.sign(
+            digest,
+            RSAService._get_pss_padding(),
+            asym_utils.Prehashed(hashes.SHA256())
+        )
+        
+        return {
+            'signature': base64.b64encode(signature).decode('utf-8'),
+            'message_hash': digest.hex(),
+            'algorithm': 'RSA-PSS',
+            'hash': 'SHA256'
+        }
+    
+    @staticmethod
+    def sign_stream(stream: Union[bytes, str, Iterable[bytes]],
+                    private_key_pem: bytes) -> Dict[str, Any]:
+        """
+        Firma un mensaje arbitrariamente grande leyéndolo por bloques.
+        
+        Solo el digest viaja al ejecutor criptográfico.
+        """
+        return RSAService.sign_digest(RSAService.digest(stream), private_key_pem)
+    
+    @staticmethod
+    @instrumented('RSA-PSS', 'verify_digest', from_arg('signature_b64', b64_bits))
+    def verify_digest(digest: bytes, signature_b64: str,
+                      public_key_pem: bytes) -> Dict[str, Any]:
+        """
+        Verifica una firma a partir del digest SHA-256 del mensaje.
+        
+        Args:
+            digest: SHA-256 del mensaje (32 bytes)
+            signature_b64: Firma en base64
+            public_key_pem: Clave pública del firmante
+            
+        Returns:
+            Dict con resultado de verificación
+        """
+        RSAService._check_digest(digest)
+        public_key = RSAService._load_public_key(public_key_pem)
+        signature = base64.b64decode(signature_b64)
+        
+        try:
+            public_key.verify(
+                signature,
+                digest,
+                RSAService._get_pss_padding(),
+                asym_utils.Prehashed(hashes.SHA256())
+            )
             return {'valid': True, 'message': 'Firma válida'}
         except InvalidSignature:
             return {'valid': False, 'message': 'Firma inválida'}
     
     @staticmethod
-    def encrypt_with_steps(plaintext: str, public_key_pem: bytes) -> Dict[str, Any]:
+    def verify_stream(stream: Union[bytes, str, Iterable[bytes]], signature_b64: str,
+                      public_key_pem: bytes) -> Dict[str, Any]:
+        """Verifica la firma de un mensaje leído por bloques."""
+        return RSAService.verify_digest(RSAService.digest(stream), signature_b64, public_key_pem)
+    
+    @staticmethod
+    @instrumented('RSA-PSS', 'verify_batch', 'mixed')
+    def verify_batch(items: List[Dict[str, Any]],
+                     max_workers: Optional[int] = None,
+                     use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Verifica muchas firmas en paralelo.
+        
+        El lote se reparte en trozos que se ejecutan en el ejecutor
+        criptográfico compartido (OpenSSL libera el GIL durante la
+        operación RSA): la concurrencia total entre peticiones queda
+        acotada por su pool y su cola. Cada clave pública distinta se
+        parsea una vez por trozo.
+        
+        Args:
+            items: Lista de dicts con message, signature (base64) y
+                   public_key (PEM en bytes)
+            max_workers: Trozos en que se reparte el lote (por defecto,
+                         los hilos del ejecutor)
+            use_cache: Pasar por la caché de claves parseadas. Con
+                       False las claves solo se reutilizan dentro del
+                       trozo (lotes anónimos: no expulsan claves de uso
+                       frecuente de la caché compartida)
+            
+        Returns:
+            Lista de dicts con index, valid y error, en el orden de entrada
+        """
+        if not items:
+            return []
+        
+        chunks = min(max_workers or crypto_executor.max_workers, len(items))
+        indexed = list(enumerate(items))
+        results = crypto_executor.map(
+            RSAService._verify_chunk,
+            [(indexed[i::chunks], use_cache) for i in range(chunks)],
+            name='rsa.verify_batch'
+        )
+        return sorted((result for chunk in results for result in chunk),
+                      key=lambda result: result['index'])
+    
+    @staticmethod
+    def _verify_chunk(indexed_items: List[Tuple[int, Dict[str, Any]]],
+                      use_cache: bool) -> List[Dict[str, Any]]:
+        """Verifica un trozo de verify_batch (en el ejecutor)."""
+        load = RSAService._load_public_key if use_cache else RSAService._parse_public_key
+        keys: Dict[bytes, Any] = {}
+        key_errors: Dict[bytes, str] = {}
+        pss = RSAService._get_pss_padding()
+        
+        results = []
+        for index, item in indexed_items:
+            pem = item['public_key']
+            if pem not in keys and pem not in key_errors:
+                try:
+                    keys[pem] = load(pem)
+                except Exception as e:
+                    key_errors[pem] = str(e) or 'Clave pública inválida'
+            if pem in key_errors:
+                results.append({'index': index, 'valid': False, 'error': key_errors[pem]})
+                continue
+            try:
+                keys[pem].verify(
+                    base64.b64decode(item['signature']),
+                    item['message'].encode('utf-8'),
+                    pss,
+                    hashes.SHA256()
+                )
+                results.append({'index': index, 'valid': True, 'error': None})
+            except InvalidSignature:
+                results.append({'index': index, 'valid': False, 'error': None})
+            except Exception as e:
+                results.append({'index': index, 'valid': False, 'error': str(e) or e.__class__.__name__})
+        return results
+    
+    @staticmethod
+    def encrypt_many(plaintext: bytes, public_key_pems: List[bytes],
+                     max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Cifra el mismo mensaje corto (p. ej. una clave AES) para muchos
+        destinatarios en paralelo.
+        
+        Args:
+            plaintext: Mensaje a cifrar (bytes)
+            public_key_pems: Claves públicas PEM de los destinatarios
+            max_workers: Hilos a usar (por defecto, número de CPUs)
+            
+        Returns:
+            Lista de dicts con index, ciphertext (bytes, sin base64) y
+            error, en el orden de entrada
+        """
+        def encrypt_one(index_pem):
+            index, pem = index_pem
+            try:
+                ciphertext = RSAService.encrypt_bytes(plaintext, pem)
+                return {'index': index, 'ciphertext': ciphertext, 'error': None}
+            except Exception as e:
+                return {'index': index, 'ciphertext': None, 'error': str(e) or e.__class__.__name__}
+        
+        workers = max_workers or os.cpu_count() or 1
+        if workers == 1 or len(public_key_pems) < 2:
+            return [encrypt_one(entry) for entry in enumerate(public_key_pems)]
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(public_key_pems))) as executor:
+            return list(executor.map(encrypt_one, enumerate(public_key_pems)))
+    
+    @staticmethod
+    @instrumented('RSA-OAEP', 'encrypt_with_steps',
+                  from_result(lambda result: b64_bits(result['result']['ciphertext'])))
+    def encrypt_with_steps(plaintext: str, public_key_pem: bytes, trace: str = FULL,
+                           preview_bytes: int = DEFAULT_PREVIEW_BYTES) -> Dict[str, Any]:
         """
         Cifra mostrando cada paso del proceso (para demostración).
+        
+        Args:
+            trace: Política de traza ('full', 'truncated' o 'none')
+            preview_bytes: Límite de bytes por paso con 'truncated'
         """
-        steps = []
+        steps = StepTrace(trace, preview_bytes)
         public_key = RSAService._load_public_key(public_key_pem)
         key_size = public_key.key_size
         
         # Paso 1: Mensaje original
-        steps.append({
-            'step': 1,
-            'name': 'Mensaje original',
-            'data': plaintext,
-            'type': 'text'
-        })
+        steps.add(
+            step=1,
+            name='Mensaje original',
+            data=steps.text(plaintext),
+            type='text'
+        )
         
         # Paso 2: Convertir a bytes
         plaintext_bytes = plaintext.encode('utf-8')
-        steps.append({
-            'step': 2,
-            'name': 'Convertir a bytes (UTF-8)',
-            'data': plaintext_bytes.hex(),
-            'type': 'hex',
-            'length': len(plaintext_bytes)
-        })
+        steps.add(
+            step=2,
+            name='Convertir a bytes (UTF-8)',
+            data=steps.hex(plaintext_bytes),
+            type='hex',
+            length=len(plaintext_bytes)
+        )
         
         # Paso 3: Mostrar clave pública (parcial)
-        pub_pem_str = public_key_pem.decode('utf-8')
-        steps.append({
-            'step': 3,
-            'name': 'Clave pública RSA',
-            'data': pub_pem_str[:80] + '...',
-            'type': 'pem_partial',
-            'key_size': key_size
-        })
+        steps.add(
+            step=3,
+            name='Clave pública RSA',
+            data=public_key_pem[:80].decode('utf-8') + '...',
+            type='pem_partial',
+            key_size=key_size
+        )
         
         # Paso 4: Explicar OAEP padding
-        steps.append({
-            'step': 4,
-            'name': 'Aplicar OAEP Padding',
-            'data': 'OAEP (Optimal Asymmetric Encryption Padding) con SHA-256',
-            'type': 'info',
-            'details': 'Añade aleatoriedad al cifrado para mayor seguridad'
-        })
+        steps.add(
+            step=4,
+            name='Aplicar OAEP Padding',
+            data='OAEP (Optimal Asymmetric Encryption Padding) con SHA-256',
+            type='info',
+            details='Añade aleatoriedad al cifrado para mayor seguridad'
+        )
         
         # Paso 5: Cifrar
         ciphertext = public_key.encrypt(
             plaintext_bytes,
             RSAService._get_oaep_padding()
         )
-        steps.append({
-            'step': 5,
-            'name': 'Cifrar con RSA',
-            'data': ciphertext.hex()[:64] + '...',
-            'type': 'hex',
-            'full_length': len(ciphertext)
-        })
+        steps.add(
+            step=5,
+            name='Cifrar con RSA',
+            data=ciphertext[:32].hex() + '...',
+            type='hex',
+            full_length=len(ciphertext)
+        )
         
         # Paso 6: Codificar en Base64
         ciphertext_b64 = base64.b64encode(ciphertext).decode('utf-8')
-        steps.append({
-            'step': 6,
-            'name': 'Codificar en Base64',
-            'data': ciphertext_b64,
-            'type': 'base64'
-        })
+        steps.add(
+            step=6,
+            name='Codificar en Base64',
+            data=steps.text(ciphertext_b64),
+            type='base64'
+        )
         
         return {
-            'steps': steps,
+            'steps': steps.steps,
             'result': {
                 'ciphertext': ciphertext_b64
             },
@@ -289,65 +661,76 @@ class RSAService:
         }
     
     @staticmethod
-    def sign_with_steps(message: str, private_key_pem: bytes) -> Dict[str, Any]:
+    @instrumented('RSA-PSS', 'sign_with_steps',
+                  from_result(lambda result: b64_bits(result['result']['signature'])))
+    def sign_with_steps(message: str, private_key_pem: bytes, trace: str = FULL,
+                        preview_bytes: int = DEFAULT_PREVIEW_BYTES) -> Dict[str, Any]:
         """
         Firma mostrando cada paso del proceso (para demostración).
         """
-        steps = []
+        return crypto_executor.run(
+            RSAService._sign_with_steps, message, private_key_pem, trace, preview_bytes,
+            name='rsa.sign_with_steps'
+        )
+    
+    @staticmethod
+    def _sign_with_steps(message: str, private_key_pem: bytes, trace: str = FULL,
+                         preview_bytes: int = DEFAULT_PREVIEW_BYTES) -> Dict[str, Any]:
+        """Firma con pasos en el proceso actual."""
+        steps = StepTrace(trace, preview_bytes)
         private_key = RSAService._load_private_key(private_key_pem)
         
         # Paso 1: Mensaje a firmar
-        steps.append({
-            'step': 1,
-            'name': 'Mensaje a firmar',
-            'data': message,
-            'type': 'text'
-        })
-        
-        # Paso 2: Calcular hash SHA-256
-        message_bytes = message.encode('utf-8')
-        import hashlib
-        message_hash = hashlib.sha256(message_bytes).hexdigest()
-        steps.append({
-            'step': 2,
-            'name': 'Calcular hash SHA-256',
-            'data': message_hash,
-            'type': 'hex'
-        })
+        steps.add(
+            step=1,
+            name='Mensaje a firmar',
+            data=steps.text(message),
+            type='text'
+        )
+        
+        # Paso 2: Calcular hash SHA-256 (se firma este digest, sin volver a hashear)
+        digest = RSAService.digest(message)
+        message_hash = digest.hex()
+        steps.add(
+            step=2,
+            name='Calcular hash SHA-256',
+            data=message_hash,
+            type='hex'
+        )
         
         # Paso 3: Aplicar PSS padding
-        steps.append({
-            'step': 3,
-            'name': 'Aplicar PSS Padding',
-            'data': 'PSS (Probabilistic Signature Scheme)',
-            'type': 'info',
-            'details': 'Añade sal aleatoria para firmas no determinísticas'
-        })
+        steps.add(
+            step=3,
+            name='Aplicar PSS Padding',
+            data='PSS (Probabilistic Signature Scheme)',
+            type='info',
+            details='Añade sal aleatoria para firmas no determinísticas'
+        )
         
         # Paso 4: Firmar con clave privada
         signature = private_key.sign(
-            message_bytes,
+            digest,
             RSAService._get_pss_padding(),
-            hashes.SHA256()
+            asym_utils.Prehashed(hashes.SHA256())
+        )
+        steps.add(
+            step=4,
+            name='Firmar con clave privada',
+            data=signature[:32].hex() + '...',
+            type='hex'
         )
-        steps.append({
-            'step': 4,
-            'name': 'Firmar con clave privada',
-            'data': signature.hex()[:64] + '...',
-            'type': 'hex'
-        })
         
         # Paso 5: Codificar en Base64
         signature_b64 = base64.b64encode(signature).decode('utf-8')
-        steps.append({
-            'step': 5,
-            'name': 'Codificar en Base64',
-            'data': signature_b64,
-            'type': 'base64'
-        })
+        steps.add(
+            step=5,
+            name='Codificar en Base64',
+            data=steps.text(signature_b64),
+            type='base64'
+        )
         
         return {
-            'steps': steps,
+            'steps': steps.steps,
             'result': {
                 'signature': signature_b64,
                 'message_hash': message_hash
@@ -364,3 +747,8 @@ class RSAService:
     def base64_to_pem(b64_data: str) -> bytes:
         """Convierte base64 a PEM."""
         return base64.b64decode(b64_data)
+
+
+# Pool compartido de pares pre-generados. El relleno ya corre en su
+# propio hilo: genera en él y no ocupa huecos del ejecutor criptográfico
+key_pool = KeyPool(RSAService.generate_key_pair, refill_generator=RSAService._generate_key_pair)
@@ -0,0 +1,66 @@
+"""
+Política de Trazas de Pasos
+===========================
+
+Controla cuánto detalle incluyen los métodos *_with_steps:
+
+- full: datos completos (comportamiento original de la demo)
+- truncated: vistas previas de hasta `limit` bytes
+- none: sin pasos; no se calcula ninguna representación intermedia
+
+Autor: Equipo P4 Seguridad
+"""
+
+import base64
+from typing import Any, Dict, List, Optional
+
+FULL = 'full'
+TRUNCATED = 'truncated'
+NONE = 'none'
+POLICIES = [FULL, TRUNCATED, NONE]
+
+DEFAULT_PREVIEW_BYTES = 64
+
+
+class StepTrace:
+    """Acumulador de pasos que respeta la política de traza."""
+
+    def __init__(self, policy: str = FULL, limit: int = DEFAULT_PREVIEW_BYTES):
+        if policy not in POLICIES:
+            raise ValueError(f"Trace policy must be one of {POLICIES}")
+        self.policy = policy
+        self.limit = limit
+        self.steps: List[Dict[str, Any]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy != NONE
+
+    def add(self, **step):
+        """Agrega un paso (no-op con la política 'none')."""
+        if self.enabled:
+            self.steps.append(step)
+
+    def hex(self, data: bytes) -> Optional[str]:
+        """Representación hexadecimal según la política."""
+        if not self.enabled:
+            return None
+        if self.policy == TRUNCATED and len(data) > self.limit:
+            return data[:self.limit].hex() + '...'
+        return data.hex()
+
+    def text(self, data: str) -> Optional[str]:
+        """Texto completo o recortado a `limit` caracteres."""
+        if not self.enabled:
+            return None
+        if self.policy == TRUNCATED and len(data) > self.limit:
+            return data[:self.limit] + '...'
+        return data
+
+    def b64(self, data: bytes) -> Optional[str]:
+        """Base64 completo o de los primeros bytes."""
+        if not self.enabled:
+            return None
+        if self.policy == TRUNCATED and len(data) > self.limit:
+            return base64.b64encode(data[:self.limit]).decode('utf-8') + '...'
+        return base64.b64encode(data).decode('utf-8')
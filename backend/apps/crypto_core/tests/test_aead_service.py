@@ -0,0 +1,135 @@
+"""
+Cifrado autenticado: AES-GCM y ChaCha20-Poly1305.
+"""
+import base64
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from rest_framework.test import APIClient
+
+from apps.crypto_core.services import AEADService, AESService
+
+ALGORITHMS = [
+    (AEADService.AES_GCM, 128),
+    (AEADService.AES_GCM, 192),
+    (AEADService.AES_GCM, 256),
+    (AEADService.CHACHA20_POLY1305, 256),
+]
+
+
+def _flip(data: bytes, index: int) -> bytes:
+    """Invierte un bit del byte `index`."""
+    data = bytearray(data)
+    data[index] ^= 0x01
+    return bytes(data)
+
+
+@pytest.mark.parametrize('algorithm,key_size', ALGORITHMS)
+@pytest.mark.parametrize('plaintext', ['', 'hola', 'ñandú ✓ ' * 100])
+def test_round_trip(algorithm, key_size, plaintext):
+    key = AESService.generate_key(key_size)
+
+    result = AEADService.encrypt(plaintext, key, algorithm, associated_data=b'cabecera')
+
+    sealed = base64.b64decode(result['ciphertext'])
+    assert len(base64.b64decode(result['iv'])) == AEADService.NONCE_SIZE
+    assert len(sealed) == len(plaintext.encode('utf-8')) + AEADService.TAG_SIZE
+    assert AEADService.decrypt(
+        result['ciphertext'], result['iv'], key, algorithm, associated_data=b'cabecera'
+    ) == plaintext
+
+
+@pytest.mark.parametrize('algorithm,key_size', ALGORITHMS)
+def test_encrypt_with_steps_round_trip(algorithm, key_size):
+    key = AESService.generate_key(key_size)
+
+    result = AEADService.encrypt_with_steps('mensaje', key, algorithm)['result']
+
+    assert AEADService.decrypt(result['ciphertext'], result['iv'], key, algorithm) == 'mensaje'
+
+
+@pytest.mark.parametrize('algorithm,key_size', ALGORITHMS)
+@pytest.mark.parametrize('position', [0, -AEADService.TAG_SIZE - 1, -AEADService.TAG_SIZE, -1],
+                         ids=['ciphertext-first', 'ciphertext-last', 'tag-first', 'tag-last'])
+def test_tampered_ciphertext_or_tag_raises(algorithm, key_size, position):
+    key = AESService.generate_key(key_size)
+    nonce, sealed = AEADService.encrypt_bytes(b'transferir 100', key, algorithm)
+
+    with pytest.raises(InvalidTag):
+        AEADService.decrypt_bytes(_flip(sealed, position), nonce, key, algorithm)
+
+
+@pytest.mark.parametrize('algorithm,key_size', ALGORITHMS)
+def test_tampered_nonce_or_key_raises(algorithm, key_size):
+    key = AESService.generate_key(key_size)
+    nonce, sealed = AEADService.encrypt_bytes(b'transferir 100', key, algorithm)
+
+    with pytest.raises(InvalidTag):
+        AEADService.decrypt_bytes(sealed, _flip(nonce, 0), key, algorithm)
+    with pytest.raises(InvalidTag):
+        AEADService.decrypt_bytes(sealed, nonce, _flip(key, 0), algorithm)
+
+
+@pytest.mark.parametrize('algorithm,key_size', ALGORITHMS)
+@pytest.mark.parametrize('associated_data', [b'otra cabecera', None], ids=['changed', 'missing'])
+def test_tampered_associated_data_raises(algorithm, key_size, associated_data):
+    key = AESService.generate_key(key_size)
+    nonce, sealed = AEADService.encrypt_bytes(b'transferir 100', key, algorithm, b'cabecera')
+
+    with pytest.raises(InvalidTag):
+        AEADService.decrypt_bytes(sealed, nonce, key, algorithm, associated_data)
+
+
+def test_chacha20_rejects_short_key():
+    with pytest.raises(ValueError):
+        AEADService.encrypt('hola', AESService.generate_key(128), AEADService.CHACHA20_POLY1305)
+
+
+def _encrypt_via_api(client, mode):
+    response = client.post('/api/crypto/aes/encrypt/',
+                           {'plaintext': 'hola', 'mode': mode}, format='json')
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('mode', ['GCM', 'CHACHA20-POLY1305'])
+def test_views_round_trip(mode):
+    client = APIClient()
+    encrypted = _encrypt_via_api(client, mode)
+
+    response = client.post('/api/crypto/aes/decrypt/', {
+        'ciphertext': encrypted['result']['ciphertext'],
+        'iv': encrypted['result']['iv'],
+        'key': encrypted['key'],
+        'mode': mode
+    }, format='json')
+
+    assert response.status_code == 200
+    assert response.json()['plaintext'] == 'hola'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('mode', ['GCM', 'CHACHA20-POLY1305'])
+@pytest.mark.parametrize('field', ['ciphertext', 'tag', 'key'])
+def test_decrypt_view_returns_400_on_tag_failure(mode, field):
+    client = APIClient()
+    encrypted = _encrypt_via_api(client, mode)
+    sealed = base64.b64decode(encrypted['result']['ciphertext'])
+    key = base64.b64decode(encrypted['key'])
+    if field == 'ciphertext':
+        sealed = _flip(sealed, 0)
+    elif field == 'tag':
+        sealed = _flip(sealed, -1)
+    else:
+        key = _flip(key, 0)
+
+    response = client.post('/api/crypto/aes/decrypt/', {
+        'ciphertext': base64.b64encode(sealed).decode(),
+        'iv': encrypted['result']['iv'],
+        'key': base64.b64encode(key).decode(),
+        'mode': mode
+    }, format='json')
+
+    assert response.status_code == 400
+    assert 'Autenticación fallida' in response.json()['error']
@@ -0,0 +1,55 @@
+"""
+Cuerpo de las vistas async: mismos parsers que las vistas @api_view.
+"""
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+
+from apps.crypto_core import async_views
+
+
+def _encrypt(request):
+    response = async_to_sync(async_views.aes_encrypt)(request)
+    return response.status_code, json.loads(response.content)
+
+
+@pytest.mark.parametrize('content_type', [
+    'application/json',
+    'application/x-www-form-urlencoded',
+    'multipart/form-data',
+])
+def test_body_formats(content_type):
+    factory = RequestFactory()
+    body = {'plaintext': 'hola', 'trace': 'none'}
+    if content_type == 'multipart/form-data':
+        request = factory.post('/api/crypto/aes/encrypt/', body)
+    elif content_type == 'application/json':
+        request = factory.post('/api/crypto/aes/encrypt/', json.dumps(body), content_type=content_type)
+    else:
+        request = factory.post('/api/crypto/aes/encrypt/', 'plaintext=hola&trace=none',
+                               content_type=content_type)
+
+    status_code, data = _encrypt(request)
+
+    assert status_code == 200, data
+    assert data['result']['ciphertext']
+
+
+def test_malformed_json_is_a_parse_error():
+    request = RequestFactory().post('/api/crypto/aes/encrypt/', '{"plaintext":',
+                                    content_type='application/json')
+
+    status_code, data = _encrypt(request)
+
+    assert status_code == 400
+    assert 'JSON parse error' in data['detail']
+
+
+def test_unsupported_media_type():
+    request = RequestFactory().post('/api/crypto/aes/encrypt/', 'hola', content_type='text/plain')
+
+    status_code, _ = _encrypt(request)
+
+    assert status_code == 415
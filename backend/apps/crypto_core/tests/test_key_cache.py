@@ -0,0 +1,130 @@
+"""
+Caché LRU/TTL de claves parseadas.
+"""
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from apps.crypto_core.services import RSAService
+from apps.crypto_core.services.key_cache import KeyCache, key_cache
+from apps.users.models import User
+
+# El paquete services exporta la instancia key_cache con el nombre del módulo
+key_cache_module = importlib.import_module('apps.crypto_core.services.key_cache')
+
+
+class Loader:
+    """Loader que cuenta cuántas veces se parsea cada PEM."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, pem):
+        self.calls.append(pem)
+        return ('key', pem)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(key_cache_module, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_hit_returns_cached_object():
+    cache, loader = KeyCache(max_size=4), Loader()
+
+    first = cache.get_or_load('public', b'a', loader)
+
+    assert cache.get_or_load('public', b'a', loader) is first
+    assert loader.calls == [b'a']
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_lru_eviction_at_max_size():
+    cache, loader = KeyCache(max_size=2), Loader()
+    cache.get_or_load('public', b'a', loader)
+    cache.get_or_load('public', b'b', loader)
+    cache.get_or_load('public', b'a', loader)  # 'b' pasa a ser la menos usada
+
+    cache.get_or_load('public', b'c', loader)
+
+    assert cache.stats()['size'] == 2
+    assert cache.stats()['evictions'] == 1
+    cache.get_or_load('public', b'a', loader)
+    cache.get_or_load('public', b'b', loader)
+    assert loader.calls == [b'a', b'b', b'c', b'b']
+
+
+def test_ttl_expiry(clock):
+    cache, loader = KeyCache(max_size=4, ttl=60), Loader()
+    cache.get_or_load('public', b'a', loader)
+
+    clock.value += 59
+    cache.get_or_load('public', b'a', loader)
+    clock.value += 2
+    cache.get_or_load('public', b'a', loader)
+
+    assert loader.calls == [b'a', b'a']
+
+
+def test_configure_shrinks_and_zero_size_disables():
+    cache, loader = KeyCache(max_size=4), Loader()
+    for pem in (b'a', b'b', b'c'):
+        cache.get_or_load('public', pem, loader)
+
+    cache.configure(max_size=1)
+    assert cache.stats()['size'] == 1
+
+    cache.configure(max_size=0)
+    cache.get_or_load('public', b'd', loader)
+    cache.get_or_load('public', b'd', loader)
+    assert loader.calls[-2:] == [b'd', b'd']
+
+
+def test_invalidate_drops_public_and_private_entries():
+    cache, loader = KeyCache(max_size=8), Loader()
+    cache.get_or_load('public', b'a', loader)
+    cache.get_or_load('private', b'a', loader)
+    cache.get_or_load('public', b'b', loader)
+
+    cache.invalidate(b'a', None)
+
+    assert cache.stats()['size'] == 1
+    cache.get_or_load('private', b'a', loader)
+    cache.get_or_load('public', b'b', loader)
+    assert loader.calls == [b'a', b'a', b'b', b'a']
+
+
+def test_invalidate_kind_only_drops_that_kind():
+    cache, loader = KeyCache(max_size=8), Loader()
+    cache.get_or_load('signature:1', b'a', loader)
+    cache.get_or_load('signature:1', b'b', loader)
+    cache.get_or_load('signature:10', b'a', loader)
+    cache.get_or_load('public', b'a', loader)
+
+    cache.invalidate_kind('signature:1')
+
+    assert cache.stats()['size'] == 2
+    loaded = len(loader.calls)
+    cache.get_or_load('signature:10', b'a', loader)  # otro prefijo: sigue en caché
+    assert len(loader.calls) == loaded
+    cache.get_or_load('signature:1', b'a', loader)
+    assert len(loader.calls) == loaded + 1
+
+
+@pytest.mark.django_db
+def test_generate_keys_evicts_the_old_pair():
+    user = User.objects.create_user(username='kc', email='kc@example.com', password='s3cret-pass')
+    user.generate_keys(2048)
+    old_public, old_private = user.get_public_key_bytes(), user.get_private_key_bytes()
+    RSAService._load_public_key(old_public)
+    RSAService._load_private_key(old_private)
+
+    user.generate_keys(2048)
+
+    loader = Loader()
+    key_cache.get_or_load('public', old_public, loader)
+    key_cache.get_or_load('private', old_private, loader)
+    assert loader.calls == [old_public, old_private]
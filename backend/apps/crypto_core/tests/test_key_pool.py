@@ -0,0 +1,84 @@
+"""
+Pool de pares de claves RSA pre-generados.
+"""
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from apps.crypto_core.services.key_pool import KeyPool
+
+
+def _fake_generator(prefix):
+    counter = itertools.count()
+    return lambda size: (f'{prefix}-priv-{size}-{next(counter)}'.encode(), b'pub')
+
+
+def _wait_for_depth(pool, size, depth, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while pool.stats()['pools'][size]['depth'] < depth:
+        assert time.monotonic() < deadline, pool.stats()
+        time.sleep(0.01)
+
+
+def test_setup_does_not_start_the_refill_thread():
+    script = (
+        'import threading, django; django.setup(); '
+        'print(",".join(thread.name for thread in threading.enumerate()))'
+    )
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='config.settings', CRYPTO_KEY_POOL_ENABLED='True')
+    result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+
+    assert 'rsa-key-pool' not in result.stdout.strip().split(',')
+
+
+def test_acquire_hits_the_pool():
+    pool = KeyPool(_fake_generator('inline'), targets={1024: 2},
+                   refill_generator=_fake_generator('pool'))
+    pool.start()
+    try:
+        _wait_for_depth(pool, 1024, 2)
+
+        private_pem, _ = pool.acquire(1024)
+
+        assert private_pem.startswith(b'pool-')
+        stats = pool.stats()['pools'][1024]
+        assert (stats['hits'], stats['misses']) == (1, 0)
+    finally:
+        pool.stop(timeout=1)
+
+
+def test_empty_pool_generates_inline_and_starts_refill():
+    release = threading.Event()
+
+    def slow_refill(size):
+        release.wait(5)
+        return b'pool-priv', b'pub'
+
+    pool = KeyPool(_fake_generator('inline'), targets={1024: 1}, refill_generator=slow_refill)
+    try:
+        private_pem, _ = pool.acquire(1024)
+
+        assert private_pem.startswith(b'inline-')
+        stats = pool.stats()
+        assert stats['pools'][1024]['misses'] == 1
+        assert stats['running']
+    finally:
+        release.set()
+        pool.stop(timeout=1)
+
+
+def test_disabled_pool_and_unknown_size_generate_inline():
+    pool = KeyPool(_fake_generator('inline'), targets={1024: 1}, enabled=False)
+
+    assert pool.acquire(1024)[0].startswith(b'inline-')
+    assert not pool.stats()['running']
+
+    pool.configure(enabled=True)
+    assert pool.acquire(2048)[0].startswith(b'inline-')
+    assert not pool.stats()['running']
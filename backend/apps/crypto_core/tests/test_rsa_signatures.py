@@ -0,0 +1,129 @@
+"""
+Equivalencia entre firma de mensaje, de digest (Prehashed) y por bloques.
+
+PSS usa sal aleatoria: dos firmas del mismo mensaje no coinciden byte a
+byte, así que la equivalencia se comprueba verificando cada firma por
+el otro camino.
+"""
+import hashlib
+import io
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.crypto_core.services import RSAService
+
+MESSAGE = 'Transferencia de 100 € a la cuenta 42 ✓'
+
+
+@pytest.fixture(scope='module')
+def key_pair():
+    return RSAService._generate_key_pair(2048)
+
+
+@pytest.fixture(scope='module')
+def other_key_pair():
+    return RSAService._generate_key_pair(2048)
+
+
+def _digest(message=MESSAGE):
+    return hashlib.sha256(message.encode('utf-8')).digest()
+
+
+def test_digest_accepts_every_input_form():
+    data = MESSAGE.encode('utf-8')
+    chunks = [data[i:i + 5] for i in range(0, len(data), 5)]
+
+    assert RSAService.digest(MESSAGE) == _digest()
+    assert RSAService.digest(data) == _digest()
+    assert RSAService.digest(iter(chunks)) == _digest()
+    assert RSAService.digest(io.BytesIO(data), chunk_size=3) == _digest()
+
+
+def test_prehashed_signature_verifies_with_verify(key_pair):
+    private_pem, public_pem = key_pair
+
+    signed = RSAService.sign_digest(_digest(), private_pem)
+
+    assert signed['message_hash'] == _digest().hex()
+    assert RSAService.verify(MESSAGE, signed['signature'], public_pem)['valid']
+    assert not RSAService.verify(MESSAGE + '.', signed['signature'], public_pem)['valid']
+
+
+def test_message_signature_verifies_with_verify_digest(key_pair):
+    private_pem, public_pem = key_pair
+
+    signature = RSAService.sign(MESSAGE, private_pem)['signature']
+
+    assert RSAService.verify_digest(_digest(), signature, public_pem)['valid']
+    assert not RSAService.verify_digest(_digest('otro'), signature, public_pem)['valid']
+
+
+@pytest.mark.parametrize('stream', [
+    MESSAGE,
+    MESSAGE.encode('utf-8'),
+    io.BytesIO(MESSAGE.encode('utf-8')),
+    [MESSAGE.encode('utf-8')[:7], MESSAGE.encode('utf-8')[7:]],
+], ids=['str', 'bytes', 'file', 'chunks'])
+def test_stream_signature_matches_one_shot(key_pair, stream):
+    private_pem, public_pem = key_pair
+    one_shot = RSAService.sign(MESSAGE, private_pem)['signature']
+
+    streamed = RSAService.sign_stream(stream, private_pem)
+
+    assert streamed['message_hash'] == _digest().hex()
+    # Ambas firmas valen para el mismo mensaje por cualquiera de los caminos
+    for signature in (one_shot, streamed['signature']):
+        assert RSAService.verify(MESSAGE, signature, public_pem)['valid']
+        assert RSAService.verify_stream(io.BytesIO(MESSAGE.encode('utf-8')),
+                                        signature, public_pem)['valid']
+
+
+def test_sign_with_steps_verifies_with_verify(key_pair):
+    private_pem, public_pem = key_pair
+
+    result = RSAService.sign_with_steps(MESSAGE, private_pem)['result']
+
+    assert result['message_hash'] == _digest().hex()
+    assert RSAService.verify(MESSAGE, result['signature'], public_pem)['valid']
+    assert RSAService.verify_digest(_digest(), result['signature'], public_pem)['valid']
+
+
+def test_wrong_key_is_rejected_on_both_paths(key_pair, other_key_pair):
+    signature = RSAService.sign_digest(_digest(), key_pair[0])['signature']
+    other_public = other_key_pair[1]
+
+    assert not RSAService.verify(MESSAGE, signature, other_public)['valid']
+    assert not RSAService.verify_digest(_digest(), signature, other_public)['valid']
+
+
+@pytest.mark.parametrize('digest', [b'', b'\x00' * 31, b'\x00' * 64])
+def test_digest_must_be_sha256_sized(key_pair, digest):
+    private_pem, public_pem = key_pair
+
+    with pytest.raises(ValueError):
+        RSAService.sign_digest(digest, private_pem)
+    with pytest.raises(ValueError):
+        RSAService.verify_digest(digest, 'AAAA', public_pem)
+
+
+@pytest.mark.django_db
+def test_api_digest_and_message_paths_are_interchangeable(key_pair):
+    private_pem, public_pem = key_pair
+    client = APIClient()
+
+    def sign(**body):
+        response = client.post('/api/crypto/rsa/sign/',
+                               dict(body, private_key=private_pem.decode()), format='json')
+        assert response.status_code == 200
+        return response.json()['result']['signature']
+
+    def verify(signature, **body):
+        response = client.post('/api/crypto/rsa/verify/', dict(
+            body, signature=signature, public_key=public_pem.decode()
+        ), format='json')
+        assert response.status_code == 200
+        return response.json()['valid']
+
+    assert verify(sign(digest=_digest().hex()), message=MESSAGE)
+    assert verify(sign(message=MESSAGE), digest=_digest().hex())
@@ -0,0 +1,105 @@
+"""
+Verificación de firmas por lotes.
+"""
+import base64
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.crypto_core.services import RSAService
+from apps.crypto_core.services.key_cache import key_cache
+
+
+@pytest.fixture(scope='module')
+def key_pairs():
+    return [RSAService._generate_key_pair(2048) for _ in range(2)]
+
+
+def _item(message, private_pem, public_pem):
+    return {
+        'message': message,
+        'signature': RSAService.sign(message, private_pem)['signature'],
+        'public_key': public_pem
+    }
+
+
+@pytest.fixture
+def mixed_items(key_pairs):
+    (priv_a, pub_a), (priv_b, pub_b) = key_pairs
+    tampered = _item('original', priv_b, pub_b)
+    tampered['message'] = 'alterado'
+    return [
+        _item('uno', priv_a, pub_a),
+        tampered,
+        dict(_item('tres', priv_a, pub_a), public_key=b'no es un PEM'),
+        _item('cuatro', priv_b, pub_b),
+        dict(_item('cinco', priv_a, pub_a), signature='%%%'),
+        _item('seis', priv_a, pub_a),
+    ]
+
+
+@pytest.mark.parametrize('max_workers', [1, 3, None])
+def test_mixed_results_in_input_order(mixed_items, max_workers):
+    results = RSAService.verify_batch(mixed_items, max_workers=max_workers)
+
+    assert [r['index'] for r in results] == list(range(len(mixed_items)))
+    assert [r['valid'] for r in results] == [True, False, False, True, False, True]
+    # Firma que no coincide: inválida sin error; clave rota: con error
+    assert results[1]['error'] is None
+    assert 'PEM' in results[2]['error']
+
+
+def test_without_cache_leaves_key_cache_untouched(mixed_items):
+    key_cache.clear()
+
+    results = RSAService.verify_batch(mixed_items, use_cache=False)
+
+    assert sum(r['valid'] for r in results) == 3
+    stats = key_cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses']) == (0, 0, 0)
+
+
+def test_with_cache_parses_each_key_once(mixed_items):
+    key_cache.clear()
+
+    RSAService.verify_batch(mixed_items, max_workers=1)
+
+    assert key_cache.stats()['size'] == 2
+
+
+def _post(items):
+    return APIClient().post('/api/crypto/rsa/verify/batch/', {'items': items}, format='json')
+
+
+@pytest.mark.django_db
+def test_view_verifies_pem_and_base64_keys(key_pairs):
+    private_pem, public_pem = key_pairs[0]
+    items = [
+        dict(_item('hola', private_pem, public_pem), public_key=public_pem.decode()),
+        dict(_item('hola', private_pem, public_pem),
+             public_key=base64.b64encode(public_pem).decode()),
+    ]
+
+    response = _post(items)
+
+    assert response.status_code == 200, response.data
+    assert response.data['valid'] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('field, value', [
+    ('message', {'no': 'texto'}),
+    ('message', ['lista']),
+    ('message', 'x' * 10001),
+    ('signature', 'A' * 1000),
+    ('public_key', 'B' * 5000),
+])
+def test_view_rejects_malformed_items(key_pairs, field, value):
+    private_pem, public_pem = key_pairs[0]
+    item = dict(_item('hola', private_pem, public_pem), public_key=public_pem.decode())
+    item[field] = value
+
+    response = _post([item])
+
+    assert response.status_code == 400
+    assert field in response.data['items'][0]
@@ -1,22 +1,33 @@
 """
 URLs para crypto_core app.
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'crypto_core'
 
+# Bajo ASGI (API_ASYNC_VIEWS) las operaciones AES/RSA usan las vistas async
+hot = async_views if settings.API_ASYNC_VIEWS else views
+
 urlpatterns = [
     # Generación de claves
     path('keys/generate/', views.generate_keys, name='generate-keys'),
+    path('keys/pool/', views.key_pool_stats, name='key-pool-stats'),
+    path('executor/', views.executor_stats, name='executor-stats'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('profiles/', views.profile_list, name='profile-list'),
+    path('profiles/<str:profile_id>/', views.profile_download, name='profile-download'),
     
     # AES
-    path('aes/encrypt/', views.aes_encrypt, name='aes-encrypt'),
-    path('aes/decrypt/', views.aes_decrypt, name='aes-decrypt'),
+    path('aes/encrypt/', hot.aes_encrypt, name='aes-encrypt'),
+    path('aes/decrypt/', hot.aes_decrypt, name='aes-decrypt'),
+    path('aes/batch/', views.aes_batch, name='aes-batch'),
     
     # RSA
-    path('rsa/encrypt/', views.rsa_encrypt, name='rsa-encrypt'),
-    path('rsa/decrypt/', views.rsa_decrypt, name='rsa-decrypt'),
-    path('rsa/sign/', views.rsa_sign, name='rsa-sign'),
-    path('rsa/verify/', views.rsa_verify, name='rsa-verify'),
+    path('rsa/encrypt/', hot.rsa_encrypt, name='rsa-encrypt'),
+    path('rsa/decrypt/', hot.rsa_decrypt, name='rsa-decrypt'),
+    path('rsa/sign/', hot.rsa_sign, name='rsa-sign'),
+    path('rsa/verify/', hot.rsa_verify, name='rsa-verify'),
+    path('rsa/verify/batch/', views.rsa_verify_batch, name='rsa-verify-batch'),
 ]
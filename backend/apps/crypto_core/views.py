@@ -1,20 +1,36 @@
 """
 Views para operaciones criptográficas de demostración.
 """
+import hmac
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from cryptography.exceptions import InvalidTag
 
-from .services import AESService, RSAService
+from .services import AESService, AEADService, BatchService, RSAService
+from .services.metrics import metrics
+from .services.profiler import profile_store
 from .serializers import (
-    AESEncryptSerializer, AESDecryptSerializer,
+    AESEncryptSerializer, AESDecryptSerializer, AESBatchSerializer,
     RSAEncryptSerializer, RSADecryptSerializer,
-    RSASignSerializer, RSAVerifySerializer,
+    RSASignSerializer, RSAVerifySerializer, RSAVerifyBatchSerializer,
     GenerateKeySerializer
 )
 
 
+def _aead_algorithm(mode):
+    """Traduce el modo del API al algoritmo de AEADService."""
+    return AEADService.AES_GCM if mode == 'GCM' else AEADService.CHACHA20_POLY1305
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def generate_keys(request):
@@ -43,7 +59,7 @@ def generate_keys(request):
                 'key': AESService.key_to_base64(key)
             })
         else:
-            private_pem, public_pem = RSAService.generate_key_pair(key_size)
+            private_pem, public_pem = RSAService.acquire_key_pair(key_size)
             return Response({
                 'algorithm': 'RSA',
                 'key_size': key_size,
@@ -54,21 +70,115 @@ def generate_keys(request):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def key_pool_stats(request):
+    """
+    Métricas del pool de claves RSA pre-generadas (solo admin).
+    
+    GET /api/crypto/keys/pool/
+    """
+    return Response(RSAService.key_pool_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def executor_stats(request):
+    """
+    Tiempos de cola y ejecución del ejecutor criptográfico (solo admin).
+    
+    GET /api/crypto/executor/
+    """
+    return Response(RSAService.executor_stats())
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Métricas en formato de texto de Prometheus.
+    
+    Requiere el token METRICS_TOKEN (Authorization: Bearer <token>) o,
+    si no está configurado, el JWT de un usuario admin. Es una vista
+    Django simple para que el scrape no pase por throttling ni por la
+    negociación de contenido de DRF.
+    
+    GET /api/crypto/metrics/
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        provided = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        allowed = hmac.compare_digest(provided.encode('utf-8'), token.encode('utf-8'))
+    else:
+        try:
+            auth = JWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            auth = None
+        allowed = auth is not None and auth[0].is_staff
+    if not allowed:
+        return HttpResponseForbidden('No autorizado')
+    
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_list(request):
+    """
+    Perfiles cProfile capturados, del más reciente al más antiguo (solo admin).
+    
+    GET /api/crypto/profiles/
+    """
+    return Response({
+        'enabled': settings.PROFILING_ENABLED,
+        'max_entries': profile_store.max_entries,
+        'profiles': profile_store.list()
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_download(request, profile_id):
+    """
+    Descarga un perfil en formato pstats (solo admin).
+    
+    GET /api/crypto/profiles/<id>/
+    """
+    try:
+        path = profile_store.path(profile_id)
+    except ValueError:
+        path = None
+    if path is None:
+        raise Http404('Perfil no encontrado')
+    return FileResponse(open(path, 'rb'), as_attachment=True,
+                        filename=f'{profile_id}.prof',
+                        content_type='application/octet-stream')
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def aes_encrypt(request):
     """
-    Cifra con AES-CBC mostrando pasos.
+    Cifra con AES-CBC, AES-GCM o ChaCha20-Poly1305 mostrando pasos.
     
     POST /api/crypto/aes/encrypt/
+    {
+        "plaintext": "...",
+        "key_size": 256,
+        "mode": "CBC" | "GCM" | "CHACHA20-POLY1305"
+    }
     """
     serializer = AESEncryptSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    plaintext = serializer.validated_data['plaintext']
-    key_size = serializer.validated_data['key_size']
-    key_b64 = serializer.validated_data.get('key')
+    return Response(*_aes_encrypt(serializer.validated_data))
+
+
+def _aes_encrypt(data):
+    """Cuerpo de aes_encrypt; retorna (datos, status)."""
+    plaintext = data['plaintext']
+    key_size = data['key_size']
+    key_b64 = data.get('key')
+    mode = data['mode']
     
     try:
         if key_b64:
@@ -76,40 +186,110 @@ def aes_encrypt(request):
         else:
             key = AESService.generate_key(key_size)
         
-        result = AESService.encrypt_with_steps(plaintext, key)
+        trace = data['trace']
+        preview_bytes = settings.CRYPTO_TRACE_PREVIEW_BYTES
+        if mode == 'CBC':
+            result = AESService.encrypt_with_steps(
+                plaintext, key, trace=trace, preview_bytes=preview_bytes
+            )
+        else:
+            result = AEADService.encrypt_with_steps(
+                plaintext, key, _aead_algorithm(mode),
+                trace=trace, preview_bytes=preview_bytes
+            )
+        result['mode'] = mode
         result['key'] = AESService.key_to_base64(key)
         
-        return Response(result)
+        return result, status.HTTP_200_OK
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def aes_decrypt(request):
     """
-    Descifra con AES-CBC.
+    Descifra con AES-CBC, AES-GCM o ChaCha20-Poly1305.
     
     POST /api/crypto/aes/decrypt/
     """
     serializer = AESDecryptSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(*_aes_decrypt(serializer.validated_data))
+
+
+def _aes_decrypt(data):
+    """Cuerpo de aes_decrypt; retorna (datos, status)."""
+    mode = data['mode']
     
     try:
-        key = AESService.key_from_base64(serializer.validated_data['key'])
-        plaintext = AESService.decrypt(
-            serializer.validated_data['ciphertext'],
-            serializer.validated_data['iv'],
-            key
-        )
+        key = AESService.key_from_base64(data['key'])
+        if mode == 'CBC':
+            plaintext = AESService.decrypt(data['ciphertext'], data['iv'], key)
+            algorithm = 'AES-CBC'
+        else:
+            algorithm = _aead_algorithm(mode)
+            plaintext = AEADService.decrypt(data['ciphertext'], data['iv'], key, algorithm)
         
-        return Response({
+        return {
             'plaintext': plaintext,
-            'algorithm': 'AES-CBC'
-        })
+            'algorithm': algorithm
+        }, status.HTTP_200_OK
+    except InvalidTag:
+        return (
+            {'error': 'Autenticación fallida: el mensaje fue manipulado o la clave es incorrecta'},
+            status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def aes_batch(request):
+    """
+    Cifra/descifra muchos elementos AES en una sola petición (sin pasos).
+    
+    POST /api/crypto/aes/batch/
+    {
+        "mode": "CBC" | "GCM" | "CHACHA20-POLY1305",
+        "key": "<base64>",            (opcional, compartida)
+        "items": [
+            {"op": "encrypt", "plaintext": "..."},
+            {"op": "decrypt", "ciphertext": "...", "iv": "...", "key": "..."}
+        ]
+    }
+    """
+    serializer = AESBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    items = data['items']
+    
+    try:
+        if data.get('key'):
+            key = AESService.key_from_base64(data['key'])
+        elif any(item.get('op', 'encrypt') == 'encrypt' and not item.get('key') for item in items):
+            key = AESService.generate_key(data['key_size'])
+        else:
+            key = None
+        
+        results = BatchService.aes_batch(items, key, data['mode'])
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    response_data = {
+        'mode': data['mode'],
+        'count': len(results),
+        'errors': sum(1 for r in results if r['error']),
+        'results': results
+    }
+    if key is not None and not data.get('key'):
+        response_data['key'] = AESService.key_to_base64(key)
+    
+    return Response(response_data)
 
 
 @api_view(['POST'])
@@ -123,9 +303,13 @@ def rsa_encrypt(request):
     serializer = RSAEncryptSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+    return Response(*_rsa_encrypt(serializer.validated_data))
+
+
+def _rsa_encrypt(data):
+    """Cuerpo de rsa_encrypt; retorna (datos, status)."""
     try:
-        public_key = serializer.validated_data['public_key']
+        public_key = data['public_key']
         
         # Handle both PEM and base64 formats
         if not public_key.startswith('-----BEGIN'):
@@ -134,13 +318,15 @@ def rsa_encrypt(request):
             public_key = public_key.encode('utf-8')
         
         result = RSAService.encrypt_with_steps(
-            serializer.validated_data['plaintext'],
-            public_key
+            data['plaintext'],
+            public_key,
+            trace=data['trace'],
+            preview_bytes=settings.CRYPTO_TRACE_PREVIEW_BYTES
         )
         
-        return Response(result)
+        return result, status.HTTP_200_OK
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
 
 
 @api_view(['POST'])
@@ -154,26 +340,27 @@ def rsa_decrypt(request):
     serializer = RSADecryptSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+    return Response(*_rsa_decrypt(serializer.validated_data))
+
+
+def _rsa_decrypt(data):
+    """Cuerpo de rsa_decrypt; retorna (datos, status)."""
     try:
-        private_key = serializer.validated_data['private_key']
+        private_key = data['private_key']
         
         if not private_key.startswith('-----BEGIN'):
             private_key = RSAService.base64_to_pem(private_key)
         else:
             private_key = private_key.encode('utf-8')
         
-        plaintext = RSAService.decrypt(
-            serializer.validated_data['ciphertext'],
-            private_key
-        )
+        plaintext = RSAService.decrypt(data['ciphertext'], private_key)
         
-        return Response({
+        return {
             'plaintext': plaintext,
             'algorithm': 'RSA-OAEP'
-        })
+        }, status.HTTP_200_OK
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
 
 
 @api_view(['POST'])
@@ -183,27 +370,50 @@ def rsa_sign(request):
     Firma un mensaje con RSA mostrando pasos.
     
     POST /api/crypto/rsa/sign/
+    {
+        "message": "..." | "digest": "<sha256 en hex>",
+        "private_key": "..."
+    }
+    
+    Con digest se firma el hash directamente (sin pasos de traza).
     """
     serializer = RSASignSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+    return Response(*_rsa_sign(serializer.validated_data))
+
+
+def _rsa_sign(data):
+    """Cuerpo de rsa_sign; retorna (datos, status)."""
     try:
-        private_key = serializer.validated_data['private_key']
+        private_key = data['private_key']
         
         if not private_key.startswith('-----BEGIN'):
             private_key = RSAService.base64_to_pem(private_key)
         else:
             private_key = private_key.encode('utf-8')
         
+        if 'digest' in data:
+            signed = RSAService.sign_digest(data['digest'], private_key)
+            return {
+                'steps': [],
+                'result': {
+                    'signature': signed['signature'],
+                    'message_hash': signed['message_hash']
+                },
+                'algorithm': 'RSA-PSS-SHA256'
+            }, status.HTTP_200_OK
+        
         result = RSAService.sign_with_steps(
-            serializer.validated_data['message'],
-            private_key
+            data['message'],
+            private_key,
+            trace=data['trace'],
+            preview_bytes=settings.CRYPTO_TRACE_PREVIEW_BYTES
         )
         
-        return Response(result)
+        return result, status.HTTP_200_OK
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
 
 
 @api_view(['POST'])
@@ -213,25 +423,83 @@ def rsa_verify(request):
     Verifica una firma digital.
     
     POST /api/crypto/rsa/verify/
+    {
+        "message": "..." | "digest": "<sha256 en hex>",
+        "signature": "...",
+        "public_key": "..."
+    }
     """
     serializer = RSAVerifySerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
+    return Response(*_rsa_verify(serializer.validated_data))
+
+
+def _rsa_verify(data):
+    """Cuerpo de rsa_verify; retorna (datos, status)."""
     try:
-        public_key = serializer.validated_data['public_key']
+        public_key = data['public_key']
         
         if not public_key.startswith('-----BEGIN'):
             public_key = RSAService.base64_to_pem(public_key)
         else:
             public_key = public_key.encode('utf-8')
         
-        result = RSAService.verify(
-            serializer.validated_data['message'],
-            serializer.validated_data['signature'],
-            public_key
-        )
+        if 'digest' in data:
+            result = RSAService.verify_digest(data['digest'], data['signature'], public_key)
+        else:
+            result = RSAService.verify(data['message'], data['signature'], public_key)
         
-        return Response(result)
+        return result, status.HTTP_200_OK
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def rsa_verify_batch(request):
+    """
+    Verifica muchas firmas digitales en paralelo.
+    
+    Abierto a usuarios anónimos, pero entonces las claves se parsean
+    por lote sin usar la caché compartida.
+    
+    POST /api/crypto/rsa/verify/batch/
+    {
+        "items": [
+            {"message": "...", "signature": "...", "public_key": "..."}
+        ]
+    }
+    """
+    serializer = RSAVerifyBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    items = []
+    for item in serializer.validated_data['items']:
+        public_key = item['public_key']
+        
+        if not public_key.startswith('-----BEGIN'):
+            try:
+                public_key = RSAService.base64_to_pem(public_key)
+            except ValueError:
+                # Se reporta como error del elemento al parsear la clave
+                public_key = public_key.encode('utf-8')
+        else:
+            public_key = public_key.encode('utf-8')
+        
+        items.append({
+            'message': item['message'],
+            'signature': item['signature'],
+            'public_key': public_key
+        })
+    
+    # Los lotes anónimos no pasan por la caché de claves: no pueden
+    # expulsar las claves de los usuarios
+    results = RSAService.verify_batch(items, use_cache=request.user.is_authenticated)
+    
+    return Response({
+        'count': len(results),
+        'valid': sum(1 for r in results if r['valid']),
+        'results': results
+    })
@@ -5,3 +5,26 @@ class MessagingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.messaging'
     verbose_name = 'Messaging'
+
+    def ready(self):
+        from django.conf import settings
+        from apps.crypto_core.services.metrics import metrics, cache_collector
+        from .session_keys import session_key_cache
+        from .signatures import signature_cache
+        from .events import event_bus
+        from . import signals  # noqa: F401 (registra los receptores)
+
+        session_key_cache.configure(
+            max_size=getattr(settings, 'MESSAGING_SESSION_KEY_CACHE_SIZE', None),
+            ttl=getattr(settings, 'MESSAGING_SESSION_KEY_TTL', None)
+        )
+        signature_cache.configure(
+            max_size=getattr(settings, 'MESSAGING_SIGNATURE_CACHE_SIZE', None),
+            ttl=getattr(settings, 'MESSAGING_SIGNATURE_CACHE_TTL', None)
+        )
+        event_bus.configure(
+            enabled=getattr(settings, 'MESSAGING_EVENTS_ENABLED', None),
+            buffer_size=getattr(settings, 'MESSAGING_EVENT_BUFFER', None)
+        )
+        metrics.add_collector(cache_collector('session_keys', session_key_cache.stats))
+        metrics.add_collector(cache_collector('signatures', signature_cache.stats))
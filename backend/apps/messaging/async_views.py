@@ -0,0 +1,111 @@
+"""
+Versiones async de las vistas de mensajería más usadas (despliegue ASGI).
+
+Las lecturas van por el ORM async y el descifrado se espera en el
+ejecutor criptográfico, de modo que una petición no retiene un hilo
+mientras espera a la BD o a RSA, y un stream SSE abierto solo cuesta un
+future en el canal del usuario. El envío crea el mensaje dentro de una
+transacción, que el ORM async no admite: se ejecuta entero con
+sync_to_async, en el hilo de la petición.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import status
+
+from apps.crypto_core.async_api import async_api_view, json_response, validated
+from apps.crypto_core.pagination import akeyset_page
+from apps.crypto_core.services import crypto_executor
+from apps.users.models import User
+from .events import event_bus
+from .models import Message, UnreadCounter
+from .serializers import MessageListSerializer, MessagePageQuerySerializer, SendMessageSerializer
+from .views import (
+    PAGE_ORDER, STREAM_AUTHENTICATION, _decrypt, _list_queryset, _send, _sse,
+    _stream_last_id, _stream_response, _stream_start
+)
+
+
+def _page(request):
+    params = validated(MessagePageQuerySerializer, request.query_params)
+    return params.get('cursor'), params.get('limit', settings.MESSAGING_PAGE_SIZE)
+
+
+@async_api_view(['GET'])
+async def inbox(request):
+    """GET /api/messages/inbox/ (ver views.inbox)."""
+    messages, next_cursor = await akeyset_page(
+        _list_queryset(recipient=request.user), PAGE_ORDER, *_page(request), descending=True
+    )
+
+    return json_response({
+        'messages': MessageListSerializer(messages, many=True).data,
+        'unread_count': await UnreadCounter.aget(request.user.pk),
+        'next_cursor': next_cursor
+    })
+
+
+@async_api_view(['GET'])
+async def sent(request):
+    """GET /api/messages/sent/ (ver views.sent)."""
+    messages, next_cursor = await akeyset_page(
+        _list_queryset(sender=request.user), PAGE_ORDER, *_page(request), descending=True
+    )
+
+    return json_response({
+        'messages': MessageListSerializer(messages, many=True).data,
+        'next_cursor': next_cursor
+    })
+
+
+@async_api_view(['POST'])
+async def send_message(request):
+    """POST /api/messages/send/ (ver views.send_message)."""
+    data = validated(SendMessageSerializer, request.data)
+
+    recipient = await User.objects.filter(username=data['recipient_username']).afirst()
+    if recipient is None:
+        return json_response({'error': 'Destinatario no encontrado'}, status.HTTP_404_NOT_FOUND)
+
+    return json_response(*await sync_to_async(_send)(request.user, recipient, data))
+
+
+@async_api_view(['POST'])
+async def decrypt_message(request, message_id):
+    """POST /api/messages/<id>/decrypt/ (ver views.decrypt_message)."""
+    message = await Message.objects.select_related('shared_key', 'body', 'sender').filter(
+        id=message_id, recipient=request.user
+    ).afirst()
+    if message is None:
+        return json_response({'error': 'Mensaje no encontrado'}, status.HTTP_404_NOT_FOUND)
+
+    shared_key = request.data.get('shared_key') if isinstance(request.data, dict) else None
+    return json_response(*await crypto_executor.offload(_decrypt, message, request.user, shared_key))
+
+
+async def _event_stream(user_id, last_id):
+    """Como views._event_stream, esperando en el event loop."""
+    chunks, last_id = _stream_start(user_id, last_id)
+    for chunk in chunks:
+        yield chunk
+
+    deadline = time.monotonic() + settings.MESSAGING_STREAM_TIMEOUT
+    while (remaining := deadline - time.monotonic()) > 0:
+        events = await event_bus.wait_async(
+            user_id, last_id, min(settings.MESSAGING_STREAM_HEARTBEAT, remaining)
+        )
+        if not events:
+            yield ': keep-alive\n\n'
+        for event in events:
+            yield _sse(event)
+            last_id = event['id']
+
+
+@async_api_view(['GET'], authentication_classes=STREAM_AUTHENTICATION)
+async def inbox_stream(request):
+    """GET /api/messages/stream/ (ver views.inbox_stream)."""
+    if not event_bus.enabled:
+        return json_response({'error': 'Eventos deshabilitados'}, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    return _stream_response(_event_stream(request.user.pk, _stream_last_id(request)))
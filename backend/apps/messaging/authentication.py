@@ -0,0 +1,46 @@
+"""
+Autenticación del stream SSE con token de corta duración.
+
+EventSource no puede enviar la cabecera Authorization, así que el
+cliente pide un token con su JWT (POST /api/messages/stream/token/) y
+abre el stream con ?token=<token>. El token está firmado con SECRET_KEY,
+solo vale para el stream y caduca a los MESSAGING_STREAM_TOKEN_TTL
+segundos: el JWT de acceso no aparece en la URL ni en los logs.
+
+El token se comprueba al conectar. Si caduca antes de que EventSource
+reconecte, la reconexión recibe 401 y el cliente debe pedir otro.
+"""
+from django.conf import settings
+from django.core import signing
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication
+
+from apps.users.models import User
+
+_signer = signing.TimestampSigner(salt='messaging.stream')
+
+
+def issue_stream_token(user) -> str:
+    """Token firmado con el id de `user` y la hora de emisión."""
+    return _signer.sign(str(user.pk))
+
+
+class StreamTokenAuthentication(BaseAuthentication):
+    """Autentica por ?token= emitido con issue_stream_token."""
+
+    def authenticate(self, request):
+        token = request.GET.get('token')
+        if not token:
+            return None
+        try:
+            user_id = _signer.unsign(token, max_age=settings.MESSAGING_STREAM_TOKEN_TTL)
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed('Token de stream inválido o caducado')
+
+        user = User.objects.filter(pk=user_id, is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed('Usuario no encontrado')
+        return user, None
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,93 @@
+"""
+Sobre binario versionado para el contenido cifrado de los mensajes.
+
+Formato v1 (big-endian):
+
+    magic   3 bytes  b'PSE'
+    version 1 byte   1
+    type    1 byte   código del tipo de cifrado
+    campos  6 x (uint32 longitud + bytes):
+            key_id, iv, ciphertext, tag, encrypted_key, signature
+
+Todo se guarda en bruto; el base64 solo se aplica en el borde del API.
+"""
+import struct
+from dataclasses import dataclass
+
+MAGIC = b'PSE'
+VERSION = 1
+
+_HEADER = struct.Struct('>3sBB')
+_LENGTH = struct.Struct('>I')
+
+TYPE_CODES = {
+    'AES': 1,
+    'RSA': 2,
+    'HYBRID': 3,
+    'AES-GCM': 4,
+    'HYBRID-GCM': 5,
+}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+FIELDS = ('key_id', 'iv', 'ciphertext', 'tag', 'encrypted_key', 'signature')
+
+
+@dataclass(frozen=True)
+class Envelope:
+    """Contenido cifrado de un mensaje, en bytes."""
+    encryption_type: str
+    ciphertext: bytes
+    iv: bytes = b''
+    tag: bytes = b''
+    encrypted_key: bytes = b''
+    signature: bytes = b''
+    key_id: bytes = b''
+    version: int = VERSION
+
+    def pack(self) -> bytes:
+        """Serializa el sobre."""
+        parts = [_HEADER.pack(MAGIC, VERSION, TYPE_CODES[self.encryption_type])]
+        for name in FIELDS:
+            value = getattr(self, name)
+            parts.append(_LENGTH.pack(len(value)))
+            parts.append(value)
+        return b''.join(parts)
+
+    @classmethod
+    def unpack(cls, data) -> 'Envelope':
+        """
+        Deserializa un sobre (acepta bytes o memoryview).
+
+        Raises:
+            ValueError: si el sobre está truncado, no es un sobre o su
+                versión o tipo de cifrado no se conocen
+        """
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError('Sobre truncado')
+        magic, version, type_code = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError('Sobre inválido')
+        if version != VERSION:
+            raise ValueError(f'Versión de sobre no soportada: {version}')
+        if type_code not in TYPE_NAMES:
+            raise ValueError(f'Tipo de cifrado desconocido: {type_code}')
+
+        offset = _HEADER.size
+        values = {}
+        for name in FIELDS:
+            if offset + _LENGTH.size > len(view):
+                raise ValueError('Sobre truncado')
+            (length,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            if offset + length > len(view):
+                raise ValueError('Sobre truncado')
+            values[name] = view[offset:offset + length].tobytes()
+            offset += length
+
+        return cls(encryption_type=TYPE_NAMES[type_code], version=version, **values)
+
+    @property
+    def sealed_ciphertext(self) -> bytes:
+        """Ciphertext con el tag anexado (formato que esperan los AEAD)."""
+        return self.ciphertext + self.tag if self.tag else self.ciphertext
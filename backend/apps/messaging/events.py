@@ -0,0 +1,170 @@
+"""
+Bus de eventos del inbox (nuevos mensajes y confirmaciones de lectura).
+
+Cada usuario tiene un canal con los últimos eventos en memoria; el
+stream SSE espera en su canal y, al reconectar con Last-Event-ID,
+reenvía los eventos posteriores. Si el cliente pide un id más antiguo
+que lo conservado (reinicio del proceso, buffer desbordado) recibe un
+evento 'resync' y debe volver a pedir el inbox.
+
+Los streams síncronos (WSGI) esperan con una Condition y ocupan un
+hilo; los async (ASGI) registran un future en el canal y deliver() los
+despierta en su event loop, sin hilo por conexión.
+
+La publicación pasa por un transporte. LocalTransport entrega en el
+propio proceso: basta con un worker (o runserver). Con varios workers,
+un transporte de pub/sub compartido debe implementar send() y llamar a
+EventBus.deliver() en cada proceso al recibir.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class LocalTransport:
+    """Entrega los eventos en el mismo proceso que los publica."""
+
+    def __init__(self, bus: 'EventBus'):
+        self.bus = bus
+
+    def send(self, user_id: int, event: Dict[str, Any]):
+        self.bus.deliver(user_id, event)
+
+
+class _Channel:
+    """Eventos recientes de un usuario y la condición para esperarlos."""
+
+    def __init__(self, size: int):
+        self.events: deque = deque(maxlen=size)
+        self.floor = 0  # id del último evento expulsado del buffer
+        self.condition = threading.Condition()
+        self.waiters = set()  # (loop, future) de los streams async
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class EventBus:
+    """
+    Bus de eventos por usuario en memoria.
+
+    Los ids de evento son marcas de tiempo en microsegundos estrictamente
+    crecientes, así que siguen ordenados tras un reinicio y un
+    Last-Event-ID anterior al arranque se detecta como hueco.
+    """
+
+    DEFAULT_BUFFER_SIZE = 100
+    DEFAULT_MAX_USERS = 10000
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 max_users: int = DEFAULT_MAX_USERS):
+        self.buffer_size = buffer_size
+        self.max_users = max_users
+        self.enabled = True
+        self.transport = LocalTransport(self)
+        self._channels: 'OrderedDict[int, _Channel]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_id = 0
+        # Eventos anteriores a este id se perdieron (arranque o expulsión)
+        self._floor = self._next_id()
+
+    def configure(self, enabled: Optional[bool] = None,
+                  buffer_size: Optional[int] = None,
+                  max_users: Optional[int] = None):
+        """Ajusta el bus (se llama desde AppConfig.ready)."""
+        if enabled is not None:
+            self.enabled = enabled
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+        if max_users is not None:
+            self.max_users = max_users
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            return self._last_id
+
+    def _channel(self, user_id: int) -> _Channel:
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                channel = self._channels[user_id] = _Channel(self.buffer_size)
+                while len(self._channels) > self.max_users:
+                    _, evicted = self._channels.popitem(last=False)
+                    if evicted.events:
+                        self._floor = max(self._floor, evicted.events[-1]['id'])
+            else:
+                self._channels.move_to_end(user_id)
+            return channel
+
+    def publish(self, user_id: int, event_type: str, data: Dict[str, Any]):
+        """Publica un evento para `user_id` a través del transporte."""
+        if not self.enabled:
+            return
+        self.transport.send(user_id, {'id': self._next_id(), 'type': event_type, 'data': data})
+
+    def deliver(self, user_id: int, event: Dict[str, Any]):
+        """Guarda el evento en el canal del usuario y despierta a sus streams."""
+        channel = self._channel(user_id)
+        with channel.condition:
+            if len(channel.events) == channel.events.maxlen:
+                channel.floor = channel.events[0]['id']
+            channel.events.append(event)
+            channel.condition.notify_all()
+            for loop, waiter in channel.waiters:
+                try:
+                    loop.call_soon_threadsafe(_wake, waiter)
+                except RuntimeError:
+                    pass  # event loop ya cerrado
+
+    def since(self, user_id: int, last_id: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Eventos con id > last_id.
+
+        Returns:
+            (eventos, hueco): hueco es True si pudo perderse alguno
+        """
+        channel = self._channel(user_id)
+        with channel.condition:
+            gap = last_id < max(channel.floor, self._floor)
+            return [e for e in channel.events if e['id'] > last_id], gap
+
+    def wait(self, user_id: int, last_id: int, timeout: float) -> List[Dict[str, Any]]:
+        """Bloquea hasta que haya eventos posteriores a last_id o venza el timeout."""
+        channel = self._channel(user_id)
+        with channel.condition:
+            channel.condition.wait_for(
+                lambda: channel.events and channel.events[-1]['id'] > last_id, timeout
+            )
+            return [e for e in channel.events if e['id'] > last_id]
+
+    async def wait_async(self, user_id: int, last_id: int,
+                         timeout: float) -> List[Dict[str, Any]]:
+        """Como wait(), pero espera en el event loop sin ocupar un hilo."""
+        channel = self._channel(user_id)
+        loop = asyncio.get_running_loop()
+        entry = (loop, loop.create_future())
+        with channel.condition:
+            if channel.events and channel.events[-1]['id'] > last_id:
+                return [e for e in channel.events if e['id'] > last_id]
+            channel.waiters.add(entry)
+        try:
+            await asyncio.wait([entry[1]], timeout=timeout)
+        finally:
+            with channel.condition:
+                channel.waiters.discard(entry)
+        with channel.condition:
+            return [e for e in channel.events if e['id'] > last_id]
+
+    def last_id(self) -> int:
+        """Id del evento más reciente emitido por este proceso."""
+        with self._lock:
+            return self._last_id
+
+
+# Bus compartido por las vistas de mensajería
+event_bus = EventBus()
@@ -0,0 +1,111 @@
+"""
+Compara almacenamiento en texto base64 con el sobre binario.
+
+Siembra dos tablas SQLite temporales con los mismos mensajes (una con
+las columnas base64 originales y otra con el sobre binario) y reporta
+el tamaño de cada base de datos y el tiempo de CPU del camino de lectura
+(obtener los bytes en bruto listos para descifrar).
+
+Uso:
+    python manage.py bench_envelope --messages 50000
+"""
+import base64
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.messaging.envelope import Envelope
+
+
+class Command(BaseCommand):
+    help = 'Mide el ahorro de espacio y CPU del sobre binario frente a base64'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=50000)
+        parser.add_argument('--max-bytes', type=int, default=2000,
+                            help='Tamaño máximo del contenido cifrado')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        rows = [self._fake_message(rng, options['max_bytes'])
+                for _ in range(options['messages'])]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = os.path.join(tmp, 'legacy.sqlite3')
+            envelope_path = os.path.join(tmp, 'envelope.sqlite3')
+
+            b64 = lambda data: base64.b64encode(data).decode('ascii')
+            legacy = sqlite3.connect(legacy_path)
+            legacy.execute('CREATE TABLE messages (id INTEGER PRIMARY KEY, encryption_type TEXT, '
+                           'ciphertext TEXT, iv TEXT, encrypted_key TEXT, signature TEXT)')
+            legacy.executemany(
+                'INSERT INTO messages (encryption_type, ciphertext, iv, encrypted_key, signature) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(e.encryption_type, b64(e.sealed_ciphertext), b64(e.iv),
+                  b64(e.encrypted_key), b64(e.signature)) for e in rows]
+            )
+            legacy.commit()
+
+            packed = sqlite3.connect(envelope_path)
+            packed.execute('CREATE TABLE messages (id INTEGER PRIMARY KEY, '
+                           'encryption_type TEXT, envelope BLOB)')
+            packed.executemany(
+                'INSERT INTO messages (encryption_type, envelope) VALUES (?, ?)',
+                [(e.encryption_type, e.pack()) for e in rows]
+            )
+            packed.commit()
+
+            legacy.execute('VACUUM')
+            packed.execute('VACUUM')
+            legacy_size = os.path.getsize(legacy_path)
+            envelope_size = os.path.getsize(envelope_path)
+
+            def read_legacy():
+                for _, ciphertext, iv, encrypted_key, signature in legacy.execute(
+                        'SELECT encryption_type, ciphertext, iv, encrypted_key, signature FROM messages'):
+                    (base64.b64decode(ciphertext), base64.b64decode(iv),
+                     base64.b64decode(encrypted_key), base64.b64decode(signature))
+
+            def read_envelope():
+                for _, envelope in packed.execute('SELECT encryption_type, envelope FROM messages'):
+                    Envelope.unpack(envelope)
+
+            legacy_cpu = self._cpu(read_legacy)
+            envelope_cpu = self._cpu(read_envelope)
+            legacy.close()
+            packed.close()
+
+        count = len(rows)
+        self.stdout.write(f'{count} mensajes sembrados')
+        self.stdout.write(f'Tamaño BD base64 : {legacy_size / 1024 / 1024:8.2f} MiB')
+        self.stdout.write(f'Tamaño BD sobre  : {envelope_size / 1024 / 1024:8.2f} MiB '
+                          f'({(1 - envelope_size / legacy_size) * 100:.1f}% menos)')
+        self.stdout.write(f'CPU lectura base64: {legacy_cpu * 1e6 / count:7.2f} us/mensaje')
+        self.stdout.write(f'CPU lectura sobre : {envelope_cpu * 1e6 / count:7.2f} us/mensaje '
+                          f'({(1 - envelope_cpu / legacy_cpu) * 100:.1f}% menos)')
+
+    @staticmethod
+    def _fake_message(rng, max_bytes):
+        encryption_type = rng.choice(['AES', 'RSA', 'HYBRID', 'AES-GCM', 'HYBRID-GCM'])
+        if encryption_type == 'RSA':
+            return Envelope(encryption_type, ciphertext=os.urandom(256),
+                            signature=os.urandom(256))
+        size = rng.randint(1, max_bytes)
+        aead = encryption_type.endswith('GCM')
+        return Envelope(
+            encryption_type,
+            ciphertext=os.urandom(size if aead else (size // 16 + 1) * 16),
+            iv=os.urandom(12 if aead else 16),
+            tag=os.urandom(16) if aead else b'',
+            encrypted_key=os.urandom(256) if encryption_type.startswith('HYBRID') else b''
+        )
+
+    @staticmethod
+    def _cpu(func):
+        start = time.process_time()
+        func()
+        return time.process_time() - start
@@ -0,0 +1,124 @@
+"""
+Latencia de inbox/ y sent/ según la profundidad de página.
+
+Siembra un buzón grande (por defecto 1M mensajes de un remitente a un
+destinatario de prueba) en la base de datos configurada y mide la vista
+real a distintas profundidades con el cursor (created_at, id), frente a
+la misma página pedida con OFFSET.
+
+Usa una base de datos desechable:
+    SQLITE_PATH=/tmp/bench.sqlite3 python manage.py migrate
+    SQLITE_PATH=/tmp/bench.sqlite3 python manage.py bench_inbox --messages 1000000 --keep
+
+Con --keep los datos sembrados se conservan y la siguiente ejecución
+solo siembra lo que falte.
+"""
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.crypto_core.pagination import encode_cursor
+from apps.messaging import views
+from apps.messaging.models import Message
+from apps.messaging.serializers import MessageListSerializer
+from apps.users.models import User
+
+SENDER = 'bench_inbox_sender'
+RECIPIENT = 'bench_inbox_recipient'
+
+
+def _percentile(sorted_samples, fraction: float) -> float:
+    """Percentil por rango más cercano."""
+    index = max(math.ceil(fraction * len(sorted_samples)) - 1, 0)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de inbox/sent paginados por cursor frente a OFFSET'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1_000_000)
+        parser.add_argument('--limit', type=int, default=settings.MESSAGING_PAGE_SIZE)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Peticiones medidas por punto')
+        parser.add_argument('--batch', type=int, default=20000,
+                            help='Filas por INSERT durante la siembra')
+        parser.add_argument('--keep', action='store_true',
+                            help='Conservar los mensajes sembrados')
+
+    def handle(self, *args, **options):
+        sender, _ = User.objects.get_or_create(username=SENDER)
+        recipient, _ = User.objects.get_or_create(username=RECIPIENT)
+        total = options['messages']
+        self._seed(sender, recipient, total, options['batch'])
+
+        limit = options['limit']
+        depths = sorted({d for d in (0, 1000, 10_000, 100_000, total // 2, total - limit) if 0 <= d < total})
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{'endpoint':<8} {'depth':>9} {'cursor p50':>12} {'cursor p99':>12} {'offset p50':>12}")
+        for name, view, user, field in (('inbox', views.inbox, recipient, 'recipient'),
+                                        ('sent', views.sent, sender, 'sender')):
+            queryset = views._list_queryset(**{field: user}).order_by('-created_at', '-id')
+            for depth in depths:
+                cursor = ''
+                if depth:
+                    row = queryset.values('created_at', 'id')[depth - 1]
+                    cursor = encode_cursor(row['created_at'], row['id'])
+
+                def cursor_request():
+                    request = factory.get(f'/api/messages/{name}/', {'cursor': cursor, 'limit': limit}
+                                          if cursor else {'limit': limit})
+                    force_authenticate(request, user=user)
+                    response = view(request)
+                    assert response.status_code == 200, response.data
+
+                def offset_request():
+                    MessageListSerializer(queryset[depth:depth + limit], many=True).data
+
+                keyset = self._measure(cursor_request, options['repeat'])
+                offset = self._measure(offset_request, options['repeat'])
+                self.stdout.write(f'{name:<8} {depth:>9} {keyset[0]:>10.2f}ms {keyset[1]:>10.2f}ms '
+                                  f'{offset[0]:>10.2f}ms')
+
+        if not options['keep']:
+            Message.objects.filter(sender=sender).delete()
+            User.objects.filter(username__in=[SENDER, RECIPIENT]).delete()
+
+    def _measure(self, func, repeat):
+        func()  # calentar
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return _percentile(samples, 0.50), _percentile(samples, 0.99)
+
+    def _seed(self, sender, recipient, total, batch):
+        """Inserta con SQL directo para fijar created_at (auto_now_add lo impide en bulk_create)."""
+        existing = Message.objects.filter(sender=sender).count()
+        if existing >= total:
+            return
+        table = connection.ops.quote_name(Message._meta.db_table)
+        sql = (f'INSERT INTO {table} (sender_id, recipient_id, encryption_type, envelope, '
+               f'key_size, is_read, created_at) VALUES (%s, %s, %s, %s, %s, %s, %s)')
+        start_time = timezone.now() - timedelta(seconds=total)
+        envelope = b'\x01' + bytes(64)
+        started = time.perf_counter()
+        for offset in range(existing, total, batch):
+            rows = [
+                (sender.pk, recipient.pk, 'AES-GCM', envelope, 256, i % 10 != 0,
+                 start_time + timedelta(seconds=i))
+                for i in range(offset, min(offset + batch, total))
+            ]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+            self.stderr.write(f'\rsembrados {offset + len(rows)}/{total}', ending='')
+        self.stderr.write(f'\nsiembra: {time.perf_counter() - started:.1f}s')
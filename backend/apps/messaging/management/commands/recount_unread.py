@@ -0,0 +1,45 @@
+"""
+Recalcula los contadores de mensajes no leídos desde la tabla messages.
+
+Los contadores se mantienen en la misma transacción que los envíos y
+lecturas; este comando solo hace falta si se borraron o modificaron
+mensajes fuera de la API (admin, SQL directo).
+
+Uso:
+    python manage.py recount_unread
+    python manage.py recount_unread --user alice
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from apps.messaging.models import Message, UnreadCounter
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores de mensajes no leídos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Recalcular solo este usuario')
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+
+        fixed = 0
+        with transaction.atomic():
+            unread = dict(
+                Message.objects.filter(is_read=False, recipient__in=users).order_by()
+                .values('recipient_id').annotate(total=Count('id'))
+                .values_list('recipient_id', 'total')
+            )
+            counters = dict(UnreadCounter.objects.filter(user__in=users).values_list('user_id', 'count'))
+            for user_id in users.values_list('id', flat=True).iterator():
+                expected = unread.get(user_id, 0)
+                if counters.get(user_id) != expected:
+                    UnreadCounter.objects.update_or_create(user_id=user_id, defaults={'count': expected})
+                    fixed += 1
+
+        self.stdout.write(f'{fixed} contadores corregidos')
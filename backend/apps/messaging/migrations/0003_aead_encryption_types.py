@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='encryption_type',
+            field=models.CharField(choices=[('AES', 'AES-256-CBC (Simétrico)'), ('RSA', 'RSA-2048 (Asimétrico)'), ('HYBRID', 'Híbrido (RSA + AES)'), ('AES-GCM', 'AES-256-GCM (Simétrico autenticado)'), ('HYBRID-GCM', 'Híbrido (RSA + AES-GCM)')], default='AES', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='iv',
+            field=models.CharField(blank=True, help_text='IV (CBC) o nonce (GCM) en base64', max_length=64),
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Migra ciphertext/iv/encrypted_key/signature (texto base64) al sobre binario.
+
+import base64
+import struct
+
+from django.db import migrations, models
+
+CHUNK_SIZE = 1000
+AEAD_TYPES = ('AES-GCM', 'HYBRID-GCM')
+TAG_SIZE = 16
+
+# Copia congelada del formato v1 de apps/messaging/envelope.py: esta
+# migración debe escribir y leer siempre v1, cambie lo que cambie allí
+V1_HEADER = struct.Struct('>3sBB')
+V1_LENGTH = struct.Struct('>I')
+V1_MAGIC = b'PSE'
+V1_TYPE_CODES = {'AES': 1, 'RSA': 2, 'HYBRID': 3, 'AES-GCM': 4, 'HYBRID-GCM': 5}
+V1_FIELDS = ('key_id', 'iv', 'ciphertext', 'tag', 'encrypted_key', 'signature')
+
+
+def pack_v1(encryption_type, **fields):
+    parts = [V1_HEADER.pack(V1_MAGIC, 1, V1_TYPE_CODES[encryption_type])]
+    for name in V1_FIELDS:
+        value = fields.get(name, b'')
+        parts.append(V1_LENGTH.pack(len(value)))
+        parts.append(value)
+    return b''.join(parts)
+
+
+def unpack_v1(data):
+    """Campos de un sobre v1 (dict de nombre a bytes)."""
+    view = memoryview(data)
+    magic, version, _ = V1_HEADER.unpack_from(view, 0)
+    if magic != V1_MAGIC or version != 1:
+        raise ValueError('Sobre v1 inválido')
+    offset = V1_HEADER.size
+    fields = {}
+    for name in V1_FIELDS:
+        (length,) = V1_LENGTH.unpack_from(view, offset)
+        offset += V1_LENGTH.size
+        fields[name] = view[offset:offset + length].tobytes()
+        offset += length
+    return fields
+
+
+def _iter_chunks(queryset):
+    """Recorre la tabla por rangos de id para acotar la memoria."""
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id).order_by('id')[:CHUNK_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def pack_envelopes(apps, schema_editor):
+    Message = apps.get_model('messaging', 'Message')
+    queryset = Message.objects.filter(envelope__isnull=True).only(
+        'id', 'encryption_type', 'ciphertext', 'iv', 'encrypted_key', 'signature'
+    )
+    for batch in _iter_chunks(queryset):
+        for message in batch:
+            ciphertext = base64.b64decode(message.ciphertext)
+            tag = b''
+            if message.encryption_type in AEAD_TYPES:
+                ciphertext, tag = ciphertext[:-TAG_SIZE], ciphertext[-TAG_SIZE:]
+            message.envelope = pack_v1(
+                message.encryption_type,
+                ciphertext=ciphertext,
+                iv=base64.b64decode(message.iv),
+                tag=tag,
+                encrypted_key=base64.b64decode(message.encrypted_key),
+                signature=base64.b64decode(message.signature)
+            )
+        Message.objects.bulk_update(batch, ['envelope'])
+
+
+def unpack_envelopes(apps, schema_editor):
+    Message = apps.get_model('messaging', 'Message')
+    queryset = Message.objects.only('id', 'envelope')
+    b64 = lambda data: base64.b64encode(data).decode('utf-8')
+    for batch in _iter_chunks(queryset):
+        for message in batch:
+            content = unpack_v1(message.envelope)
+            message.ciphertext = b64(content['ciphertext'] + content['tag'])
+            message.iv = b64(content['iv'])
+            message.encrypted_key = b64(content['encrypted_key'])
+            message.signature = b64(content['signature'])
+        Message.objects.bulk_update(
+            batch, ['ciphertext', 'iv', 'encrypted_key', 'signature']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_aead_encryption_types'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='envelope',
+            field=models.BinaryField(null=True, help_text='Sobre binario con el contenido cifrado'),
+        ),
+        migrations.RunPython(pack_envelopes, unpack_envelopes),
+        # Default '' para que la migración inversa pueda volver a crear la columna
+        migrations.AlterField(
+            model_name='message',
+            name='ciphertext',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='ciphertext',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='iv',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='encrypted_key',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='signature',
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='envelope',
+            field=models.BinaryField(help_text='Sobre binario con el contenido cifrado'),
+        ),
+    ]
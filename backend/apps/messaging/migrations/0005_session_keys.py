@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_message_envelope'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='sharedkey',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='shared_key',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='messages', to='messaging.sharedkey'),
+        ),
+        migrations.AddField(
+            model_name='sharedkey',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='sharedkey',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('user1', 'user2'), name='unique_active_shared_key'),
+        ),
+    ]
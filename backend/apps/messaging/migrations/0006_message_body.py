@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0005_session_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageBody',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('envelope', models.BinaryField(help_text='Sobre binario con IV/nonce, ciphertext y tag')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cuerpo de Mensaje',
+                'verbose_name_plural': 'Cuerpos de Mensaje',
+                'db_table': 'message_bodies',
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='body',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='messages', to='messaging.messagebody'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    Message = apps.get_model('messaging', 'Message')
+    UnreadCounter = apps.get_model('messaging', 'UnreadCounter')
+    counts = (Message.objects.filter(is_read=False).order_by().values('recipient_id')
+              .annotate(total=models.Count('id')).values_list('recipient_id', 'total'))
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, count=total) for user_id, total in counts.iterator()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0007_message_page_indexes'),
+        ('users', '0003_has_keys_column'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de No Leídos',
+                'verbose_name_plural': 'Contadores de No Leídos',
+                'db_table': 'unread_counters',
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='message',
+            name='recipient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='received_messages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='sender',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sent_messages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', 'created_at'], name='messages_unread_idx'),
+        ),
+    ]
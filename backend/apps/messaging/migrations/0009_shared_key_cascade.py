@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0008_unread_counter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='shared_key',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='messaging.sharedkey'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def prune_orphan_bodies(apps, schema_editor):
+    MessageBody = apps.get_model('messaging', 'MessageBody')
+    MessageBody.objects.filter(messages__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0009_shared_key_cascade'),
+    ]
+
+    operations = [
+        migrations.RunPython(prune_orphan_bodies, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,17 @@
 """
 Modelos para el sistema de mensajería cifrada.
 """
+import dataclasses
+
+from typing import Iterable
+
+from asgiref.sync import sync_to_async
 from django.db import models
+from django.db.models import F
 from django.conf import settings
+from django.utils.functional import cached_property
+
+from .envelope import Envelope
 
 
 class Message(models.Model):
@@ -14,17 +23,25 @@ class Message(models.Model):
         ('AES', 'AES-256-CBC (Simétrico)'),
         ('RSA', 'RSA-2048 (Asimétrico)'),
         ('HYBRID', 'Híbrido (RSA + AES)'),
+        ('AES-GCM', 'AES-256-GCM (Simétrico autenticado)'),
+        ('HYBRID-GCM', 'Híbrido (RSA + AES-GCM)'),
     ]
     
+    # Tipos cuyo contenido se cifra con AES-GCM en lugar de AES-CBC
+    AEAD_TYPES = ('AES-GCM', 'HYBRID-GCM')
+    
+    # Sin índice propio: los índices compuestos de Meta empiezan por ellos
     sender = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='sent_messages'
+        related_name='sent_messages',
+        db_index=False
     )
     recipient = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='received_messages'
+        related_name='received_messages',
+        db_index=False
     )
     
     # Tipo de cifrado usado
@@ -34,24 +51,32 @@ class Message(models.Model):
         default='AES'
     )
     
-    # Contenido cifrado
-    ciphertext = models.TextField(
-        help_text="Contenido del mensaje cifrado en base64"
+    # Contenido cifrado: sobre binario versionado (ver envelope.py) con
+    # key_id, IV/nonce, ciphertext, tag, clave cifrada y firma en bruto
+    envelope = models.BinaryField(
+        help_text="Sobre binario con el contenido cifrado"
     )
     
-    # Metadatos de cifrado
-    iv = models.CharField(
-        max_length=64,
-        blank=True,
-        help_text="IV para AES en base64"
-    )
-    encrypted_key = models.TextField(
+    # Cuerpo compartido (envío a varios destinatarios): el sobre propio
+    # solo lleva la clave envuelta y el ciphertext vive en el cuerpo. Al
+    # borrar el último mensaje se borra el cuerpo (signals.py)
+    body = models.ForeignKey(
+        'MessageBody',
+        on_delete=models.PROTECT,
+        null=True,
         blank=True,
-        help_text="Clave AES cifrada con RSA (para híbrido)"
+        related_name='messages'
     )
-    signature = models.TextField(
+    
+    # Clave de sesión (HYBRID): el mensaje no lleva clave envuelta propia.
+    # Sin ella no se puede descifrar, así que se borra con la sesión (y la
+    # sesión con cualquiera de sus dos usuarios)
+    shared_key = models.ForeignKey(
+        'SharedKey',
+        on_delete=models.CASCADE,
+        null=True,
         blank=True,
-        help_text="Firma digital del mensaje"
+        related_name='messages'
     )
     
     # Info adicional
@@ -64,14 +89,126 @@ class Message(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Mensaje'
         verbose_name_plural = 'Mensajes'
+        indexes = [
+            # Paginación por cursor (created_at, id) de recibidos y enviados
+            models.Index(fields=['recipient', '-created_at', '-id'], name='messages_recipient_page_idx'),
+            models.Index(fields=['sender', '-created_at', '-id'], name='messages_sender_page_idx'),
+            # Solo los no leídos: recuento y marcado masivo como leídos
+            models.Index(fields=['recipient', 'created_at'], condition=models.Q(is_read=False),
+                         name='messages_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.username} -> {self.recipient.username} ({self.encryption_type})"
+    
+    @cached_property
+    def content(self) -> Envelope:
+        """Sobre deserializado (se decodifica una sola vez por instancia)."""
+        envelope = Envelope.unpack(self.envelope)
+        if self.body_id:
+            body = self.body.content
+            envelope = dataclasses.replace(
+                envelope, ciphertext=body.ciphertext, iv=body.iv, tag=body.tag
+            )
+        return envelope
+    
+    def seal(self, envelope: Envelope):
+        """Guarda el sobre en el campo binario."""
+        self.envelope = envelope.pack()
+        self.__dict__['content'] = envelope
+
+
+class UnreadCounter(models.Model):
+    """
+    Número de mensajes no leídos de un usuario.
+    
+    Se actualiza en la misma transacción que inserta o marca los
+    mensajes, de modo que unread_count es una lectura por clave primaria
+    en lugar de un COUNT(*) sobre el buzón.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_counter'
+    )
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'unread_counters'
+        verbose_name = 'Contador de No Leídos'
+        verbose_name_plural = 'Contadores de No Leídos'
+    
+    @staticmethod
+    def recount(user_id) -> int:
+        """Recuento exacto desde la tabla de mensajes."""
+        return Message.objects.filter(recipient_id=user_id, is_read=False).count()
+    
+    @classmethod
+    def add(cls, user_ids: Iterable[int], amount: int):
+        """
+        Suma `amount` a los contadores de `user_ids`.
+        
+        Debe llamarse después de insertar o marcar los mensajes y dentro
+        de la misma transacción: los contadores que aún no existen se
+        crean con un recuento que ya incluye el cambio.
+        """
+        user_ids = set(user_ids)
+        updated = cls.objects.filter(user_id__in=user_ids).update(count=F('count') + amount)
+        if updated < len(user_ids):
+            existing = set(cls.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            for user_id in user_ids - existing:
+                cls.objects.get_or_create(user_id=user_id, defaults={'count': cls.recount(user_id)})
+    
+    @classmethod
+    def get(cls, user_id) -> int:
+        """Mensajes no leídos de un usuario (crea el contador si falta)."""
+        count = cls.objects.filter(user_id=user_id).values_list('count', flat=True).first()
+        if count is None:
+            count = cls.objects.get_or_create(
+                user_id=user_id, defaults={'count': cls.recount(user_id)}
+            )[0].count
+        return count
+    
+    @classmethod
+    async def aget(cls, user_id) -> int:
+        """Versión async de get(): la lectura por clave primaria en el event loop."""
+        count = await cls.objects.filter(user_id=user_id).values_list('count', flat=True).afirst()
+        if count is None:
+            count = await sync_to_async(cls.get)(user_id)
+        return count
+
+
+class MessageBody(models.Model):
+    """
+    Contenido cifrado compartido por los mensajes de un envío múltiple.
+    
+    Se cifra una sola vez; cada destinatario tiene su propia fila Message
+    con la clave de contenido envuelta con su clave pública.
+    """
+    
+    envelope = models.BinaryField(
+        help_text="Sobre binario con IV/nonce, ciphertext y tag"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'message_bodies'
+        verbose_name = 'Cuerpo de Mensaje'
+        verbose_name_plural = 'Cuerpos de Mensaje'
+    
+    @cached_property
+    def content(self) -> Envelope:
+        return Envelope.unpack(self.envelope)
 
 
 class SharedKey(models.Model):
     """
     Clave compartida entre dos usuarios para cifrado simétrico.
+    
+    Se usa como clave de sesión de los mensajes híbridos: user1 es el
+    usuario de menor id y solo puede haber una sesión activa por par.
     """
     
     user1 = models.ForeignKey(
@@ -97,9 +234,24 @@ class SharedKey(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    message_count = models.PositiveIntegerField(default=0)
     
     class Meta:
         db_table = 'shared_keys'
-        unique_together = ['user1', 'user2']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user1', 'user2'],
+                condition=models.Q(is_active=True),
+                name='unique_active_shared_key'
+            )
+        ]
         verbose_name = 'Clave Compartida'
         verbose_name_plural = 'Claves Compartidas'
+    
+    def key_for(self, user) -> str:
+        """Clave envuelta (base64) con la clave pública de `user`."""
+        if user.pk == self.user1_id:
+            return self.key_for_user1
+        if user.pk == self.user2_id:
+            return self.key_for_user2
+        raise ValueError('El usuario no participa en esta sesión')
@@ -1,15 +1,41 @@
 """
 Serializadores para mensajería.
 """
+import base64
+from datetime import datetime
+
+from django.conf import settings
 from rest_framework import serializers
+
+from apps.crypto_core.pagination import InvalidCursor, decode_cursor
+from apps.crypto_core.services.trace import POLICIES as TRACE_POLICIES
 from .models import Message, SharedKey
 
 
+class Base64EnvelopeField(serializers.Field):
+    """Expone en base64 un campo en bruto del sobre binario del mensaje."""
+    
+    def __init__(self, part, **kwargs):
+        self.part = part
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, message):
+        content = message.content
+        value = content.sealed_ciphertext if self.part == 'ciphertext' else getattr(content, self.part)
+        return base64.b64encode(value).decode('utf-8')
+
+
 class MessageSerializer(serializers.ModelSerializer):
     """Serializer para mensajes."""
     
     sender_username = serializers.CharField(source='sender.username', read_only=True)
     recipient_username = serializers.CharField(source='recipient.username', read_only=True)
+    ciphertext = Base64EnvelopeField('ciphertext')
+    iv = Base64EnvelopeField('iv')
+    encrypted_key = Base64EnvelopeField('encrypted_key')
+    signature = Base64EnvelopeField('signature')
     
     class Meta:
         model = Message
@@ -27,11 +53,89 @@ class SendMessageSerializer(serializers.Serializer):
     recipient_username = serializers.CharField()
     plaintext = serializers.CharField(max_length=10000)
     encryption_type = serializers.ChoiceField(
-        choices=['AES', 'RSA', 'HYBRID'],
+        choices=['AES', 'RSA', 'HYBRID', 'AES-GCM', 'HYBRID-GCM'],
         default='AES'
     )
     # Opcional: clave AES compartida
     shared_key = serializers.CharField(required=False)
+    # Detalle de los pasos en la respuesta (por defecto el más barato)
+    trace = serializers.ChoiceField(
+        choices=TRACE_POLICIES,
+        default=lambda: settings.MESSAGING_TRACE_POLICY
+    )
+
+
+class SendMultiMessageSerializer(serializers.Serializer):
+    """Serializer para enviar un mensaje a varios destinatarios."""
+    
+    recipient_usernames = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False
+    )
+    plaintext = serializers.CharField(max_length=10000)
+    # Solo tipos híbridos: la clave de contenido se envuelve por destinatario
+    encryption_type = serializers.ChoiceField(
+        choices=['HYBRID', 'HYBRID-GCM'],
+        default='HYBRID-GCM'
+    )
+    trace = serializers.ChoiceField(
+        choices=TRACE_POLICIES,
+        default=lambda: settings.MESSAGING_TRACE_POLICY
+    )
+    
+    def validate_recipient_usernames(self, value):
+        max_recipients = getattr(settings, 'MESSAGING_MAX_RECIPIENTS', 500)
+        # Sin duplicados, conservando el orden
+        value = list(dict.fromkeys(value))
+        if len(value) > max_recipients:
+            raise serializers.ValidationError(f"Maximum {max_recipients} recipients per message")
+        return value
+
+
+class MessagePageQuerySerializer(serializers.Serializer):
+    """Cursor (created_at, id) y tamaño de página de los listados."""
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate_cursor(self, value):
+        try:
+            return decode_cursor(value, datetime, int)
+        except InvalidCursor as e:
+            raise serializers.ValidationError(str(e))
+    
+    def validate_limit(self, value):
+        return min(value, getattr(settings, 'MESSAGING_MAX_PAGE_SIZE', 200))
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """
+    Mensajes a marcar como leídos: lista de ids o tramo del inbox.
+    
+    El tramo va de `newest` (id del mensaje más reciente que vio el
+    cliente) hasta el cursor `until`, ambos incluidos.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    until = serializers.CharField(required=False)
+    newest = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate_ids(self, value):
+        max_ids = getattr(settings, 'MESSAGING_MAX_PAGE_SIZE', 200)
+        if len(value) > max_ids:
+            raise serializers.ValidationError(f"Maximum {max_ids} ids per request")
+        return value
+    
+    def validate_until(self, value):
+        try:
+            return decode_cursor(value, datetime, int)
+        except InvalidCursor as e:
+            raise serializers.ValidationError(str(e))
+    
+    def validate(self, data):
+        if ('ids' in data) == ('until' in data):
+            raise serializers.ValidationError("Provide either ids or until")
+        if ('until' in data) != ('newest' in data):
+            raise serializers.ValidationError("until and newest must be sent together")
+        return data
 
 
 class MessageListSerializer(serializers.ModelSerializer):
@@ -0,0 +1,130 @@
+"""
+Claves de sesión para mensajería híbrida.
+
+En lugar de generar y envolver con RSA una clave AES por mensaje, cada
+par de usuarios comparte una clave de sesión (modelo SharedKey) envuelta
+una vez para cada participante. La clave se reutiliza hasta que expira o
+alcanza el límite de mensajes; después se rota.
+
+La clave desenvuelta se guarda en una caché LRU por usuario, así que el
+coste RSA se paga una vez por sesión y no una vez por mensaje.
+"""
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.crypto_core.services import AESService, KeyCache, RSAService
+from .models import SharedKey
+
+
+# Claves de sesión desenvueltas, indexadas por usuario y clave envuelta
+session_key_cache = KeyCache(max_size=1024)
+
+
+class SessionKeyService:
+    """Obtención, rotación y desenvoltura de claves de sesión."""
+
+    KEY_SIZE = 256
+
+    @staticmethod
+    def enabled() -> bool:
+        return getattr(settings, 'MESSAGING_SESSION_KEYS_ENABLED', True)
+
+    @staticmethod
+    def _pair(sender, recipient):
+        """Orden canónico del par (user1 es el de menor id)."""
+        return (sender, recipient) if sender.pk <= recipient.pk else (recipient, sender)
+
+    @staticmethod
+    def unwrap(session: SharedKey, user) -> bytes:
+        """Retorna la clave AES de la sesión usando la clave privada de `user`."""
+        wrapped = session.key_for(user)
+
+        def loader(wrapped_bytes):
+            key_b64 = RSAService.decrypt(wrapped_bytes.decode('utf-8'), user.get_private_key_bytes())
+            return AESService.key_from_base64(key_b64)
+
+        return session_key_cache.get_or_load(f'session:{user.pk}', wrapped.encode('utf-8'), loader)
+
+    @staticmethod
+    def acquire(sender, recipient) -> Tuple[Optional[SharedKey], Optional[bytes], bool]:
+        """
+        Reserva un mensaje en la sesión activa del par o crea una nueva.
+
+        Debe llamarse dentro de la transacción que inserta el mensaje: si
+        la entrega falla, la reserva (o la sesión nueva) se deshace con ella.
+
+        Returns:
+            (sesión, clave AES, reutilizada). (None, None, False) si las
+            sesiones están deshabilitadas o el remitente no tiene claves.
+        """
+        if not SessionKeyService.enabled() or not sender.has_keys():
+            return None, None, False
+
+        user1, user2 = SessionKeyService._pair(sender, recipient)
+        max_messages = settings.MESSAGING_SESSION_KEY_MAX_MESSAGES
+        now = timezone.now()
+
+        session = SharedKey.objects.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=now),
+            user1=user1, user2=user2, is_active=True
+        ).first()
+
+        if session is not None:
+            # Reserva atómica: falla si otra petición agotó el límite
+            reserved = SharedKey.objects.filter(
+                pk=session.pk, is_active=True, message_count__lt=max_messages
+            ).update(message_count=F('message_count') + 1)
+            if reserved:
+                try:
+                    return session, SessionKeyService.unwrap(session, sender), True
+                except Exception:
+                    # Claves RSA regeneradas u otro fallo: rotar
+                    pass
+
+        return SessionKeyService._rotate(user1, user2, sender, now)
+
+    @staticmethod
+    def _rotate(user1, user2, sender, now):
+        """Desactiva la sesión vigente del par y crea una nueva."""
+        key = AESService.generate_key(SessionKeyService.KEY_SIZE)
+        key_b64 = AESService.key_to_base64(key)
+        wrapped1 = RSAService.encrypt(key_b64, user1.get_public_key_bytes())['ciphertext']
+        wrapped2 = wrapped1 if user1.pk == user2.pk else \
+            RSAService.encrypt(key_b64, user2.get_public_key_bytes())['ciphertext']
+
+        ttl = settings.MESSAGING_SESSION_KEY_TTL
+        try:
+            with transaction.atomic():
+                SharedKey.objects.filter(
+                    user1=user1, user2=user2, is_active=True
+                ).update(is_active=False)
+                session = SharedKey.objects.create(
+                    user1=user1,
+                    user2=user2,
+                    key_for_user1=wrapped1,
+                    key_for_user2=wrapped2,
+                    key_size=SessionKeyService.KEY_SIZE,
+                    expires_at=now + timedelta(seconds=ttl) if ttl else None,
+                    message_count=1
+                )
+        except IntegrityError:
+            # Otra petición creó la sesión en paralelo; se usa una clave propia
+            return None, None, False
+
+        # El remitente ya conoce la clave: evitar su descifrado RSA
+        session_key_cache.get_or_load(
+            f'session:{sender.pk}', session.key_for(sender).encode('utf-8'), lambda _: key
+        )
+        return session, key, False
+
+    @staticmethod
+    def deactivate_for(user):
+        """Desactiva las sesiones de un usuario (p. ej. al regenerar sus claves)."""
+        SharedKey.objects.filter(
+            Q(user1=user) | Q(user2=user), is_active=True
+        ).update(is_active=False)
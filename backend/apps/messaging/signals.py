@@ -0,0 +1,33 @@
+"""
+Limpieza de datos derivados al borrar mensajes.
+
+Los mensajes se borran sobre todo en cascada (al borrar un usuario o una
+clave de sesión) y no pasan por la API, así que el mantenimiento se hace
+con señales del modelo.
+"""
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Message, MessageBody, UnreadCounter
+
+
+@receiver(post_delete, sender=Message, dispatch_uid='messaging_delete_orphan_body')
+def delete_orphan_body(sender, instance, **kwargs):
+    """Borra el cuerpo compartido cuando se borra el último mensaje que lo usa."""
+    if instance.body_id and not Message.objects.filter(body_id=instance.body_id).exists():
+        MessageBody.objects.filter(pk=instance.body_id).delete()
+
+
+@receiver(post_delete, sender=Message, dispatch_uid='messaging_decrement_unread')
+def decrement_unread(sender, instance, **kwargs):
+    """
+    Descuenta un mensaje no leído borrado del contador del destinatario.
+
+    Solo actualiza contadores existentes: uno que falte se crea más tarde
+    con un recuento que ya no incluye el mensaje.
+    """
+    if not instance.is_read:
+        UnreadCounter.objects.filter(user_id=instance.recipient_id, count__gt=0).update(
+            count=F('count') - 1
+        )
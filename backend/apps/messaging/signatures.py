@@ -0,0 +1,51 @@
+"""
+Caché de verificación de firmas.
+
+El ciphertext y la firma de un mensaje son inmutables, así que el
+resultado de verificarla solo cambia si el remitente rota sus claves.
+El resultado se cachea por (mensaje, firma, huella de la clave pública
+del remitente): al reabrir un mensaje no se parsea la clave ni se
+ejecuta la verificación RSA-PSS.
+"""
+import struct
+
+from apps.crypto_core.services import KeyCache, RSAService
+
+
+# Resultados de verificación, indexados por remitente
+signature_cache = KeyCache(max_size=4096)
+
+
+class SignatureService:
+    """Verificación de firmas de mensajes con caché de resultados."""
+
+    @staticmethod
+    def _kind(sender) -> str:
+        return f'signature:{sender.pk}'
+
+    @staticmethod
+    def verify(message, plaintext: str, sender) -> bool:
+        """
+        Verifica la firma de `message` con la clave pública actual de `sender`.
+
+        La entrada de caché se deriva del id del mensaje, la firma y el
+        PEM del remitente (KeyCache guarda solo su SHA-256).
+        """
+        signature = bytes(message.content.signature)
+        public_pem = sender.get_public_key_bytes()
+        material = struct.pack('>Q', message.pk) + signature + public_pem
+
+        def loader(_):
+            return RSAService.verify_bytes(plaintext.encode('utf-8'), signature, public_pem)
+
+        return signature_cache.get_or_load(SignatureService._kind(sender), material, loader)
+
+    @staticmethod
+    def invalidate_for(user):
+        """Descarta los resultados de las firmas de `user` (al rotar sus claves)."""
+        signature_cache.invalidate_kind(SignatureService._kind(user))
+
+    @staticmethod
+    def stats():
+        """Estadísticas de la caché de verificaciones."""
+        return signature_cache.stats()
@@ -0,0 +1,59 @@
+"""
+Sobre binario del contenido cifrado.
+"""
+import os
+
+import pytest
+
+from apps.messaging.envelope import MAGIC, TYPE_CODES, Envelope
+
+
+def _envelope(encryption_type):
+    return Envelope(
+        encryption_type=encryption_type,
+        ciphertext=os.urandom(48),
+        iv=os.urandom(16),
+        tag=os.urandom(16) if encryption_type.endswith('GCM') else b'',
+        encrypted_key=os.urandom(256) if encryption_type != 'AES' else b'',
+        signature=os.urandom(256),
+        key_id=b'session-1'
+    )
+
+
+@pytest.mark.parametrize('encryption_type', sorted(TYPE_CODES))
+def test_round_trip(encryption_type):
+    envelope = _envelope(encryption_type)
+    packed = envelope.pack()
+
+    assert packed.startswith(MAGIC)
+    assert Envelope.unpack(packed) == envelope
+    assert Envelope.unpack(memoryview(packed)) == envelope
+
+
+def test_empty_fields_round_trip():
+    envelope = Envelope(encryption_type='RSA', ciphertext=b'')
+
+    assert Envelope.unpack(envelope.pack()) == envelope
+
+
+def test_sealed_ciphertext_appends_tag():
+    gcm, cbc = _envelope('AES-GCM'), _envelope('AES')
+
+    assert gcm.sealed_ciphertext == gcm.ciphertext + gcm.tag
+    assert cbc.sealed_ciphertext == cbc.ciphertext
+
+
+@pytest.mark.parametrize('cut', [0, 2, 5, 7, 9, 30, -1])
+def test_truncated_envelope(cut):
+    packed = _envelope('HYBRID-GCM').pack()
+
+    with pytest.raises(ValueError):
+        Envelope.unpack(packed[:cut])
+
+
+@pytest.mark.parametrize('header', [b'XYZ\x01\x01', b'PSE\x02\x01', b'PSE\x01\x63'])
+def test_bad_header(header):
+    packed = _envelope('AES').pack()
+
+    with pytest.raises(ValueError):
+        Envelope.unpack(header + packed[len(header):])
@@ -0,0 +1,69 @@
+"""
+Migración 0004: columnas base64 <-> sobre binario v1.
+"""
+import base64
+import os
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from apps.messaging.envelope import Envelope
+from apps.users.models import User
+
+BEFORE = ('messaging', '0003_aead_encryption_types')
+AFTER = ('messaging', '0004_message_envelope')
+
+
+def _migrate(target):
+    executor = MigrationExecutor(connection)
+    executor.migrate(target)
+    return executor.loader.project_state(target).apps
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('utf-8')
+
+
+@pytest.fixture
+def restore_migrations():
+    """Deja el esquema en la última migración para los tests siguientes."""
+    yield
+    _migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_0004_both_directions(restore_migrations):
+    alice = User.objects.create_user(username='ma', email='ma@example.com', password='s3cret-pass')
+    bob = User.objects.create_user(username='mb', email='mb@example.com', password='s3cret-pass')
+    raw = {
+        'AES-GCM': dict(ciphertext=os.urandom(48), iv=os.urandom(12), tag=os.urandom(16),
+                        encrypted_key=b'', signature=os.urandom(256)),
+        'HYBRID': dict(ciphertext=os.urandom(32), iv=os.urandom(16), tag=b'',
+                       encrypted_key=os.urandom(256), signature=os.urandom(256)),
+    }
+
+    old_apps = _migrate([BEFORE])
+    OldMessage = old_apps.get_model('messaging', 'Message')
+    columns = {}
+    for encryption_type, fields in raw.items():
+        columns[encryption_type] = {
+            'ciphertext': _b64(fields['ciphertext'] + fields['tag']),
+            'iv': _b64(fields['iv']),
+            'encrypted_key': _b64(fields['encrypted_key']),
+            'signature': _b64(fields['signature']),
+        }
+        OldMessage.objects.create(sender_id=alice.pk, recipient_id=bob.pk,
+                                  encryption_type=encryption_type, **columns[encryption_type])
+
+    new_apps = _migrate([AFTER])
+    for message in new_apps.get_model('messaging', 'Message').objects.all():
+        fields = raw[message.encryption_type]
+        assert Envelope.unpack(message.envelope) == Envelope(
+            encryption_type=message.encryption_type, **fields
+        )
+
+    old_apps = _migrate([BEFORE])
+    for message in old_apps.get_model('messaging', 'Message').objects.all():
+        expected = columns[message.encryption_type]
+        assert {name: getattr(message, name) for name in expected} == expected
@@ -0,0 +1,67 @@
+"""
+Marcado masivo como leídos por tramo del inbox.
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from apps.messaging.models import Message, UnreadCounter
+from apps.users.models import User
+
+
+def _user(username):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com',
+                                    password='s3cret-pass')
+    user.generate_keys(2048)
+    user.save()
+    return user
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def _send(sender, recipient, plaintext='hola'):
+    response = _client(sender).post('/api/messages/send/', {
+        'recipient_username': recipient.username,
+        'plaintext': plaintext,
+        'encryption_type': 'HYBRID-GCM'
+    }, format='json')
+    assert response.status_code == 201, response.data
+    return response.data['message']['id']
+
+
+@pytest.mark.django_db
+def test_until_does_not_mark_messages_newer_than_the_first_page():
+    alice, bob = _user('ra'), _user('rb')
+    for text in ('uno', 'dos', 'tres'):
+        _send(alice, bob, text)
+    client = _client(bob)
+    page = client.get('/api/messages/inbox/', {'limit': 2}).data
+    seen = [m['id'] for m in page['messages']]
+
+    late = _send(alice, bob, 'cuatro')
+    response = client.post('/api/messages/read/', {
+        'until': page['next_cursor'], 'newest': seen[0]
+    }, format='json')
+
+    assert response.status_code == 200, response.data
+    assert response.data['marked'] == 2
+    assert set(Message.objects.filter(is_read=True).values_list('id', flat=True)) == set(seen)
+    assert not Message.objects.get(pk=late).is_read
+    assert UnreadCounter.get(bob.pk) == 2
+
+
+@pytest.mark.django_db
+def test_until_requires_newest():
+    alice, bob = _user('ra'), _user('rb')
+    _send(alice, bob)
+    _send(alice, bob)
+    client = _client(bob)
+    cursor = client.get('/api/messages/inbox/', {'limit': 1}).data['next_cursor']
+
+    response = client.post('/api/messages/read/', {'until': cursor}, format='json')
+
+    assert response.status_code == 400
+    assert not Message.objects.filter(is_read=True).exists()
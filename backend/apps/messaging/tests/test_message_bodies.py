@@ -0,0 +1,51 @@
+"""
+Limpieza del cuerpo compartido de los envíos múltiples.
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from apps.messaging.models import Message, MessageBody
+from apps.users.models import User
+
+
+def _user(username):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com',
+                                    password='s3cret-pass')
+    user.generate_keys(2048)
+    user.save()
+    return user
+
+
+@pytest.fixture
+def multi_send():
+    sender, bob, carol = _user('ma'), _user('mb'), _user('mc')
+    client = APIClient()
+    client.force_authenticate(sender)
+    response = client.post('/api/messages/send/multi/', {
+        'recipient_usernames': [bob.username, carol.username],
+        'plaintext': 'hola a todos',
+        'encryption_type': 'HYBRID-GCM'
+    }, format='json')
+    assert response.status_code == 201, response.data
+    return sender, bob, carol
+
+
+@pytest.mark.django_db
+def test_body_deleted_with_last_message(multi_send):
+    sender, bob, carol = multi_send
+
+    bob.delete()
+    assert MessageBody.objects.count() == 1
+
+    Message.objects.filter(recipient=carol).delete()
+    assert not MessageBody.objects.exists()
+
+
+@pytest.mark.django_db
+def test_body_deleted_with_sender(multi_send):
+    sender, bob, carol = multi_send
+
+    sender.delete()
+
+    assert not Message.objects.exists()
+    assert not MessageBody.objects.exists()
@@ -0,0 +1,82 @@
+"""
+Número de consultas al abrir mensajes y al marcarlos como leídos.
+
+Los SAVEPOINT/RELEASE de la transacción de _mark_read cuentan como
+consultas dentro de los tests.
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from apps.messaging.events import event_bus
+from apps.messaging.models import Message, UnreadCounter
+from apps.users.models import User
+
+
+def _user(username):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com',
+                                    password='s3cret-pass')
+    user.generate_keys(2048)
+    user.save()
+    return user
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def inbox(monkeypatch):
+    """Tres mensajes sin leer de alice a bob; retorna (cliente de bob, ids)."""
+    monkeypatch.setattr(event_bus, 'enabled', False)
+    alice, bob = _user('qa'), _user('qb')
+    sender = _client(alice)
+    ids = []
+    for _ in range(3):
+        response = sender.post('/api/messages/send/', {
+            'recipient_username': bob.username,
+            'plaintext': 'hola',
+            'encryption_type': 'HYBRID-GCM'
+        }, format='json')
+        assert response.status_code == 201, response.data
+        ids.append(response.data['message']['id'])
+    UnreadCounter.get(bob.pk)
+    return _client(bob), ids
+
+
+@pytest.mark.django_db
+def test_first_open_marks_read_without_rewriting_the_envelope(inbox, django_assert_num_queries):
+    client, ids = inbox
+
+    # SELECT del mensaje, UPDATE de is_read y UPDATE del contador
+    with django_assert_num_queries(5) as captured:
+        response = client.get(f'/api/messages/{ids[0]}/')
+
+    assert response.status_code == 200
+    assert not any('"envelope" =' in query['sql'] for query in captured.captured_queries)
+    assert Message.objects.get(pk=ids[0]).is_read
+
+
+@pytest.mark.django_db
+def test_repeat_open_is_a_single_select(inbox, django_assert_num_queries):
+    client, ids = inbox
+    client.get(f'/api/messages/{ids[0]}/')
+
+    with django_assert_num_queries(1):
+        response = client.get(f'/api/messages/{ids[0]}/')
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('events, queries', [(False, 5), (True, 6)])
+def test_bulk_mark_is_one_update(inbox, monkeypatch, django_assert_num_queries, events, queries):
+    client, ids = inbox
+    # Con eventos se leen además los pares (id, remitente) para los acuses
+    monkeypatch.setattr(event_bus, 'enabled', events)
+
+    with django_assert_num_queries(queries):
+        response = client.post('/api/messages/read/', {'ids': ids}, format='json')
+
+    assert response.data == {'marked': 3, 'unread_count': 0}
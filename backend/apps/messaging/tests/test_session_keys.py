@@ -0,0 +1,113 @@
+"""
+Claves de sesión de los mensajes híbridos: rotación y borrado de usuarios.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.messaging.models import Message, SharedKey, UnreadCounter
+from apps.users.models import User
+
+
+def _user(username):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com',
+                                    password='s3cret-pass')
+    user.generate_keys(2048)
+    user.save()
+    return user
+
+
+def _send(sender, recipient, plaintext='hola'):
+    client = APIClient()
+    client.force_authenticate(sender)
+    response = client.post('/api/messages/send/', {
+        'recipient_username': recipient.username,
+        'plaintext': plaintext,
+        'encryption_type': 'HYBRID-GCM'
+    }, format='json')
+    assert response.status_code == 201, response.data
+    return response.data
+
+
+@pytest.fixture
+def pair(settings):
+    settings.MESSAGING_SESSION_KEYS_ENABLED = True
+    return _user('da'), _user('db')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('deleted', ['sender', 'recipient'])
+def test_delete_user_with_session_keyed_messages(pair, deleted):
+    sender, recipient = pair
+    first = _send(sender, recipient)
+    _send(recipient, sender, 'respuesta')
+    assert first['session_key_id'] is not None
+    assert Message.objects.filter(shared_key__isnull=False).count() == 2
+
+    (sender if deleted == 'sender' else recipient).delete()
+
+    assert not SharedKey.objects.exists()
+    assert not Message.objects.exists()
+    survivor = recipient if deleted == 'sender' else sender
+    assert User.objects.filter(pk=survivor.pk).exists()
+
+
+@pytest.mark.django_db
+def test_delete_user_keeps_other_sessions(pair):
+    sender, recipient = pair
+    other = _user('dc')
+    _send(sender, recipient)
+    _send(other, recipient)
+
+    sender.delete()
+
+    assert list(Message.objects.values_list('sender__username', flat=True)) == ['dc']
+    assert SharedKey.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_session_rotates_at_max_messages(pair, settings):
+    settings.MESSAGING_SESSION_KEY_MAX_MESSAGES = 2
+    sender, recipient = pair
+
+    ids = [_send(sender, recipient)['session_key_id'] for _ in range(3)]
+
+    assert ids[0] == ids[1] != ids[2]
+    assert SharedKey.objects.get(pk=ids[0]).message_count == 2
+    assert not SharedKey.objects.get(pk=ids[0]).is_active
+
+
+@pytest.mark.django_db
+def test_session_rotates_on_expiry(pair):
+    sender, recipient = pair
+    first = _send(sender, recipient)['session_key_id']
+    SharedKey.objects.filter(pk=first).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    second = _send(sender, recipient)['session_key_id']
+
+    assert second != first
+    assert SharedKey.objects.filter(is_active=True).get().pk == second
+
+
+@pytest.mark.django_db
+def test_failed_delivery_releases_the_reservation(pair, monkeypatch):
+    sender, recipient = pair
+    session_id = _send(sender, recipient)['session_key_id']
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('fallo al entregar')
+
+    monkeypatch.setattr(UnreadCounter, 'add', fail)
+    client = APIClient()
+    client.force_authenticate(sender)
+    response = client.post('/api/messages/send/', {
+        'recipient_username': recipient.username,
+        'plaintext': 'hola',
+        'encryption_type': 'HYBRID-GCM'
+    }, format='json')
+
+    assert response.status_code == 500
+    assert SharedKey.objects.get(pk=session_id).message_count == 1
+    assert Message.objects.count() == 1
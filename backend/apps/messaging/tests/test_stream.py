@@ -0,0 +1,69 @@
+"""
+Stream SSE: despliegue ASGI y autenticación de EventSource por token.
+"""
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from apps.messaging import async_views
+from apps.messaging.authentication import issue_stream_token
+from apps.messaging.events import event_bus
+from apps.users.models import User
+
+
+@pytest.fixture
+def user(monkeypatch, settings):
+    monkeypatch.setattr(event_bus, 'enabled', True)
+    settings.MESSAGING_STREAM_TIMEOUT = 0.2
+    settings.MESSAGING_STREAM_HEARTBEAT = 0.1
+    return User.objects.create_user(username='sa', email='sa@example.com', password='s3cret-pass')
+
+
+def _content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_sync_stream_requires_asgi(user):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get('/api/messages/stream/')
+
+    assert response.status_code == 503
+
+
+@pytest.mark.django_db
+def test_stream_token_authenticates_event_source(user, settings):
+    settings.MESSAGING_SYNC_STREAM_ENABLED = True
+    client = APIClient()
+    client.force_authenticate(user)
+    token = client.post('/api/messages/stream/token/').data['token']
+
+    response = APIClient().get('/api/messages/stream/', {'token': token})
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/event-stream'
+    assert _content(response).startswith('retry:')
+
+
+@pytest.mark.django_db
+def test_expired_stream_token_is_rejected(user, settings):
+    settings.MESSAGING_SYNC_STREAM_ENABLED = True
+    token = issue_stream_token(user)
+    settings.MESSAGING_STREAM_TOKEN_TTL = -1
+
+    response = APIClient().get('/api/messages/stream/', {'token': token})
+
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_stream_accepts_token(user):
+    request = RequestFactory().get('/api/messages/stream/', {'token': issue_stream_token(user)})
+
+    response = async_to_sync(async_views.inbox_stream)(request)
+
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/event-stream'
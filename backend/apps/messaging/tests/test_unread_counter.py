@@ -0,0 +1,57 @@
+"""
+Contador de no leídos al borrar mensajes.
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from apps.messaging.models import Message, UnreadCounter
+from apps.users.models import User
+
+
+def _user(username):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com',
+                                    password='s3cret-pass')
+    user.generate_keys(2048)
+    user.save()
+    return user
+
+
+def _send(sender, recipient, plaintext='hola'):
+    client = APIClient()
+    client.force_authenticate(sender)
+    response = client.post('/api/messages/send/', {
+        'recipient_username': recipient.username,
+        'plaintext': plaintext,
+        'encryption_type': 'HYBRID-GCM'
+    }, format='json')
+    assert response.status_code == 201, response.data
+
+
+@pytest.mark.django_db
+def test_deleting_sender_decrements_unread():
+    alice, bob, carol = _user('ua'), _user('ub'), _user('uc')
+    _send(alice, bob)
+    _send(alice, bob)
+    _send(carol, bob)
+    assert UnreadCounter.get(bob.pk) == 3
+
+    alice.delete()
+
+    assert UnreadCounter.get(bob.pk) == 1 == UnreadCounter.recount(bob.pk)
+
+
+@pytest.mark.django_db
+def test_deleting_read_message_keeps_count():
+    alice, bob = _user('ua'), _user('ub')
+    _send(alice, bob)
+    _send(alice, bob)
+    first = Message.objects.filter(recipient=bob).first()
+    Message.objects.filter(pk=first.pk).update(is_read=True)
+    UnreadCounter.add([bob.pk], -1)
+    first.refresh_from_db()
+
+    first.delete()
+    assert UnreadCounter.get(bob.pk) == 1
+
+    Message.objects.filter(recipient=bob).delete()
+    assert UnreadCounter.get(bob.pk) == 0
@@ -1,16 +1,25 @@
 """
 URLs para messaging app.
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'messaging'
 
+# Bajo ASGI (API_ASYNC_VIEWS) las rutas calientes usan las vistas async
+hot = async_views if settings.API_ASYNC_VIEWS else views
+
 urlpatterns = [
     path('', views.list_messages, name='list'),
-    path('inbox/', views.inbox, name='inbox'),
-    path('sent/', views.sent, name='sent'),
-    path('send/', views.send_message, name='send'),
+    path('inbox/', hot.inbox, name='inbox'),
+    path('sent/', hot.sent, name='sent'),
+    path('send/', hot.send_message, name='send'),
+    path('send/multi/', views.send_multi_message, name='send-multi'),
+    path('read/', views.mark_read, name='mark-read'),
+    path('stream/', hot.inbox_stream, name='stream'),
+    path('stream/token/', views.stream_token, name='stream-token'),
     path('<int:message_id>/', views.get_message, name='detail'),
-    path('<int:message_id>/decrypt/', views.decrypt_message, name='decrypt'),
+    path('<int:message_id>/decrypt/', hot.decrypt_message, name='decrypt'),
+    path('<int:message_id>/envelope/', views.message_envelope, name='envelope'),
 ]
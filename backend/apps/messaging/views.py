@@ -1,34 +1,219 @@
 """
 Views para mensajería cifrada.
 """
+import base64
+import json
+import time
+
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
 
 from apps.users.models import User
-from apps.crypto_core.services import AESService, RSAService
-from .models import Message
+from apps.crypto_core.pagination import encode_cursor, keyset_page
+from apps.crypto_core.services import AESService, AEADService, RSAService
+from apps.crypto_core.services.trace import NONE
+from .authentication import StreamTokenAuthentication, issue_stream_token
+from .models import Message, MessageBody, UnreadCounter
+from .envelope import Envelope
+from .events import event_bus
+from .session_keys import SessionKeyService
+from .signatures import SignatureService
 from .serializers import (
-    MessageSerializer, SendMessageSerializer, MessageListSerializer
+    MessageSerializer, SendMessageSerializer, SendMultiMessageSerializer,
+    MessageListSerializer, MessagePageQuerySerializer, MarkReadSerializer
+)
+
+
+def _encrypt_content(encryption_type, plaintext, key, trace):
+    """
+    Cifra el contenido con AES-GCM o AES-CBC según el tipo de mensaje.
+    
+    Retorna (iv, ciphertext, tag, pasos) en bytes; en los tipos AEAD el
+    tag va separado. Sin traza se cifra directamente en bytes; con traza
+    los pasos de demostración ya codifican el resultado en base64.
+    """
+    aead = encryption_type in Message.AEAD_TYPES
+    if trace == NONE:
+        if aead:
+            iv, ciphertext = AEADService.encrypt_bytes(plaintext.encode('utf-8'), key)
+        else:
+            iv, ciphertext = AESService.encrypt_bytes(plaintext.encode('utf-8'), key)
+        steps = None
+    else:
+        service = AEADService if aead else AESService
+        result = service.encrypt_with_steps(
+            plaintext, key, trace=trace, preview_bytes=settings.CRYPTO_TRACE_PREVIEW_BYTES
+        )
+        iv = base64.b64decode(result['result']['iv'])
+        ciphertext = base64.b64decode(result['result']['ciphertext'])
+        steps = result['steps'] or None
+    
+    if aead:
+        return iv, ciphertext[:-AEADService.TAG_SIZE], ciphertext[-AEADService.TAG_SIZE:], steps
+    return iv, ciphertext, b'', steps
+
+
+def _rsa_encrypt(plaintext, public_key_pem, trace):
+    """Cifra con RSA; retorna (ciphertext, pasos) como _encrypt_content."""
+    if trace == NONE:
+        return RSAService.encrypt_bytes(plaintext.encode('utf-8'), public_key_pem), None
+    result = RSAService.encrypt_with_steps(
+        plaintext, public_key_pem, trace=trace, preview_bytes=settings.CRYPTO_TRACE_PREVIEW_BYTES
+    )
+    return base64.b64decode(result['result']['ciphertext']), result['steps'] or None
+
+
+def _rsa_sign(plaintext, private_key_pem, trace):
+    """Firma con RSA-PSS; retorna (firma, pasos) como _encrypt_content."""
+    if trace == NONE:
+        return RSAService.sign_bytes(plaintext.encode('utf-8'), private_key_pem), None
+    result = RSAService.sign_with_steps(
+        plaintext, private_key_pem, trace=trace, preview_bytes=settings.CRYPTO_TRACE_PREVIEW_BYTES
+    )
+    return base64.b64decode(result['result']['signature']), result['steps'] or None
+
+
+def _seal(encryption_type, ciphertext=b'', iv=b'', tag=b'', encrypted_key=b'',
+          signature=b'', key_id=b''):
+    """Construye el sobre binario (todos los campos en bytes)."""
+    return Envelope(
+        encryption_type=encryption_type,
+        ciphertext=ciphertext,
+        iv=iv,
+        tag=tag,
+        encrypted_key=encrypted_key,
+        signature=signature,
+        key_id=key_id
+    ).pack()
+
+
+def _notify_new(messages):
+    """Publica 'message' a cada destinatario cuando la transacción confirma."""
+    if not event_bus.enabled:
+        return
+    events = [(message.recipient_id, MessageListSerializer(message).data) for message in messages]
+    transaction.on_commit(
+        lambda: [event_bus.publish(user_id, 'message', data) for user_id, data in events]
+    )
+
+
+def _deliver(**fields):
+    """Crea el mensaje y suma uno al contador de no leídos del destinatario."""
+    with transaction.atomic():
+        message = Message.objects.create(**fields)
+        UnreadCounter.add([message.recipient_id], 1)
+        _notify_new([message])
+    return message
+
+
+def _mark_read(user, *conditions, receipts=None, **filters):
+    """
+    Marca como leídos los mensajes no leídos de `user` que cumplan los filtros.
+    
+    Un solo UPDATE condicional (is_read=False) y el ajuste del contador
+    en la misma transacción; retorna cuántos mensajes cambiaron.
+    
+    Con el bus de eventos activo se avisa al lector ('read') y a los
+    remitentes ('receipt'). `receipts` son los pares (id, sender_id)
+    afectados si el llamador ya los conoce; si no, se consultan.
+    """
+    with transaction.atomic():
+        queryset = Message.objects.filter(*conditions, recipient=user, is_read=False, **filters)
+        if event_bus.enabled and receipts is None:
+            receipts = list(queryset.values_list('id', 'sender_id'))
+        updated = queryset.update(is_read=True)
+        if updated:
+            UnreadCounter.add([user.pk], -updated)
+            if event_bus.enabled:
+                transaction.on_commit(lambda: _notify_read(user, receipts))
+    return updated
+
+
+def _notify_read(user, receipts):
+    by_sender = {}
+    for message_id, sender_id in receipts:
+        by_sender.setdefault(sender_id, []).append(message_id)
+    event_bus.publish(user.pk, 'read', {'ids': [message_id for message_id, _ in receipts]})
+    for sender_id, ids in by_sender.items():
+        if sender_id != user.pk:
+            event_bus.publish(sender_id, 'receipt', {'ids': ids, 'reader': user.username})
+
+
+def _decrypt_content(message, key):
+    """Descifra el contenido simétrico de un mensaje (CBC o GCM) sin base64."""
+    content = message.content
+    if message.encryption_type in Message.AEAD_TYPES:
+        plaintext = AEADService.decrypt_bytes(content.sealed_ciphertext, content.iv, key)
+    else:
+        plaintext = AESService.decrypt_bytes(content.ciphertext, content.iv, key)
+    return plaintext.decode('utf-8')
+
+
+# Columnas que usa MessageListSerializer (sin el sobre cifrado)
+LIST_FIELDS = (
+    'id', 'encryption_type', 'is_read', 'created_at',
+    'sender__username', 'recipient__username'
 )
+PAGE_ORDER = ('created_at', 'id')
+
+
+def _page_params(request):
+    """Valida cursor y límite; retorna (params, None) o (None, Response 400)."""
+    serializer = MessagePageQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return None, Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = serializer.validated_data
+    return (params.get('cursor'), params.get('limit', settings.MESSAGING_PAGE_SIZE)), None
+
+
+def _list_queryset(**filters):
+    return Message.objects.filter(**filters).select_related(
+        'sender', 'recipient'
+    ).only(*LIST_FIELDS)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_messages(request):
     """
-    Lista mensajes del usuario (enviados y recibidos).
+    Lista mensajes del usuario (enviados y recibidos), paginado por cursor.
     
-    GET /api/messages/
+    GET /api/messages/?cursor=<next_cursor>&limit=N
+    
+    Recibidos y enviados se leen por separado (cada uno por su índice)
+    y se mezclan, en vez de un OR que obliga a ordenar todo el buzón.
     """
-    messages = Message.objects.filter(
-        Q(sender=request.user) | Q(recipient=request.user)
-    ).select_related('sender', 'recipient')
+    page, error = _page_params(request)
+    if error:
+        return error
+    cursor, limit = page
+    
+    received, more_received = keyset_page(
+        _list_queryset(recipient=request.user), PAGE_ORDER, cursor, limit, descending=True
+    )
+    sent_messages, more_sent = keyset_page(
+        _list_queryset(sender=request.user), PAGE_ORDER, cursor, limit, descending=True
+    )
+    
+    # Un mensaje a uno mismo aparece en ambas listas
+    merged = {message.id: message for message in received + sent_messages}
+    messages = sorted(merged.values(), key=lambda m: (m.created_at, m.id), reverse=True)
+    has_more = len(messages) > limit or more_received or more_sent
+    messages = messages[:limit]
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
     
     return Response({
-        'messages': MessageListSerializer(messages, many=True).data
+        'messages': MessageListSerializer(messages, many=True).data,
+        'next_cursor': next_cursor
     })
 
 
@@ -36,17 +221,22 @@ def list_messages(request):
 @permission_classes([IsAuthenticated])
 def inbox(request):
     """
-    Mensajes recibidos.
+    Mensajes recibidos, paginados por cursor.
     
-    GET /api/messages/inbox/
+    GET /api/messages/inbox/?cursor=<next_cursor>&limit=N
     """
-    messages = Message.objects.filter(
-        recipient=request.user
-    ).select_related('sender')
+    page, error = _page_params(request)
+    if error:
+        return error
+    
+    messages, next_cursor = keyset_page(
+        _list_queryset(recipient=request.user), PAGE_ORDER, *page, descending=True
+    )
     
     return Response({
         'messages': MessageListSerializer(messages, many=True).data,
-        'unread_count': messages.filter(is_read=False).count()
+        'unread_count': UnreadCounter.get(request.user.pk),
+        'next_cursor': next_cursor
     })
 
 
@@ -54,16 +244,21 @@ def inbox(request):
 @permission_classes([IsAuthenticated])
 def sent(request):
     """
-    Mensajes enviados.
+    Mensajes enviados, paginados por cursor.
     
-    GET /api/messages/sent/
+    GET /api/messages/sent/?cursor=<next_cursor>&limit=N
     """
-    messages = Message.objects.filter(
-        sender=request.user
-    ).select_related('recipient')
+    page, error = _page_params(request)
+    if error:
+        return error
+    
+    messages, next_cursor = keyset_page(
+        _list_queryset(sender=request.user), PAGE_ORDER, *page, descending=True
+    )
     
     return Response({
-        'messages': MessageListSerializer(messages, many=True).data
+        'messages': MessageListSerializer(messages, many=True).data,
+        'next_cursor': next_cursor
     })
 
 
@@ -90,29 +285,32 @@ def send_message(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
+    return Response(*_send(request.user, recipient, data))
+
+
+def _send(sender, recipient, data):
+    """Cifra y entrega un mensaje de `sender`; retorna (datos, status)."""
     encryption_type = data['encryption_type']
     plaintext = data['plaintext']
-    encryption_steps = []
+    trace = data['trace']
     
     try:
-        if encryption_type == 'AES':
+        if encryption_type in ('AES', 'AES-GCM'):
             # Cifrado simétrico
             key = AESService.generate_key(256)
-            result = AESService.encrypt_with_steps(plaintext, key)
+            iv, ciphertext, tag, steps = _encrypt_content(encryption_type, plaintext, key, trace)
             
-            message = Message.objects.create(
-                sender=request.user,
+            message = _deliver(
+                sender=sender,
                 recipient=recipient,
-                encryption_type='AES',
-                ciphertext=result['result']['ciphertext'],
-                iv=result['result']['iv'],
+                encryption_type=encryption_type,
+                envelope=_seal(encryption_type, ciphertext, iv=iv, tag=tag),
                 key_size=256
             )
             
-            encryption_steps = result['steps']
             response_data = {
                 'message': MessageSerializer(message).data,
-                'encryption_steps': encryption_steps,
+                'encryption_steps': steps,
                 'shared_key': AESService.key_to_base64(key),
                 'note': 'Comparte esta clave de forma segura con el destinatario'
             }
@@ -120,79 +318,193 @@ def send_message(request):
         elif encryption_type == 'RSA':
             # Cifrado asimétrico
             if not recipient.has_keys():
-                return Response(
+                return (
                     {'error': 'El destinatario no tiene claves públicas'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    status.HTTP_400_BAD_REQUEST
                 )
             
             # Cifrar con clave pública del destinatario
-            result = RSAService.encrypt_with_steps(
-                plaintext,
-                recipient.get_public_key_bytes()
-            )
+            ciphertext, steps = _rsa_encrypt(plaintext, recipient.get_public_key_bytes(), trace)
             
             # Firmar con clave privada del remitente
-            signature_result = None
-            signature = ''
-            if request.user.has_keys():
-                signature_result = RSAService.sign_with_steps(
-                    plaintext,
-                    request.user.get_private_key_bytes()
+            signature, signature_steps = b'', None
+            if sender.has_keys():
+                signature, signature_steps = _rsa_sign(
+                    plaintext, sender.get_private_key_bytes(), trace
                 )
-                signature = signature_result['result']['signature']
             
-            message = Message.objects.create(
-                sender=request.user,
+            message = _deliver(
+                sender=sender,
                 recipient=recipient,
                 encryption_type='RSA',
-                ciphertext=result['result']['ciphertext'],
-                signature=signature,
+                envelope=_seal('RSA', ciphertext, signature=signature),
                 key_size=recipient.key_size
             )
             
             response_data = {
                 'message': MessageSerializer(message).data,
-                'encryption_steps': result['steps'],
-                'signature_steps': signature_result['steps'] if signature_result else None
+                'encryption_steps': steps,
+                'signature_steps': signature_steps
             }
             
-        else:  # HYBRID
+        else:  # HYBRID / HYBRID-GCM
             # Cifrado híbrido: AES para datos, RSA para clave
             if not recipient.has_keys():
-                return Response(
+                return (
                     {'error': 'El destinatario no tiene claves públicas'},
-                    status=status.HTTP_400_BAD_REQUEST
+                    status.HTTP_400_BAD_REQUEST
                 )
             
-            # Generar clave AES
-            aes_key = AESService.generate_key(256)
-            
-            # Cifrar mensaje con AES
-            aes_result = AESService.encrypt_with_steps(plaintext, aes_key)
+            # La reserva del mensaje en la sesión y la inserción van en la
+            # misma transacción: si la entrega falla no se gasta el hueco
+            with transaction.atomic():
+                # Clave AES: de sesión si el par tiene una vigente, si no una propia
+                session, aes_key, reused = SessionKeyService.acquire(sender, recipient)
+                encrypted_key = b''
+                if session is None:
+                    aes_key = AESService.generate_key(256)
+                    # Cifrar clave AES con RSA (se envuelve su base64, como siempre)
+                    encrypted_key = RSAService.encrypt_bytes(
+                        AESService.key_to_base64(aes_key).encode('utf-8'),
+                        recipient.get_public_key_bytes()
+                    )
             
-            # Cifrar clave AES con RSA
-            encrypted_key = RSAService.encrypt(
-                AESService.key_to_base64(aes_key),
-                recipient.get_public_key_bytes()
-            )
+                # Cifrar mensaje con AES
+                iv, ciphertext, tag, steps = _encrypt_content(encryption_type, plaintext, aes_key, trace)
             
-            message = Message.objects.create(
-                sender=request.user,
-                recipient=recipient,
-                encryption_type='HYBRID',
-                ciphertext=aes_result['result']['ciphertext'],
-                iv=aes_result['result']['iv'],
-                encrypted_key=encrypted_key['ciphertext'],
-                key_size=256
-            )
+                message = _deliver(
+                    sender=sender,
+                    recipient=recipient,
+                    encryption_type=encryption_type,
+                    envelope=_seal(
+                        encryption_type,
+                        ciphertext,
+                        iv=iv,
+                        tag=tag,
+                        encrypted_key=encrypted_key,
+                        key_id=str(session.pk).encode('utf-8') if session else b''
+                    ),
+                    shared_key=session,
+                    key_size=256
+                )
             
             response_data = {
                 'message': MessageSerializer(message).data,
-                'encryption_steps': aes_result['steps'],
-                'key_encryption': 'Clave AES cifrada con RSA'
+                'encryption_steps': steps,
+                'key_encryption': (
+                    'Clave de sesión reutilizada' if reused else
+                    'Nueva clave de sesión cifrada con RSA' if session else
+                    'Clave AES cifrada con RSA'
+                ),
+                'session_key_id': session.pk if session else None
             }
         
-        return Response(response_data, status=status.HTTP_201_CREATED)
+        return response_data, status.HTTP_201_CREATED
+        
+    except Exception as e:
+        return {'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def send_multi_message(request):
+    """
+    Envía un mensaje híbrido a varios destinatarios.
+    
+    El contenido se cifra una sola vez y se guarda en un MessageBody
+    compartido; la clave AES se envuelve en paralelo con la clave pública
+    de cada destinatario y se crea una fila Message por destinatario.
+    
+    POST /api/messages/send/multi/
+    {
+        "recipient_usernames": ["bob", "carol"],
+        "plaintext": "...",
+        "encryption_type": "HYBRID" | "HYBRID-GCM"
+    }
+    """
+    serializer = SendMultiMessageSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    encryption_type = data['encryption_type']
+    usernames = data['recipient_usernames']
+    
+    found = {
+        user.username: user
+        for user in User.objects.filter(username__in=usernames).only(
+            'id', 'username', 'public_key'
+        )
+    }
+    skipped = []
+    recipients = []
+    for username in usernames:
+        user = found.get(username)
+        if user is None:
+            skipped.append({'username': username, 'error': 'Destinatario no encontrado'})
+        elif not user.public_key:
+            skipped.append({'username': username, 'error': 'El destinatario no tiene claves públicas'})
+        else:
+            recipients.append(user)
+    
+    if not recipients:
+        return Response(
+            {'error': 'Ningún destinatario válido', 'skipped': skipped},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        # Cifrar el contenido una sola vez
+        aes_key = AESService.generate_key(256)
+        iv, ciphertext, tag, steps = _encrypt_content(
+            encryption_type, data['plaintext'], aes_key, data['trace']
+        )
+        body_envelope = _seal(encryption_type, ciphertext, iv=iv, tag=tag)
+        
+        # Envolver la clave para cada destinatario en paralelo
+        wrapped = RSAService.encrypt_many(
+            AESService.key_to_base64(aes_key).encode('utf-8'),
+            [user.get_public_key_bytes() for user in recipients]
+        )
+        
+        rows = []
+        delivered = []
+        for user, result in zip(recipients, wrapped):
+            if result['error']:
+                skipped.append({'username': user.username, 'error': result['error']})
+                continue
+            rows.append(Message(
+                sender=request.user,
+                recipient=user,
+                encryption_type=encryption_type,
+                envelope=Envelope(
+                    encryption_type=encryption_type,
+                    ciphertext=b'',
+                    encrypted_key=result['ciphertext']
+                ).pack(),
+                key_size=256
+            ))
+            delivered.append(user.username)
+        
+        with transaction.atomic():
+            body = MessageBody.objects.create(envelope=body_envelope)
+            for row in rows:
+                row.body = body
+            messages = Message.objects.bulk_create(rows)
+            UnreadCounter.add([row.recipient_id for row in rows], 1)
+            _notify_new(messages)
+        
+        return Response({
+            'body_id': body.id,
+            'encryption_type': encryption_type,
+            'count': len(messages),
+            'messages': [
+                {'id': message.id, 'recipient_username': username}
+                for message, username in zip(messages, delivered)
+            ],
+            'skipped': skipped,
+            'encryption_steps': steps
+        }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
         return Response(
@@ -201,6 +513,51 @@ def send_message(request):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_read(request):
+    """
+    Marca varios mensajes recibidos como leídos en una sola sentencia.
+    
+    POST /api/messages/read/
+    {"ids": [1, 2, 3]}
+        Los mensajes indicados (los ajenos o ya leídos se ignoran).
+    {"until": "<next_cursor>", "newest": <id>}
+        Las páginas ya recorridas: desde el mensaje `newest` (el primero
+        de la primera página que vio el cliente) hasta la posición del
+        cursor, ambos incluidos. Los mensajes que llegaron después de
+        cargar la primera página no se marcan.
+    """
+    serializer = MarkReadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    if 'ids' in data:
+        marked = _mark_read(request.user, id__in=data['ids'])
+    else:
+        newest = Message.objects.filter(
+            id=data['newest'], recipient=request.user
+        ).values_list('created_at', 'id').first()
+        if newest is None:
+            return Response(
+                {'newest': ['Mensaje no encontrado']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        created_at, message_id = data['until']
+        newest_at, newest_id = newest
+        marked = _mark_read(
+            request.user,
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gte=message_id),
+            Q(created_at__lt=newest_at) | Q(created_at=newest_at, id__lte=newest_id)
+        )
+    
+    return Response({
+        'marked': marked,
+        'unread_count': UnreadCounter.get(request.user.pk)
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_message(request, message_id):
@@ -210,7 +567,7 @@ def get_message(request, message_id):
     GET /api/messages/<id>/
     """
     try:
-        message = Message.objects.get(
+        message = Message.objects.select_related('body', 'sender', 'recipient').get(
             Q(id=message_id),
             Q(sender=request.user) | Q(recipient=request.user)
         )
@@ -220,10 +577,12 @@ def get_message(request, message_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Marcar como leído
-    if message.recipient == request.user and not message.is_read:
+    is_recipient = message.recipient_id == request.user.pk
+    
+    # Marcar como leído: UPDATE de una sola columna, sin reescribir el sobre
+    if is_recipient and not message.is_read:
+        _mark_read(request.user, pk=message.pk, receipts=[(message.pk, message.sender_id)])
         message.is_read = True
-        message.save()
     
     response_data = {
         'message': MessageSerializer(message).data,
@@ -232,24 +591,24 @@ def get_message(request, message_id):
     }
     
     # Info para descifrado
-    if message.encryption_type == 'AES':
+    if message.encryption_type in ('AES', 'AES-GCM'):
         response_data['decrypt_info'] = {
-            'type': 'AES',
+            'type': message.encryption_type,
             'requires': 'shared_key',
             'note': 'Necesitas la clave compartida para descifrar'
         }
     elif message.encryption_type == 'RSA':
-        if message.recipient == request.user:
+        if is_recipient:
             response_data['can_decrypt'] = True
             response_data['decrypt_info'] = {
                 'type': 'RSA',
                 'note': 'Puedes descifrar con tu clave privada'
             }
-    elif message.encryption_type == 'HYBRID':
-        if message.recipient == request.user:
+    elif message.encryption_type in ('HYBRID', 'HYBRID-GCM'):
+        if is_recipient:
             response_data['can_decrypt'] = True
             response_data['decrypt_info'] = {
-                'type': 'HYBRID',
+                'type': message.encryption_type,
                 'note': 'Primero se descifra la clave AES con RSA'
             }
     
@@ -265,67 +624,207 @@ def decrypt_message(request, message_id):
     POST /api/messages/<id>/decrypt/
     """
     try:
-        message = Message.objects.get(id=message_id, recipient=request.user)
+        message = Message.objects.select_related('shared_key', 'body', 'sender').get(
+            id=message_id, recipient=request.user
+        )
     except Message.DoesNotExist:
         return Response(
             {'error': 'Mensaje no encontrado'},
             status=status.HTTP_404_NOT_FOUND
         )
     
+    return Response(*_decrypt(message, request.user, request.data.get('shared_key')))
+
+
+def _decrypt(message, user, shared_key=None):
+    """
+    Descifra un mensaje ya cargado (con shared_key, body y sender) para
+    su destinatario `user`; retorna (datos, status). No consulta la BD.
+    """
     try:
-        if message.encryption_type == 'AES':
+        if message.encryption_type in ('AES', 'AES-GCM'):
             # Necesita clave compartida
-            shared_key = request.data.get('shared_key')
             if not shared_key:
-                return Response(
-                    {'error': 'Se requiere shared_key'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+                return {'error': 'Se requiere shared_key'}, status.HTTP_400_BAD_REQUEST
             
             key = AESService.key_from_base64(shared_key)
-            plaintext = AESService.decrypt(message.ciphertext, message.iv, key)
+            plaintext = _decrypt_content(message, key)
             
         elif message.encryption_type == 'RSA':
             # Descifrar con clave privada del destinatario
-            plaintext = RSAService.decrypt(
-                message.ciphertext,
-                request.user.get_private_key_bytes()
-            )
+            plaintext = RSAService.decrypt_bytes(
+                message.content.ciphertext,
+                user.get_private_key_bytes()
+            ).decode('utf-8')
             
-            # Verificar firma si existe
+            # Verificar firma si existe (resultado cacheado por mensaje y clave)
             signature_valid = None
-            if message.signature:
+            if message.content.signature:
                 try:
                     sender = message.sender
                     if sender.has_keys():
-                        result = RSAService.verify(
-                            plaintext,
-                            message.signature,
-                            sender.get_public_key_bytes()
-                        )
-                        signature_valid = result['valid']
+                        signature_valid = SignatureService.verify(message, plaintext, sender)
                 except:
                     signature_valid = False
                     
-        elif message.encryption_type == 'HYBRID':
-            # Descifrar clave AES con RSA
-            aes_key_b64 = RSAService.decrypt(
-                message.encrypted_key,
-                request.user.get_private_key_bytes()
-            )
-            aes_key = AESService.key_from_base64(aes_key_b64)
+        elif message.encryption_type in ('HYBRID', 'HYBRID-GCM'):
+            if message.shared_key_id:
+                # Clave de sesión: RSA solo la primera vez (luego en caché)
+                aes_key = SessionKeyService.unwrap(message.shared_key, user)
+            else:
+                # Descifrar clave AES con RSA (el sobre envuelve su base64)
+                aes_key = base64.b64decode(RSAService.decrypt_bytes(
+                    message.content.encrypted_key,
+                    user.get_private_key_bytes()
+                ))
             
             # Descifrar mensaje con AES
-            plaintext = AESService.decrypt(message.ciphertext, message.iv, aes_key)
+            plaintext = _decrypt_content(message, aes_key)
             
-        return Response({
+        return {
             'plaintext': plaintext,
             'encryption_type': message.encryption_type,
             'signature_valid': signature_valid if message.encryption_type == 'RSA' else None
-        })
+        }, status.HTTP_200_OK
         
     except Exception as e:
+        return {'error': f'Error al descifrar: {str(e)}'}, status.HTTP_400_BAD_REQUEST
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def message_envelope(request, message_id):
+    """
+    Descarga el sobre binario de un mensaje sin codificar en base64.
+    
+    GET /api/messages/<id>/envelope/
+    """
+    try:
+        message = Message.objects.select_related('body').only(
+            'id', 'envelope', 'body__envelope'
+        ).get(
+            Q(id=message_id),
+            Q(sender=request.user) | Q(recipient=request.user)
+        )
+    except Message.DoesNotExist:
         return Response(
-            {'error': f'Error al descifrar: {str(e)}'},
-            status=status.HTTP_400_BAD_REQUEST
+            {'error': 'Mensaje no encontrado'},
+            status=status.HTTP_404_NOT_FOUND
         )
+    
+    # En envíos múltiples se combina con el cuerpo compartido
+    data = message.content.pack() if message.body_id else bytes(message.envelope)
+    return HttpResponse(data, content_type='application/octet-stream')
+
+
+def _sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def _stream_start(user_id, last_id):
+    """
+    Comienzo de un stream SSE: la directiva retry y lo pendiente desde
+    last_id (o 'resync' si hay hueco). Retorna (fragmentos, last_id).
+    """
+    chunks = [f'retry: {settings.MESSAGING_STREAM_RETRY_MS}\n\n']
+    if last_id is None:
+        return chunks, event_bus.last_id()
+    pending, gap = event_bus.since(user_id, last_id)
+    if gap:
+        chunks.append(_sse({'id': event_bus.last_id(), 'type': 'resync', 'data': {}}))
+        last_id = event_bus.last_id()
+        pending = [event for event in pending if event['id'] > last_id]
+    for event in pending:
+        chunks.append(_sse(event))
+        last_id = event['id']
+    return chunks, last_id
+
+
+def _event_stream(user_id, last_id):
+    """
+    Generador SSE: reenvía lo pendiente desde last_id y luego espera en
+    el canal del usuario, con comentarios de keep-alive. Se cierra al
+    cabo de MESSAGING_STREAM_TIMEOUT; el cliente reconecta solo.
+    """
+    chunks, last_id = _stream_start(user_id, last_id)
+    yield from chunks
+    
+    deadline = time.monotonic() + settings.MESSAGING_STREAM_TIMEOUT
+    while (remaining := deadline - time.monotonic()) > 0:
+        events = event_bus.wait(user_id, last_id, min(settings.MESSAGING_STREAM_HEARTBEAT, remaining))
+        if not events:
+            yield ': keep-alive\n\n'
+        for event in events:
+            yield _sse(event)
+            last_id = event['id']
+
+
+def _stream_last_id(request):
+    """Last-Event-ID de la cabecera o de ?last_event_id= (None si falta o no es válido)."""
+    last_id = request.META.get('HTTP_LAST_EVENT_ID') or request.query_params.get('last_event_id')
+    try:
+        return int(last_id) if last_id else None
+    except ValueError:
+        return None
+
+
+def _stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# El stream acepta el JWT en la cabecera o un token de stream en ?token=
+STREAM_AUTHENTICATION = (*api_settings.DEFAULT_AUTHENTICATION_CLASSES, StreamTokenAuthentication)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_token(request):
+    """
+    Token de corta duración para abrir el stream con EventSource.
+    
+    POST /api/messages/stream/token/
+    → {"token": "...", "expires_in": 60}
+    
+    Uso: new EventSource(`/api/messages/stream/?token=${token}`).
+    """
+    return Response({
+        'token': issue_stream_token(request.user),
+        'expires_in': settings.MESSAGING_STREAM_TOKEN_TTL
+    })
+
+
+@api_view(['GET'])
+@authentication_classes(STREAM_AUTHENTICATION)
+@permission_classes([IsAuthenticated])
+def inbox_stream(request):
+    """
+    Eventos del inbox en tiempo real (Server-Sent Events).
+    
+    GET /api/messages/stream/?token=<stream_token>
+    Last-Event-ID: <id>   (opcional, también ?last_event_id=)
+    
+    Eventos: 'message' (nuevo mensaje recibido, mismo formato que el
+    inbox), 'read' (mensajes propios marcados como leídos), 'receipt'
+    (un destinatario leyó mensajes enviados) y 'resync' (pudieron
+    perderse eventos: volver a pedir el inbox).
+    
+    Requiere ASGI (async_views.inbox_stream). Bajo WSGI cada conexión
+    ocuparía un hilo del worker durante MESSAGING_STREAM_TIMEOUT, así
+    que esta versión responde 503 salvo con MESSAGING_SYNC_STREAM_ENABLED
+    (runserver, desarrollo).
+    """
+    if not event_bus.enabled:
+        return Response(
+            {'error': 'Eventos deshabilitados'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    if not settings.MESSAGING_SYNC_STREAM_ENABLED:
+        return Response(
+            {'error': 'El stream de eventos requiere el despliegue ASGI'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    
+    return _stream_response(_event_stream(request.user.pk, _stream_last_id(request)))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:54
+
+from django.db import migrations, models
+
+
+def fill_has_keys(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.exclude(public_key='').exclude(private_key_encrypted='').update(keys_available=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_key_directory_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='keys_available',
+            field=models.BooleanField(db_column='has_keys', default=False, help_text='El usuario tiene un par de claves generado'),
+        ),
+        migrations.RunPython(fill_has_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['keys_available', 'username'], name='users_has_keys_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_has_keys_column'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeyTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField()),
+                ('username', models.CharField(max_length=150)),
+                ('removed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Baja de Clave',
+                'verbose_name_plural': 'Bajas de Claves',
+                'db_table': 'key_tombstones',
+                'indexes': [models.Index(fields=['removed_at', 'user_id'], name='key_tombstones_changed_idx')],
+            },
+        ),
+    ]
@@ -1,8 +1,11 @@
 """
 Modelo de Usuario personalizado con claves RSA.
 """
+import hashlib
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from apps.crypto_core.services import RSAService
 
@@ -28,6 +31,13 @@ class User(AbstractUser):
         default=2048,
         help_text="Tamaño de la clave RSA en bits"
     )
+    # Copia desnormalizada de has_keys() para filtrar sin leer los PEM;
+    # save() la mantiene sincronizada
+    keys_available = models.BooleanField(
+        default=False,
+        db_column='has_keys',
+        help_text="El usuario tiene un par de claves generado"
+    )
     
     # Timestamps
     keys_created_at = models.DateTimeField(
@@ -43,6 +53,35 @@ class User(AbstractUser):
         db_table = 'users'
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            # Sincronización incremental del directorio de claves públicas
+            models.Index(fields=['keys_created_at', 'id'], name='users_keys_changed_idx'),
+            # Listado paginado de usuarios con claves
+            models.Index(fields=['keys_available', 'username'], name='users_has_keys_idx'),
+        ]
+    
+    KEY_FIELDS = {'public_key', 'private_key_encrypted'}
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            keys_written = not self.KEY_FIELDS & self.get_deferred_fields()
+        else:
+            keys_written = bool(self.KEY_FIELDS & set(update_fields))
+        
+        removed = False
+        if keys_written:
+            self.keys_available = self.has_keys()
+            # Claves borradas: sale del directorio (keys_created_at a None
+            # para no registrar la baja dos veces)
+            removed = not self.keys_available and self.keys_created_at is not None
+            if removed:
+                self.keys_created_at = None
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'keys_available', 'keys_created_at'}
+        super().save(*args, **kwargs)
+        if removed:
+            KeyTombstone.record(self)
     
     def generate_keys(self, key_size: int = 2048):
         """
@@ -50,14 +89,38 @@ class User(AbstractUser):
         """
         from django.utils import timezone
         
-        private_pem, public_pem = RSAService.generate_key_pair(key_size)
+        private_pem, public_pem = RSAService.acquire_key_pair(key_size)
+        
+        # Invalidar las claves anteriores en la caché de RSAService
+        if self.has_keys():
+            RSAService.invalidate_keys(
+                self.get_public_key_bytes(),
+                self.get_private_key_bytes()
+            )
         
         self.public_key = public_pem.decode('utf-8')
         # TODO: En producción, cifrar la clave privada con la contraseña del usuario
         self.private_key_encrypted = private_pem.decode('utf-8')
         self.key_size = key_size
-        self.keys_created_at = timezone.now()
+        now = timezone.now()
+        if self.keys_created_at is not None:
+            self.keys_rotated_at = now
+        self.keys_created_at = now
         self.save()
+        
+        # Las claves de sesión envueltas con la clave anterior ya no sirven
+        # y las firmas verificadas con ella deben comprobarse de nuevo
+        from apps.messaging.session_keys import SessionKeyService
+        from apps.messaging.signatures import SignatureService
+        SessionKeyService.deactivate_for(self)
+        SignatureService.invalidate_for(self)
+    
+    @property
+    def key_fingerprint(self) -> str:
+        """SHA-256 (hex) de la clave pública PEM; vacío si no tiene claves."""
+        if not self.public_key:
+            return ''
+        return hashlib.sha256(self.get_public_key_bytes()).hexdigest()
     
     def get_public_key_bytes(self) -> bytes:
         """Retorna la clave pública como bytes."""
@@ -71,3 +134,30 @@ class User(AbstractUser):
     def has_keys(self) -> bool:
         """Verifica si el usuario tiene claves generadas."""
         return bool(self.public_key and self.private_key_encrypted)
+
+
+class KeyTombstone(models.Model):
+    """
+    Baja de un usuario del directorio de claves públicas.
+    
+    Se registra al borrar el usuario o sus claves, para que la
+    sincronización incremental del directorio (?since=) la entregue y
+    los clientes descarten la clave que tenían guardada.
+    """
+    
+    # Sin ForeignKey: la fila sobrevive al borrado del usuario
+    user_id = models.BigIntegerField()
+    username = models.CharField(max_length=150)
+    removed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'key_tombstones'
+        verbose_name = 'Baja de Clave'
+        verbose_name_plural = 'Bajas de Claves'
+        indexes = [
+            models.Index(fields=['removed_at', 'user_id'], name='key_tombstones_changed_idx'),
+        ]
+    
+    @classmethod
+    def record(cls, user):
+        return cls.objects.create(user_id=user.pk, username=user.username)
@@ -1,8 +1,13 @@
 """
 Serializadores para autenticación y usuarios.
 """
+from datetime import datetime
+
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+
+from apps.crypto_core.pagination import InvalidCursor, decode_cursor
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import User
@@ -94,6 +99,55 @@ class PublicKeySerializer(serializers.Serializer):
     username = serializers.CharField()
 
 
+class UserListQuerySerializer(serializers.Serializer):
+    """Parámetros de paginación y búsqueda del listado de usuarios."""
+    q = serializers.CharField(required=False, max_length=150, help_text="Prefijo del username")
+    cursor = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate_cursor(self, value):
+        try:
+            return decode_cursor(value, str)
+        except InvalidCursor as e:
+            raise serializers.ValidationError(str(e))
+    
+    def validate_limit(self, value):
+        return min(value, getattr(settings, 'USERS_LIST_MAX_PAGE_SIZE', 500))
+
+
+class KeyDirectoryQuerySerializer(serializers.Serializer):
+    """
+    Parámetros del directorio de claves públicas.
+    
+    `usernames` pide un conjunto concreto de usuarios; sin él se recorren
+    los cambios de claves desde `since` (cursor de la respuesta anterior).
+    """
+    usernames = serializers.CharField(required=False, help_text="Usernames separados por comas")
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+    
+    def validate_usernames(self, value):
+        max_users = getattr(settings, 'USERS_KEY_DIRECTORY_PAGE_SIZE', 500)
+        usernames = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        if len(usernames) > max_users:
+            raise serializers.ValidationError(f"Maximum {max_users} usernames per request")
+        return usernames
+    
+    def validate_since(self, value):
+        try:
+            return decode_cursor(value, datetime, int)
+        except InvalidCursor as e:
+            raise serializers.ValidationError(str(e))
+    
+    def validate_limit(self, value):
+        return min(value, getattr(settings, 'USERS_KEY_DIRECTORY_PAGE_SIZE', 500))
+    
+    def validate(self, data):
+        if 'usernames' in data and 'since' in data:
+            raise serializers.ValidationError("Use either usernames or since")
+        return data
+
+
 class GenerateUserKeysSerializer(serializers.Serializer):
     """Serializer para generar claves de usuario."""
     key_size = serializers.ChoiceField(
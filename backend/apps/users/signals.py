@@ -0,0 +1,14 @@
+"""
+Bajas del directorio de claves al borrar usuarios.
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import KeyTombstone, User
+
+
+@receiver(post_delete, sender=User, dispatch_uid='users_key_tombstone')
+def record_key_tombstone(sender, instance, **kwargs):
+    """Un usuario borrado que estaba en el directorio deja una baja."""
+    if instance.keys_available:
+        KeyTombstone.record(instance)
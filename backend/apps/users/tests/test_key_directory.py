@@ -0,0 +1,78 @@
+"""
+Sincronización incremental del directorio de claves públicas.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+
+
+def _user(username, keys=True):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com',
+                                    password='s3cret-pass')
+    if keys:
+        user.generate_keys(2048)
+    return user
+
+
+def _sync(client, since=None):
+    """Recorre todas las páginas; retorna (entradas, cursor final)."""
+    entries, cursor = [], since
+    while True:
+        params = {'limit': 2}
+        if cursor:
+            params['since'] = cursor
+        data = client.get('/api/auth/keys/', params).data
+        entries += data['keys']
+        cursor = data['cursor']
+        if not data['has_more']:
+            return entries, cursor
+
+
+@pytest.fixture
+def client():
+    client = APIClient()
+    client.force_authenticate(_user('reader', keys=False))
+    return client
+
+
+@pytest.mark.django_db
+def test_late_commit_is_not_skipped(client):
+    alice, bob = _user('alice'), _user('bob')
+    _, cursor = _sync(client)
+
+    # Rotación fechada antes de la lectura anterior pero confirmada después
+    alice.generate_keys(2048)
+    User.objects.filter(pk=alice.pk).update(keys_created_at=timezone.now() - timedelta(seconds=1))
+
+    entries, _ = _sync(client, cursor)
+    rotated = [entry for entry in entries if entry['username'] == 'alice']
+    assert rotated and rotated[-1]['public_key'] == User.objects.get(pk=alice.pk).public_key
+
+
+@pytest.mark.django_db
+def test_removals_are_delivered(client):
+    alice, bob, carol = _user('alice'), _user('bob'), _user('carol')
+    _, cursor = _sync(client)
+
+    bob.delete()
+    carol.public_key = carol.private_key_encrypted = ''
+    carol.save()
+
+    entries, _ = _sync(client, cursor)
+    removed = {entry['username'] for entry in entries if entry['removed']}
+    assert removed == {'bob', 'carol'}
+    assert all(entry['public_key'] is None for entry in entries if entry['removed'])
+    assert not User.objects.get(pk=carol.pk).keys_available
+
+
+@pytest.mark.django_db
+def test_full_walk_pages_without_repeats(client):
+    for name in ('u1', 'u2', 'u3', 'u4', 'u5'):
+        _user(name)
+
+    entries, _ = _sync(client)
+    assert sorted(entry['username'] for entry in entries) == ['u1', 'u2', 'u3', 'u4', 'u5']
@@ -0,0 +1,36 @@
+"""
+Listado paginado de usuarios con búsqueda por prefijo.
+"""
+import pytest
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+
+
+def _user(username, keys=True):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com',
+                                    password='s3cret-pass')
+    if keys:
+        user.generate_keys(2048)
+    return user
+
+
+@pytest.mark.django_db
+def test_prefix_search_follows_cursor():
+    for username in ('ana', 'andres', 'anibal', 'bruno'):
+        _user(username)
+    client = APIClient()
+    client.force_authenticate(_user('lector', keys=False))
+
+    found, cursor = [], None
+    while True:
+        params = {'q': 'an', 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        data = client.get('/api/auth/users/', params).data
+        found += [u['username'] for u in data['users']]
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+
+    assert found == ['ana', 'andres', 'anibal']
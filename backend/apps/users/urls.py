@@ -22,4 +22,5 @@ urlpatterns = [
     # Other users
     path('users/', views.list_users, name='list-users'),
     path('users/public-key/', views.get_public_key, name='get-public-key'),
+    path('keys/', views.public_key_directory, name='key-directory'),
 ]
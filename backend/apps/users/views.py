@@ -1,17 +1,27 @@
 """
 Views para autenticación y gestión de usuarios.
 """
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 
-from .models import User
+from apps.crypto_core.pagination import after, encode_cursor, keyset_page
+from .models import KeyTombstone, User
 from .serializers import (
     UserSerializer, RegisterSerializer, 
     CustomTokenObtainPairSerializer,
-    PublicKeySerializer, GenerateUserKeysSerializer
+    PublicKeySerializer, GenerateUserKeysSerializer,
+    KeyDirectoryQuerySerializer, UserListQuerySerializer
 )
 
 
@@ -153,19 +163,142 @@ def get_public_key(request):
 @permission_classes([IsAuthenticated])
 def list_users(request):
     """
-    Lista usuarios con sus claves públicas.
+    Lista usuarios con claves públicas, paginado por username.
+    
+    GET /api/auth/users/?q=<prefijo>&cursor=<cursor>&limit=N
     
-    GET /api/auth/users/
+    Solo lee id y username; el filtro usa la columna indexada has_keys.
+    `q` filtra por prefijo del username (usa el índice único de username)
+    y el cursor sigue siendo válido con el mismo `q`.
     """
-    users = User.objects.exclude(id=request.user.id).filter(public_key__isnull=False)
+    serializer = UserListQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    params = serializer.validated_data
+    limit = params.get('limit', settings.USERS_LIST_PAGE_SIZE)
+    queryset = User.objects.filter(keys_available=True).exclude(id=request.user.id)
+    if params.get('q'):
+        queryset = queryset.filter(username__startswith=params['q'])
+    users, next_cursor = keyset_page(
+        queryset.values('id', 'username'), ('username',), params.get('cursor'), limit
+    )
     
     return Response({
         'users': [
-            {
-                'id': u.id,
-                'username': u.username,
-                'has_keys': u.has_keys()
-            }
+            {'id': u['id'], 'username': u['username'], 'has_keys': True}
             for u in users
-        ]
+        ],
+        'next_cursor': next_cursor
     })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def public_key_directory(request):
+    """
+    Directorio de claves públicas con ETag y sincronización incremental.
+    
+    GET /api/auth/keys/?usernames=alice,bob
+        Claves de los usuarios indicados (los que no tienen claves se omiten).
+    GET /api/auth/keys/?since=<cursor>&limit=N
+        Claves generadas o rotadas después del cursor, en orden de cambio,
+        y bajas (usuario o claves borrados) con "removed": true. Sin
+        `since` se recorre el directorio completo. Se sigue pidiendo con
+        `cursor` mientras `has_more` sea true.
+    
+    El cambio se fecha antes de confirmar la transacción, así que una
+    rotación puede aparecer con una fecha ya recorrida. Por eso el
+    cursor de la última página nunca pasa de USERS_KEY_DIRECTORY_OVERLAP
+    segundos antes de ahora y la siguiente sincronización relee ese
+    margen: los clientes deben aplicar las entradas como upserts
+    idempotentes.
+    
+    La respuesta lleva un ETag fuerte; con If-None-Match coincidente
+    se responde 304 sin cuerpo.
+    """
+    serializer = KeyDirectoryQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    params = serializer.validated_data
+    users = User.objects.filter(keys_available=True).only(
+        'id', 'username', 'public_key', 'key_size', 'keys_created_at'
+    )
+    
+    if 'usernames' in params:
+        users = users.filter(username__in=params['usernames']).order_by('username')
+        data = {'keys': [_directory_entry(user) for user in users]}
+    else:
+        limit = params.get('limit', settings.USERS_KEY_DIRECTORY_PAGE_SIZE)
+        since = params.get('since')
+        changes = [
+            (user.keys_created_at, user.id, _directory_entry(user))
+            for user in _changes_since(users, ('keys_created_at', 'id'), since, limit)
+        ]
+        if since is not None:
+            # Las bajas solo interesan a quien ya tiene una copia del directorio
+            changes += [
+                (tombstone.removed_at, tombstone.user_id, _removed_entry(tombstone))
+                for tombstone in _changes_since(
+                    KeyTombstone.objects.all(), ('removed_at', 'user_id'), since, limit
+                )
+            ]
+        changes.sort(key=lambda change: change[:2])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        
+        cursor = request.query_params.get('since')
+        if changes:
+            changed_at, user_id, _ = changes[-1]
+            # Margen para cambios fechados antes pero confirmados después
+            horizon = timezone.now() - timedelta(seconds=settings.USERS_KEY_DIRECTORY_OVERLAP)
+            if not has_more and changed_at > horizon:
+                changed_at, user_id = horizon, 0
+            cursor = encode_cursor(changed_at, user_id)
+        data = {
+            'cursor': cursor,
+            'has_more': has_more,
+            'keys': [entry for _, _, entry in changes]
+        }
+    
+    body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _changes_since(queryset, fields, since, limit):
+    """Hasta limit + 1 filas posteriores a `since` en el orden de `fields`."""
+    if since is not None:
+        queryset = queryset.filter(after(fields, since))
+    return list(queryset.order_by(*fields)[:limit + 1])
+
+
+def _directory_entry(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'public_key': user.public_key,
+        'key_size': user.key_size,
+        'fingerprint': user.key_fingerprint,
+        'updated_at': user.keys_created_at.isoformat() if user.keys_created_at else None,
+        'removed': False
+    }
+
+
+def _removed_entry(tombstone):
+    return {
+        'id': tombstone.user_id,
+        'username': tombstone.username,
+        'public_key': None,
+        'key_size': None,
+        'fingerprint': None,
+        'updated_at': tombstone.removed_at.isoformat(),
+        'removed': True
+    }
@@ -0,0 +1,18 @@
+"""
+ASGI config for CryptoMessenger project.
+
+Activa las vistas async de las rutas calientes (API_ASYNC_VIEWS), que
+usan el ORM async y esperan el trabajo criptográfico en un ejecutor.
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('API_ASYNC_VIEWS', 'True')
+application = get_asgi_application()
+
+# Rellenar el pool de claves RSA desde el arranque del servidor
+from apps.crypto_core.services.rsa_service import key_pool  # noqa: E402
+key_pool.start()
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.crypto_core.middleware.MetricsMiddleware',
+    'apps.crypto_core.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -71,13 +73,18 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Vistas async para las rutas calientes de mensajería y cripto. config/asgi.py
+# lo activa por defecto; bajo WSGI cada vista async costaría un event loop.
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS', 'False').lower() == 'true'
 
 
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
@@ -128,10 +135,11 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
+    # API_THROTTLE_ENABLED=False lo desactiva (p. ej. en pruebas de carga)
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
         'rest_framework.throttling.UserRateThrottle',
-    ],
+    ] if os.environ.get('API_THROTTLE_ENABLED', 'True').lower() == 'true' else [],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '20/minute',
         'user': '100/minute',
@@ -197,3 +205,101 @@ if not DEBUG:
 # Crypto Settings
 CRYPTO_KEY_STORAGE_PATH = BASE_DIR / 'keys'
 CRYPTO_MASTER_PASSWORD = os.environ.get('MASTER_KEY_PASSWORD', 'dev-master-password')
+
+# Caché de claves RSA parseadas (entradas / segundos)
+CRYPTO_KEY_CACHE_SIZE = int(os.environ.get('CRYPTO_KEY_CACHE_SIZE', '256'))
+CRYPTO_KEY_CACHE_TTL = int(os.environ.get('CRYPTO_KEY_CACHE_TTL', '3600'))
+
+# Pool de pares RSA pre-generados (marca de agua por tamaño)
+CRYPTO_KEY_POOL_ENABLED = os.environ.get('CRYPTO_KEY_POOL_ENABLED', 'True').lower() == 'true'
+CRYPTO_KEY_POOL_TARGETS = {
+    2048: int(os.environ.get('CRYPTO_KEY_POOL_2048', '4')),
+    3072: int(os.environ.get('CRYPTO_KEY_POOL_3072', '2')),
+    4096: int(os.environ.get('CRYPTO_KEY_POOL_4096', '1')),
+}
+
+# Máximo de elementos por petición en /api/crypto/aes/batch/
+CRYPTO_BATCH_MAX_ITEMS = int(os.environ.get('CRYPTO_BATCH_MAX_ITEMS', '500'))
+
+# Ejecutor de operaciones RSA con clave privada: 'thread' | 'process' | 'sync'.
+# 'thread' usa la caché de claves parseadas del worker (OpenSSL libera el
+# GIL); 'process' aísla la CPU a cambio de enviar el PEM privado al hijo
+# en cada operación y parsearlo allí sin caché
+CRYPTO_EXECUTOR_MODE = os.environ.get('CRYPTO_EXECUTOR_MODE', 'thread')
+CRYPTO_EXECUTOR_WORKERS = int(os.environ.get('CRYPTO_EXECUTOR_WORKERS', '0')) or None
+CRYPTO_EXECUTOR_MAX_QUEUE = int(os.environ.get('CRYPTO_EXECUTOR_MAX_QUEUE', '32'))
+CRYPTO_EXECUTOR_QUEUE_TIMEOUT = float(os.environ.get('CRYPTO_EXECUTOR_QUEUE_TIMEOUT', '5'))
+CRYPTO_EXECUTOR_TIMEOUT = float(os.environ.get('CRYPTO_EXECUTOR_TIMEOUT', '30'))
+# Hilos con los que las vistas async esperan las llamadas a AES/RSA
+CRYPTO_ASYNC_THREADS = int(os.environ.get('CRYPTO_ASYNC_THREADS', '32'))
+
+# Trazas de pasos: 'full' | 'truncated' | 'none'
+CRYPTO_TRACE_PREVIEW_BYTES = int(os.environ.get('CRYPTO_TRACE_PREVIEW_BYTES', '64'))
+MESSAGING_TRACE_POLICY = os.environ.get('MESSAGING_TRACE_POLICY', 'none')
+
+# Métricas Prometheus (/api/crypto/metrics/). Con varios workers de
+# gunicorn, METRICS_MULTIPROC_DIR debe apuntar a un directorio compartido
+# que se vacía en cada despliegue.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Perfiles cProfile bajo demanda (cabecera X-Profile: 1, solo admin).
+# Se conservan los últimos PROFILING_MAX_FILES en PROFILING_DIR.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', '50'))
+
+# Claves de sesión HYBRID (reutilizadas hasta expirar o alcanzar el límite)
+MESSAGING_SESSION_KEYS_ENABLED = os.environ.get('MESSAGING_SESSION_KEYS_ENABLED', 'True').lower() == 'true'
+MESSAGING_SESSION_KEY_TTL = int(os.environ.get('MESSAGING_SESSION_KEY_TTL', '86400'))
+MESSAGING_SESSION_KEY_MAX_MESSAGES = int(os.environ.get('MESSAGING_SESSION_KEY_MAX_MESSAGES', '1000'))
+MESSAGING_SESSION_KEY_CACHE_SIZE = int(os.environ.get('MESSAGING_SESSION_KEY_CACHE_SIZE', '1024'))
+
+# Caché de resultados de verificación de firmas (TTL 0 = sin expiración)
+MESSAGING_SIGNATURE_CACHE_SIZE = int(os.environ.get('MESSAGING_SIGNATURE_CACHE_SIZE', '4096'))
+MESSAGING_SIGNATURE_CACHE_TTL = int(os.environ.get('MESSAGING_SIGNATURE_CACHE_TTL', '86400'))
+
+# Paginación de /api/auth/users/ (tamaño por defecto y máximo con ?limit=)
+USERS_LIST_PAGE_SIZE = int(os.environ.get('USERS_LIST_PAGE_SIZE', '100'))
+USERS_LIST_MAX_PAGE_SIZE = int(os.environ.get('USERS_LIST_MAX_PAGE_SIZE', '500'))
+
+# Máximo de usuarios por página del directorio de claves (/api/auth/keys/)
+USERS_KEY_DIRECTORY_PAGE_SIZE = int(os.environ.get('USERS_KEY_DIRECTORY_PAGE_SIZE', '500'))
+# Segundos que retrocede el cursor final del directorio para releer
+# cambios confirmados tarde (transacciones más largas que esto se perderían)
+USERS_KEY_DIRECTORY_OVERLAP = float(os.environ.get('USERS_KEY_DIRECTORY_OVERLAP', '5'))
+
+# Paginación por cursor de /api/messages/, inbox/ y sent/
+MESSAGING_PAGE_SIZE = int(os.environ.get('MESSAGING_PAGE_SIZE', '50'))
+MESSAGING_MAX_PAGE_SIZE = int(os.environ.get('MESSAGING_MAX_PAGE_SIZE', '200'))
+
+# Stream SSE del inbox (/api/messages/stream/). El bus de eventos es en
+# memoria: con varios workers cada stream solo ve los eventos publicados
+# en su proceso. El stream necesita ASGI (config/asgi.py): por defecto
+# los eventos solo se activan con API_ASYNC_VIEWS, y la versión WSGI,
+# que ocupa un hilo por conexión, solo con MESSAGING_SYNC_STREAM_ENABLED.
+# EventSource se autentica con ?token= (POST /api/messages/stream/token/),
+# válido MESSAGING_STREAM_TOKEN_TTL segundos.
+MESSAGING_EVENTS_ENABLED = os.environ.get(
+    'MESSAGING_EVENTS_ENABLED', str(API_ASYNC_VIEWS)
+).lower() == 'true'
+MESSAGING_SYNC_STREAM_ENABLED = os.environ.get('MESSAGING_SYNC_STREAM_ENABLED', 'False').lower() == 'true'
+MESSAGING_STREAM_TOKEN_TTL = int(os.environ.get('MESSAGING_STREAM_TOKEN_TTL', '60'))
+MESSAGING_EVENT_BUFFER = int(os.environ.get('MESSAGING_EVENT_BUFFER', '100'))
+MESSAGING_STREAM_TIMEOUT = float(os.environ.get('MESSAGING_STREAM_TIMEOUT', '300'))
+MESSAGING_STREAM_HEARTBEAT = float(os.environ.get('MESSAGING_STREAM_HEARTBEAT', '15'))
+MESSAGING_STREAM_RETRY_MS = int(os.environ.get('MESSAGING_STREAM_RETRY_MS', '3000'))
+
+# Auditoría: los eventos se insertan en lote desde un hilo de fondo al
+# llegar a AUDIT_BATCH_SIZE o cada AUDIT_FLUSH_INTERVAL segundos.
+# AUDIT_SAMPLE_RATE (0-1) limita los eventos DEBUG/INFO que se guardan.
+AUDIT_BUFFER_ENABLED = os.environ.get('AUDIT_BUFFER_ENABLED', 'True').lower() == 'true'
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '200'))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '2'))
+AUDIT_MAX_QUEUE = int(os.environ.get('AUDIT_MAX_QUEUE', '10000'))
+AUDIT_SAMPLE_RATE = float(os.environ.get('AUDIT_SAMPLE_RATE', '1.0'))
+
+# Máximo de destinatarios por envío múltiple
+MESSAGING_MAX_RECIPIENTS = int(os.environ.get('MESSAGING_MAX_RECIPIENTS', '500'))
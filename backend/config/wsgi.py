@@ -6,3 +6,7 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 application = get_wsgi_application()
+
+# Rellenar el pool de claves RSA desde el arranque del servidor
+from apps.crypto_core.services.rsa_service import key_pool  # noqa: E402
+key_pool.start()
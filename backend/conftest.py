@@ -0,0 +1,34 @@
+"""
+Configuración común de los tests.
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _no_background_crypto():
+    """Sin relleno del pool de claves: los tests generan sus claves en línea."""
+    from apps.crypto_core.services.rsa_service import key_pool
+    key_pool.configure(enabled=False)
+    yield
+    key_pool.stop()
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _unbuffered_audit():
+    """
+    Auditoría sin buffer: cada evento se inserta en la petición, dentro
+    de la transacción del test, y no desde el hilo audit-writer con su
+    propia conexión.
+    """
+    from apps.audit.writer import audit_writer
+    audit_writer.configure(enabled=False)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    """
+    Caché vacía por test: los contadores de throttling (20/min anónimo)
+    no se arrastran de un test a otro.
+    """
+    from django.core.cache import cache
+    cache.clear()
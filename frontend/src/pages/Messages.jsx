@@ -5,6 +5,8 @@ export default function Messages() {
     const [tab, setTab] = useState('inbox')
     const [messages, setMessages] = useState([])
     const [loading, setLoading] = useState(true)
+    const [nextCursor, setNextCursor] = useState(null)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [decrypting, setDecrypting] = useState(null)
     const [decryptedContent, setDecryptedContent] = useState({})
     // Claves separadas por mensaje
@@ -14,11 +16,14 @@ export default function Messages() {
         loadMessages()
     }, [tab])
 
+    const fetchPage = (cursor = null) => tab === 'inbox' ? getInbox(cursor) : getSent(cursor)
+
     const loadMessages = async () => {
         setLoading(true)
         try {
-            const data = tab === 'inbox' ? await getInbox() : await getSent()
+            const data = await fetchPage()
             setMessages(data.messages)
+            setNextCursor(data.next_cursor)
         } catch (err) {
             console.error(err)
         } finally {
@@ -26,6 +31,20 @@ export default function Messages() {
         }
     }
 
+    // Las bandejas van por cursor: cada página se añade a la lista
+    const loadMore = async () => {
+        setLoadingMore(true)
+        try {
+            const data = await fetchPage(nextCursor)
+            setMessages(prev => [...prev, ...data.messages])
+            setNextCursor(data.next_cursor)
+        } catch (err) {
+            console.error(err)
+        } finally {
+            setLoadingMore(false)
+        }
+    }
+
     const handleDecrypt = async (msgId, encType) => {
         setDecrypting(msgId)
         try {
@@ -169,6 +188,16 @@ export default function Messages() {
                             )}
                         </div>
                     ))}
+
+                    {nextCursor && (
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="w-full py-2.5 rounded-lg text-sm text-text-secondary border border-wa-border hover:text-text-primary transition disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Cargando...' : 'Cargar más'}
+                        </button>
+                    )}
                 </div>
             )}
         </div>
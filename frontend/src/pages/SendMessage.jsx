@@ -4,6 +4,9 @@ import { sendMessage } from '../services/messages'
 
 export default function SendMessage() {
     const [users, setUsers] = useState([])
+    const [search, setSearch] = useState('')
+    const [nextCursor, setNextCursor] = useState(null)
+    const [loadingUsers, setLoadingUsers] = useState(false)
     const [formData, setFormData] = useState({
         recipient: '',
         message: '',
@@ -13,9 +16,24 @@ export default function SendMessage() {
     const [loading, setLoading] = useState(false)
     const [error, setError] = useState('')
 
+    // El listado está paginado: se busca por prefijo y se piden más páginas con next_cursor
+    const loadUsers = async (cursor = null) => {
+        setLoadingUsers(true)
+        try {
+            const data = await getUsers({ q: search.trim(), cursor })
+            setUsers(prev => cursor ? [...prev, ...data.users] : data.users)
+            setNextCursor(data.next_cursor)
+        } catch {
+            // el selector queda con lo ya cargado
+        } finally {
+            setLoadingUsers(false)
+        }
+    }
+
     useEffect(() => {
-        getUsers().then(data => setUsers(data.users)).catch(() => { })
-    }, [])
+        const timer = setTimeout(() => loadUsers(), 300)
+        return () => clearTimeout(timer)
+    }, [search])
 
     const handleSubmit = async (e) => {
         e.preventDefault()
@@ -51,6 +69,13 @@ export default function SendMessage() {
                 {/* Recipient */}
                 <div className="card p-5">
                     <label className="block text-text-primary font-medium text-sm mb-3">Destinatario</label>
+                    <input
+                        type="text"
+                        value={search}
+                        onChange={e => setSearch(e.target.value)}
+                        className="input-field w-full mb-2"
+                        placeholder="Buscar usuario..."
+                    />
                     <select
                         value={formData.recipient}
                         onChange={e => setFormData(p => ({ ...p, recipient: e.target.value }))}
@@ -64,6 +89,16 @@ export default function SendMessage() {
                             </option>
                         ))}
                     </select>
+                    {nextCursor && (
+                        <button
+                            type="button"
+                            onClick={() => loadUsers(nextCursor)}
+                            disabled={loadingUsers}
+                            className="mt-2 text-xs text-text-secondary hover:text-text-primary disabled:opacity-50"
+                        >
+                            {loadingUsers ? 'Cargando...' : 'Cargar más usuarios'}
+                        </button>
+                    )}
                 </div>
 
                 {/* Encryption Type */}
@@ -28,8 +28,12 @@ export const generateMyKeys = async (keySize = 2048) => {
     return response.data
 }
 
-export const getUsers = async () => {
-    const response = await api.get('/auth/users/')
+// Una página de usuarios: { users, next_cursor }. `q` filtra por prefijo del username
+export const getUsers = async ({ q = '', cursor = null } = {}) => {
+    const params = {}
+    if (q) params.q = q
+    if (cursor) params.cursor = cursor
+    const response = await api.get('/auth/users/', { params })
     return response.data
 }
 
@@ -5,13 +5,14 @@ export const getMessages = async () => {
     return response.data
 }
 
-export const getInbox = async () => {
-    const response = await api.get('/messages/inbox/')
+// Bandejas paginadas: { messages, next_cursor }; se pide la siguiente página con `cursor`
+export const getInbox = async (cursor = null) => {
+    const response = await api.get('/messages/inbox/', { params: cursor ? { cursor } : {} })
     return response.data
 }
 
-export const getSent = async () => {
-    const response = await api.get('/messages/sent/')
+export const getSent = async (cursor = null) => {
+    const response = await api.get('/messages/sent/', { params: cursor ? { cursor } : {} })
     return response.data
 }
 